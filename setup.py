@@ -89,6 +89,7 @@ setup(
         'pyramid',
         'requests',
         'six',
+        'transaction',
         'zope.cachedescriptors',
         'zope.component',
         'zope.container',
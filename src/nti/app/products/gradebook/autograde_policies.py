@@ -17,6 +17,8 @@ from zope import interface
 
 from nti.app.products.gradebook.interfaces import IPendingAssessmentAutoGradePolicy
 
+from nti.app.products.gradebook.stamps import committed_stamp
+
 from nti.assessment.interfaces import IQAssignmentPolicies
 
 from nti.contenttypes.courses.common import get_course_packages
@@ -86,11 +88,13 @@ class PointBasedAutoGradePolicy(object):
     def __init__(self, auto_grade, assignmentId):
         self.assignmentId = assignmentId
         self.auto_grade = copy.copy(auto_grade)
+        # question -> points table
+        question_map = self.auto_grade.get('questions') or self.auto_grade
+        self._question_points = dict(question_map)
+        self._default_points = question_map.get('default')
 
     def question_points(self, ntiid):
-        question_map = self.auto_grade.get('questions') or self.auto_grade
-        points = question_map.get(ntiid) or question_map.get('default')
-        return points
+        return self._question_points.get(ntiid) or self._default_points
 
     def assignment_points(self, item):
         result = 0
@@ -141,8 +145,9 @@ class PointBasedAutoGradePolicy(object):
         return assessed_sum, theoretical_best
 
 
-def _policy_based_autograde_policy(course, assignmentId):
-    policies = IQAssignmentPolicies(course, None)
+def _policy_based_autograde_policy(course, assignmentId, policies=None):
+    if policies is None:
+        policies = IQAssignmentPolicies(course, None)
     if policies is not None:
         # pylint: disable=too-many-function-args
         policy = policies.getPolicyForAssignment(assignmentId)
@@ -180,8 +185,30 @@ def find_autograde_policy(course, assignmentId):
     if course is None or not assignmentId:
         return None
 
+    # Resolved policies are kept on the (committed) course assignment
+    # policies until they change. Only found policies are kept, so
+    # utilities registered later are still picked up.
+    policies = IQAssignmentPolicies(course, None)
+    stamp = committed_stamp(policies)
+    ntiid = getattr(course, 'ntiid', None)
+    if stamp is None or not ntiid:
+        return _find_autograde_policy(course, assignmentId, policies)
+
+    key = (ntiid, assignmentId)
+    cache = getattr(policies, '_v_autograde_policies', None)
+    if cache is None or cache[0] != stamp:
+        cache = policies._v_autograde_policies = (stamp, {})
+    policy = cache[1].get(key)
+    if policy is None:
+        policy = _find_autograde_policy(course, assignmentId, policies)
+        if policy is not None:
+            cache[1][key] = policy
+    return policy
+
+
+def _find_autograde_policy(course, assignmentId, policies=None):
     # Is there a nice new one?
-    policy = _policy_based_autograde_policy(course, assignmentId)
+    policy = _policy_based_autograde_policy(course, assignmentId, policies)
     if policy is not None:
         return policy
 
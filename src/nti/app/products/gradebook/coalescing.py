@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Coalescing of the follow-up work done by grade subscribers.
+
+Every grade change makes our subscribers store activity changes,
+recalculate completion progress and touch assignment history items.
+Bulk operations run inside :func:`coalesced_grade_events`; while it
+is active, subscribers queue that work keyed by (kind, username,
+assignment) instead of doing it, so each distinct action runs once,
+reading the latest state.
+
+.. $Id$
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import threading
+
+from collections import OrderedDict
+
+from contextlib import contextmanager
+
+logger = __import__('logging').getLogger(__name__)
+
+
+class GradeEventQueue(object):
+    """
+    An ordered queue of deduplicated actions; queuing an action under
+    an existing key replaces the queued one but keeps its position.
+    """
+
+    def __init__(self):
+        self._actions = OrderedDict()
+
+    def __len__(self):
+        return len(self._actions)
+
+    def add(self, key, func, *args):
+        self._actions[key] = (func, args)
+
+    def clear(self):
+        self._actions.clear()
+
+    def flush(self):
+        count = 0
+        while self._actions:
+            unused_key, (func, args) = self._actions.popitem(last=False)
+            func(*args)
+            count += 1
+        return count
+
+
+class _Local(threading.local):
+    queue = None
+
+_local = _Local()
+
+
+def current_grade_event_queue():
+    """
+    Return the active :class:`GradeEventQueue`, if any.
+    """
+    return _local.queue
+
+
+def queue_grade_action(kind, username, assignment_id, func, *args):
+    """
+    Queue ``func(*args)`` if grade events are being coalesced and return
+    True; return False (and do nothing) otherwise.
+    """
+    queue = current_grade_event_queue()
+    if queue is None:
+        return False
+    username = username.lower() if username else username
+    queue.add((kind, username, assignment_id), func, *args)
+    return True
+
+
+@contextmanager
+def coalesced_grade_events():
+    """
+    Coalesce grade subscriber actions until the block exits. Nested
+    blocks join the outermost one. If the block raises, the queued
+    actions are dropped (the transaction is expected to abort).
+    """
+    if _local.queue is not None:
+        yield _local.queue
+        return
+    queue = _local.queue = GradeEventQueue()
+    try:
+        yield queue
+    finally:
+        # Actions run with coalescing off
+        _local.queue = None
+    count = queue.flush()
+    logger.debug("%s coalesced grade action(s) done", count)
+
@@ -21,7 +21,7 @@ from nti.app.assessment.common.policy import get_policy_completion_passing_perce
 from nti.app.products.gradebook.interfaces import IGradeBook
 from nti.app.products.gradebook.interfaces import IExcusedGrade
 
-from nti.app.products.gradebook.utils.gradebook import numeric_grade_val
+from nti.app.products.gradebook.normalization import grade_numeric_value
 
 from nti.assessment.interfaces import IQAssignment
 from nti.assessment.interfaces import IPlaceholderAssignmentSubmission
@@ -87,8 +87,7 @@ def _assignment_progress(user, assignment, course):
         # We're here because of grade value or excused grade.
         progress_date = grade.lastModified
 
-    grade_val = getattr(grade, 'value', None)
-    grade_val = numeric_grade_val(grade_val)
+    grade_val = grade_numeric_value(grade)
 
     total_points = None
     policy = get_auto_grade_policy(assignment, course)
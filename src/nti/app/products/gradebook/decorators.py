@@ -26,6 +26,8 @@ from nti.app.assessment.common.policy import get_policy_completion_passing_perce
 
 from nti.app.assessment.common.submissions import get_submission_intids_for_courses
 
+from nti.app.products.gradebook.enrollments import get_enrollment_scopes
+
 from nti.app.products.gradebook.interfaces import ACT_VIEW_GRADES
 
 from nti.app.products.gradebook.interfaces import IGrade
@@ -44,7 +46,6 @@ from nti.contenttypes.completion.interfaces import IPrincipalCompletedItemContai
 from nti.contenttypes.completion.utils import get_indexed_completed_items_intids
 
 from nti.contenttypes.courses.interfaces import ICourseInstance
-from nti.contenttypes.courses.interfaces import ICourseEnrollments
 from nti.contenttypes.courses.interfaces import ICourseCatalogEntry
 from nti.contenttypes.courses.interfaces import ICourseAssignmentCatalog
 
@@ -292,12 +293,11 @@ class _InstructorDataForAssignment(AbstractAuthenticatedRequestAwareDecorator):
         """
         The number of students who could possibly take this assignment.
         """
-        # pylint: disable=too-many-function-args
-        enrollments = ICourseEnrollments(course)
+        scopes = get_enrollment_scopes(course)
         if assignment.is_non_public:
-            result = enrollments.count_legacy_forcredit_enrollments()
+            result = scopes.for_credit_enrollment_count
         else:
-            result = enrollments.count_enrollments()
+            result = scopes.enrollment_count
         return result
 
     def _do_decorate_external(self, assignment, external): # pylint: disable=arguments-differ
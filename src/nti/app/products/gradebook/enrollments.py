@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Cached enrollment scope sets of a course.
+
+.. $Id$
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+from collections import namedtuple
+
+from nti.app.products.gradebook.gradebook import gradebook_for_course
+
+from nti.app.products.gradebook.utils.cache import ValidatedLRUCache
+
+from nti.contenttypes.courses.interfaces import ES_CREDIT
+from nti.contenttypes.courses.interfaces import ES_CREDIT_DEGREE
+from nti.contenttypes.courses.interfaces import ES_CREDIT_NONDEGREE
+
+from nti.contenttypes.courses.interfaces import ICourseEnrollments
+
+from nti.dataserver.interfaces import IEnumerableEntityContainer
+
+#: The enrollment scopes considered for credit
+CREDIT_SCOPES = (ES_CREDIT, ES_CREDIT_DEGREE, ES_CREDIT_NONDEGREE)
+
+#: How many course enrollment scopes we keep around per process
+ENROLLMENT_SCOPES_CACHE_SIZE = 200
+
+logger = __import__('logging').getLogger(__name__)
+
+
+# The lowercased usernames of the students (none of the student sets
+# include instructors) and instructors of a course. ``all``, ``open``
+# and ``for_credit`` split the students by the scope of their
+# enrollment records; the ``sharing_`` sets split the enrolled
+# principals by membership in the ForCredit sharing scope of the
+# course, as the gradebook summaries do. The counts are those of the
+# course enrollments.
+CourseEnrollmentScopes = namedtuple('CourseEnrollmentScopes',
+                                    ('all', 'open', 'for_credit', 'instructors',
+                                     'enrollment_count',
+                                     'for_credit_enrollment_count',
+                                     'sharing_all', 'sharing_open',
+                                     'sharing_for_credit'))
+
+
+def _instructor_usernames(course):
+    return frozenset(x.id.lower() for x in course.instructors or ())
+
+
+def _credit_scope_usernames(course):
+    for_credit_scope = course.SharingScopes[ES_CREDIT]
+    return {
+        x.lower() for x
+        in IEnumerableEntityContainer(for_credit_scope).iter_usernames()
+    }
+
+
+def build_enrollment_scopes(course, instructors=None):
+    """
+    Build the :class:`CourseEnrollmentScopes` of the given course.
+    """
+    if instructors is None:
+        instructors = _instructor_usernames(course)
+    enrollments = ICourseEnrollments(course)
+    everyone = set()
+    credit = set()
+    for record in enrollments.iter_enrollments():
+        principal = record.Principal
+        if principal is None:
+            continue
+        username = principal.username.lower()
+        everyone.add(username)
+        if record.Scope in CREDIT_SCOPES:
+            credit.add(username)
+    students = frozenset(everyone - instructors)
+    for_credit = frozenset(credit - instructors)
+
+    # pylint: disable=too-many-function-args
+    principals = {x.lower() for x in enrollments.iter_principals()}
+    sharing_all = frozenset(principals - instructors)
+    sharing_credit = frozenset(_credit_scope_usernames(course) & sharing_all)
+    return CourseEnrollmentScopes(students, students - for_credit, for_credit,
+                                  instructors,
+                                  enrollments.count_enrollments(),
+                                  enrollments.count_legacy_forcredit_enrollments(),
+                                  sharing_all, sharing_all - sharing_credit,
+                                  sharing_credit)
+
+
+_scopes_cache = ValidatedLRUCache(ENROLLMENT_SCOPES_CACHE_SIZE)
+
+
+def get_enrollment_scopes(course):
+    """
+    Return the (possibly cached) :class:`CourseEnrollmentScopes` of the
+    given course. Cached scopes are validated against the book
+    enrollment stamp, which the enrollment record subscribers bump,
+    and the course instructors.
+    """
+    instructors = _instructor_usernames(course)
+    book = gradebook_for_course(course, False)
+    key = getattr(book, 'NTIID', None)
+    stamp = getattr(book, 'enrollment_stamp', None)
+    # Only committed states are cached
+    cacheable = bool(key) and stamp is not None
+    validator = (stamp, instructors)
+    result = _scopes_cache.query(key, validator) if cacheable else None
+    if result is None:
+        result = build_enrollment_scopes(course, instructors)
+        if cacheable:
+            _scopes_cache.store(key, validator, result)
+    return result
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+.. $Id$
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+from zope import component
+from zope import interface
+
+from zope.component.hooks import setHooks
+from zope.component.hooks import site as current_site
+
+from zope.intid.interfaces import IIntIds
+
+from zope.location import locate
+
+from nti.app.products.gradebook.gradebook import gradebook_for_course
+
+from nti.app.products.gradebook.index import IX_FEEDBACK_COUNT
+from nti.app.products.gradebook.index import IX_SUBMITTED_TIME
+from nti.app.products.gradebook.index import install_grade_catalog
+from nti.app.products.gradebook.index import get_grade_history_item
+
+from nti.app.products.gradebook.index import GradeFeedbackCountIndex
+from nti.app.products.gradebook.index import GradeSubmittedTimeIndex
+
+from nti.app.products.gradebook.interfaces import IGrade
+
+from nti.contenttypes.courses.interfaces import ICourseCatalog
+from nti.contenttypes.courses.interfaces import ICourseInstance
+
+from nti.dataserver.interfaces import IDataserver
+from nti.dataserver.interfaces import IOIDResolver
+
+from nti.dataserver.metadata.index import IX_MIMETYPE
+from nti.dataserver.metadata.index import get_metadata_catalog
+
+from nti.site.hostpolicy import get_all_host_sites
+
+generation = 12
+
+logger = __import__('logging').getLogger(__name__)
+
+
+@interface.implementer(IDataserver)
+class MockDataserver(object):
+
+    root = None
+
+    def get_by_oid(self, oid, ignore_creator=False):
+        resolver = component.queryUtility(IOIDResolver)
+        if resolver is None:
+            logger.warning("Using dataserver without a proper ISiteManager.")
+        else:
+            return resolver.get_object_by_oid(oid, ignore_creator)
+        return None
+
+
+def process_course(course):
+    book = gradebook_for_course(course, False)
+    if book is None:
+        return 0
+    book.initialize_counters()
+    book.rebuild_indexes()
+    return 1
+
+
+def process_catalog(catalog, intids, seen):
+    result = 0
+    if catalog is None or catalog.isEmpty():
+        return result
+    for entry in catalog.iterCatalogEntries():
+        course = ICourseInstance(entry)
+        doc_id = intids.queryId(course)
+        if doc_id is None or doc_id in seen:
+            continue
+        seen.add(doc_id)
+        result += process_course(course)
+    return result
+
+
+def add_grade_indexes(ds_folder, intids):
+    """
+    Add the submission time and feedback count indexes to the grade
+    catalog, returning the number of grades indexed.
+    """
+    result = 0
+    catalog = install_grade_catalog(ds_folder, intids)
+    new_indexes = []
+    for name, clazz in ((IX_SUBMITTED_TIME, GradeSubmittedTimeIndex),
+                        (IX_FEEDBACK_COUNT, GradeFeedbackCountIndex)):
+        if name in catalog:
+            continue
+        index = clazz(family=intids.family)
+        locate(index, catalog, name)
+        intids.register(index)
+        catalog[name] = index
+        new_indexes.append(index)
+
+    if new_indexes:
+        metadata = get_metadata_catalog()
+        query = {
+            IX_MIMETYPE: {'any_of': ('application/vnd.nextthought.grade',)}
+        }
+        for uid in metadata.apply(query) or ():
+            grade = intids.queryObject(uid)
+            if not IGrade.providedBy(grade):
+                continue
+            result += 1
+            item = get_grade_history_item(grade)
+            if item is not None:
+                for index in new_indexes:
+                    index.index_doc(uid, item)
+    return result
+
+
+def do_evolve(context, generation=generation):  # pylint: disable=redefined-outer-name
+    logger.info("Gradebook evolution %s started", generation)
+
+    setHooks()
+    conn = context.connection
+    ds_folder = conn.root()['nti.dataserver']
+    lsm = ds_folder.getSiteManager()
+    intids = lsm.getUtility(IIntIds)
+
+    mock_ds = MockDataserver()
+    mock_ds.root = ds_folder
+    component.provideUtility(mock_ds, IDataserver)
+
+    count = 0
+    seen = set()
+    with current_site(ds_folder):
+        assert component.getSiteManager() == ds_folder.getSiteManager(), \
+               "Hooks not installed?"
+
+        grades = add_grade_indexes(ds_folder, intids)
+
+        # global site
+        catalog = component.queryUtility(ICourseCatalog)
+        count += process_catalog(catalog, intids, seen)
+
+        # all sites
+        for host_site in get_all_host_sites():
+            with current_site(host_site):
+                catalog = component.queryUtility(ICourseCatalog)
+                count += process_catalog(catalog, intids, seen)
+
+    component.getGlobalSiteManager().unregisterUtility(mock_ds, IDataserver)
+    logger.info('Gradebook evolution %s done, %s gradebook(s) and %s grade(s) indexed',
+                generation, count, grades)
+
+
+def evolve(context):
+    """
+    Evolve to generation 12 by adding the change counters and building
+    the assignment, per-user grade and submission indexes (and
+    submission counts) of every gradebook, and by adding the submission time and feedback count indexes to
+    the grade catalog.
+    """
+    do_evolve(context, generation)
@@ -12,6 +12,11 @@ from __future__ import absolute_import
 
 import six
 
+from BTrees.Length import Length
+
+from BTrees.OOBTree import OOBTree
+from BTrees.OOBTree import OOTreeSet
+
 from ZODB.interfaces import IConnection
 
 from zope import component
@@ -82,6 +87,20 @@ class _NTIIDMixin(object):
             return ntiid
 
 
+def _counter_stamp(counter):
+    """
+    Return a value identifying the committed state of the given
+    (possibly missing) counter, or None if it has uncommitted changes.
+    """
+    if counter is None:
+        return 0
+    value = counter()
+    # pylint: disable=protected-access
+    if counter._p_jar is None or counter._p_changed:
+        return None
+    return (value, counter._p_serial)
+
+
 @component.adapter(ICourseInstance)
 @interface.implementer(IGradeBook, IAttributeAnnotatable)
 class GradeBook(CheckingLastModifiedBTreeContainer,
@@ -90,21 +109,436 @@ class GradeBook(CheckingLastModifiedBTreeContainer,
 
     mimeType = mime_type = MIME_BASE + '.gradebook'
 
-    def getColumnForAssignmentId(self, assignmentId, check_name=False):
+    #: A map of assignment ntiids to their entries, kept up to date
+    #: by the entry and part lifecycle subscribers. Older books do not
+    #: have it until they are evolved or one of their entries moves.
+    _assignment_index = None
+
+    #: A map of lowercased usernames to the (part name, entry name)
+    #: keys of the entries they have grades in, kept up to date by the
+    #: grade and entry lifecycle subscribers.
+    _user_grade_index = None
+
+    #: Maps of lowercased usernames to the assignment ntiids they
+    #: have submitted, and to those they have submitted but that are
+    #: not graded yet, kept up to date by the assignment history and
+    #: grade subscribers.
+    _user_submission_index = None
+    _user_ungraded_index = None
+
+    #: A map of assignment ntiids to (conflict-resolving) counters of
+    #: the users that have submitted them, kept along with the
+    #: submission index.
+    _assignment_submission_counts = None
+
+    #: A conflict-resolving counter bumped whenever a grade or an
+    #: entry of this book changes. Non-persistent snapshots of the
+    #: book use it as their validator.
+    _change_count = None
+
+    #: A conflict-resolving counter bumped whenever an enrollment
+    #: record of the course is added, modified or removed. Cached
+    #: enrollment scope sets use it as their validator.
+    _enrollment_change_count = None
+
+    #: A conflict-resolving counter bumped whenever a user enrolled in
+    #: the course is modified (e.g. their realname or alias). Cached
+    #: rosters and summaries use it as part of their validator.
+    _name_change_count = None
+
+    #: A conflict-resolving counter bumped whenever a submission of
+    #: the course, or its feedback, is added or removed.
+    _submission_change_count = None
+
+    #: A map of lowercased usernames to conflict-resolving counters
+    #: bumped whenever one of their grades changes. Non-persistent
+    #: per-user data (e.g. predicted grades) use them as validators.
+    _user_change_counts = None
+
+    def __init__(self):
+        super(GradeBook, self).__init__()
+        self.initialize_counters()
+        self._assignment_index = OOBTree()
+        self._user_grade_index = OOBTree()
+        self._user_submission_index = OOBTree()
+        self._user_ungraded_index = OOBTree()
+        self._assignment_submission_counts = OOBTree()
+
+    @property
+    def change_count(self):
+        counter = self._change_count
+        return counter() if counter is not None else 0
+
+    def initialize_counters(self):
+        """
+        Add the change counters missing from this (older) book, so
+        that recording a change never has to modify the book itself.
+        """
+        for name in ('_change_count', '_enrollment_change_count',
+                     '_submission_change_count', '_name_change_count'):
+            if getattr(self, name) is None:
+                setattr(self, name, Length())
+        if self._user_change_counts is None:
+            self._user_change_counts = OOBTree()
+
+    @property
+    def change_stamp(self):
+        """
+        A value identifying the committed state of the grades and
+        entries of this book, or None if they have uncommitted changes.
+        """
+        return _counter_stamp(self._change_count)
+
+    def record_change(self, username=None):
+        self._change_count.change(1)
+        if username:
+            counts = self._user_change_counts
+            username = username.lower()
+            counter = counts.get(username)
+            if counter is None:
+                counter = counts[username] = Length()
+            counter.change(1)
+
+    def user_change_stamp(self, username):
+        """
+        A value identifying the committed state of the grades of the
+        given user, or None if they have uncommitted changes.
+        """
+        counts = self._user_change_counts
+        counter = counts.get(username.lower()) if counts is not None else None
+        return _counter_stamp(counter)
+
+    @property
+    def enrollment_stamp(self):
+        """
+        A value identifying the committed state of the enrollments
+        of the course of this book, or None if they have uncommitted
+        changes.
+        """
+        return _counter_stamp(self._enrollment_change_count)
+
+    def record_enrollment_change(self):
+        self._enrollment_change_count.change(1)
+
+    @property
+    def name_stamp(self):
+        """
+        A value identifying the committed state of the names of the
+        users enrolled in the course of this book, or None if they have
+        uncommitted changes.
+        """
+        return _counter_stamp(self._name_change_count)
+
+    def record_name_change(self):
+        self._name_change_count.change(1)
+
+    @property
+    def submission_stamp(self):
+        """
+        A value identifying the committed state of the submissions
+        (and their feedback) of the course of this book, or None if
+        they have uncommitted changes.
+        """
+        return _counter_stamp(self._submission_change_count)
+
+    def record_submission_change(self):
+        self._submission_change_count.change(1)
+
+    def _scan_for_assignment(self, assignmentId, check_name=False):
         for part in self.values():
             entry = part.get_entry_by_assignment(assignmentId,
                                                  check_name=check_name)
             if entry is not None:
                 return entry
         return None
+
+    def rebuild_assignment_index(self):
+        index = self._assignment_index
+        if index is None:
+            index = self._assignment_index = OOBTree()
+        else:
+            index.clear()
+        for part in self.values():
+            for entry in part.values():
+                if entry.assignmentId and entry.assignmentId not in index:
+                    index[entry.assignmentId] = entry
+        return index
+
+    def index_entry(self, entry):
+        index = self._assignment_index
+        if index is None:
+            # The entry is already in its part, so a full
+            # rebuild picks it up.
+            self.rebuild_assignment_index()
+        elif entry.assignmentId:
+            # Like a scan, the first entry of the assignment wins
+            current = index.get(entry.assignmentId)
+            current_key = self._entry_key(current) if current is not None else None
+            key = self._entry_key(entry)
+            if current_key is None or (key is not None and key < current_key):
+                index[entry.assignmentId] = entry
+        index = self._user_grade_index
+        key = self._entry_key(entry)
+        if index is not None and key is not None:
+            # Entries may move in along with their grades
+            for username in entry.keys():
+                self._index_user_assignment(index, username, key)
+
+    def _unindex_assignment(self, assignmentId, entry):
+        index = self._assignment_index
+        if index.get(assignmentId) is not entry:
+            return
+        del index[assignmentId]
+        # Another entry may share the assignment
+        other = self._scan_for_assignment(assignmentId)
+        if other is not None and other is not entry:
+            index[assignmentId] = other
+
+    def unindex_entry(self, entry):
+        if self._assignment_index is None or not entry.assignmentId:
+            return
+        self._unindex_assignment(entry.assignmentId, entry)
+
+    def reindex_entry(self, entry):
+        """
+        Update the assignment index after the assignment of the given
+        entry may have changed.
+        """
+        index = self._assignment_index
+        if index is None:
+            return
+        if entry.assignmentId and index.get(entry.assignmentId) is entry:
+            return
+        for assignmentId, indexed in list(index.items()):
+            if indexed is entry:
+                self._unindex_assignment(assignmentId, entry)
+        self.index_entry(entry)
+
+    def getColumnForAssignmentId(self, assignmentId, check_name=False):
+        index = self._assignment_index
+        if index is None:
+            return self._scan_for_assignment(assignmentId, check_name)
+        entry = index.get(assignmentId) if assignmentId else None
+        if entry is None and check_name:
+            entry = self._scan_for_assignment(assignmentId, check_name)
+        return entry
     get_entry_by_assignment = getEntryByAssignment = getColumnForAssignmentId
 
+    @staticmethod
+    def _entry_key(entry):
+        """
+        The (part name, entry name) key of the given entry. Entries
+        are scanned in this order, and the per-user grade index uses
+        it so that entries without (or sharing) an assignment are
+        indexed too.
+        """
+        part = entry.__parent__
+        part_name = getattr(part, '__name__', None)
+        if part_name is None or entry.__name__ is None:
+            return None
+        return (part_name, entry.__name__)
+
+    def rebuild_user_grade_index(self):
+        index = self._user_grade_index
+        if index is None:
+            index = self._user_grade_index = OOBTree()
+        else:
+            index.clear()
+        for part in self.values():
+            for entry in part.values():
+                key = self._entry_key(entry)
+                if key is None:
+                    continue
+                for username in entry.keys():
+                    self._index_user_assignment(index, username, key)
+        return index
+
+    @staticmethod
+    def _index_user_assignment(index, username, assignmentId):
+        """
+        Add the assignment (or entry key) to the user's set, returning
+        whether it was not there.
+        """
+        username = username.lower()
+        assignments = index.get(username)
+        if assignments is None:
+            assignments = index[username] = OOTreeSet()
+        return bool(assignments.add(assignmentId))
+
+    @staticmethod
+    def _unindex_user_assignment(index, username, assignmentId):
+        """
+        Remove the assignment (or entry key) from the user's set,
+        returning whether it was there.
+        """
+        username = username.lower()
+        assignments = index.get(username)
+        if assignments is None or assignmentId not in assignments:
+            return False
+        assignments.remove(assignmentId)
+        if not assignments:
+            del index[username]
+        return True
+
+    def index_grade(self, username, entry):
+        index = self._user_grade_index
+        if index is None:
+            # The grade is already in its entry, so a full
+            # rebuild picks it up.
+            self.rebuild_user_grade_index()
+            return
+        key = self._entry_key(entry)
+        if key is not None:
+            self._index_user_assignment(index, username, key)
+
+    def unindex_grade(self, username, entry):
+        index = self._user_grade_index
+        key = self._entry_key(entry)
+        if index is None or key is None:
+            return
+        self._unindex_user_assignment(index, username, key)
+
+    def has_submission_index(self):
+        return  self._user_submission_index is not None \
+            and self._user_ungraded_index is not None
+
+    def rebuild_submission_index(self):
+        """
+        Rebuild the submission and ungraded indexes from the assignment
+        histories of the users enrolled in our course.
+        """
+        # See _entry_submitted_length
+        from nti.app.assessment.adapters import _histories_for_course
+        self._user_submission_index = OOBTree()
+        self._user_ungraded_index = OOBTree()
+        self._assignment_submission_counts = OOBTree()
+        course = ICourseInstance(self, None)
+        if course is None:
+            return self._user_submission_index
+        histories = _histories_for_course(course)
+        for username, history in list(histories.items()):
+            for assignmentId, container in list(history.items()):
+                if container:
+                    self.index_submission(username, assignmentId)
+        return self._user_submission_index
+
+    def rebuild_indexes(self):
+        """
+        Rebuild the assignment, per-user grade and submission indexes
+        (and the submission counts) of this book.
+        """
+        # The ungraded index looks up entries by assignment
+        self.rebuild_assignment_index()
+        self.rebuild_user_grade_index()
+        self.rebuild_submission_index()
+
+    def _change_submission_count(self, assignmentId, delta):
+        counts = self._assignment_submission_counts
+        if counts is None:
+            return
+        counter = counts.get(assignmentId)
+        if counter is None:
+            counter = counts[assignmentId] = Length()
+        counter.change(delta)
+
+    def submitted_count(self, assignmentId):
+        """
+        Return how many users have submitted the given assignment, or
+        None if this book does not keep count.
+        """
+        counts = self._assignment_submission_counts
+        if counts is None or not self.has_submission_index():
+            return None
+        counter = counts.get(assignmentId)
+        return counter() if counter is not None else 0
+
+    def index_submission(self, username, assignmentId):
+        if not self.has_submission_index() or not assignmentId:
+            return
+        if self._index_user_assignment(self._user_submission_index,
+                                       username, assignmentId):
+            self._change_submission_count(assignmentId, 1)
+        self.update_ungraded(username, assignmentId)
+
+    def unindex_submission(self, username, assignmentId):
+        if not self.has_submission_index() or not assignmentId:
+            return
+        if self._unindex_user_assignment(self._user_submission_index,
+                                         username, assignmentId):
+            self._change_submission_count(assignmentId, -1)
+        self._unindex_user_assignment(self._user_ungraded_index,
+                                      username, assignmentId)
+
+    def update_ungraded(self, username, assignmentId):
+        """
+        Update the ungraded index for the given user and assignment
+        after its submission or grade changes.
+        """
+        if not self.has_submission_index() or not assignmentId:
+            return
+        grade = None
+        entry = self.getColumnForAssignmentId(assignmentId)
+        if entry is not None:
+            grade = entry.get(username)
+        if      assignmentId in self.submitted_assignments(username) \
+            and (grade is None or grade.value is None):
+            self._index_user_assignment(self._user_ungraded_index,
+                                        username, assignmentId)
+        else:
+            self._unindex_user_assignment(self._user_ungraded_index,
+                                          username, assignmentId)
+
+    def submitted_assignments(self, username):
+        """
+        Return the set of assignment ntiids the user has submitted.
+        """
+        index = self._user_submission_index
+        result = index.get(username.lower()) if index is not None else None
+        return result if result is not None else ()
+
+    def ungraded_assignments(self, username):
+        """
+        Return the set of assignment ntiids the user has submitted
+        but that are not graded yet.
+        """
+        index = self._user_ungraded_index
+        result = index.get(username.lower()) if index is not None else None
+        return result if result is not None else ()
+
+    def _use_grade_index(self):
+        return self._user_grade_index is not None
+
+    def _iter_indexed_entries(self, username):
+        # Stale keys (e.g. for entries removed along with their part)
+        # are tolerated, callers check the entry for the user.
+        keys = self._user_grade_index.get(username)
+        for part_name, name in tuple(keys or ()):
+            part = self.get(part_name)
+            entry = part.get(name) if part is not None else None
+            if entry is not None:
+                yield entry
+
     def remove_user(self, username):
         result = 0
-        for part in self.values():
-            if part.remove_user(username):
-                result += 1
-        return result
+        if self.has_submission_index():
+            for assignmentId in tuple(self.submitted_assignments(username)):
+                self.unindex_submission(username, assignmentId)
+        if not self._use_grade_index():
+            for part in self.values():
+                if part.remove_user(username):
+                    result += 1
+            return result
+        username = username.lower()
+        parts = set()
+        for entry in tuple(self._iter_indexed_entries(username)):
+            if username in entry:
+                try:
+                    del entry[username]
+                    parts.add(entry.__parent__)
+                except KeyError:
+                    logger.exception("Error deleting grade for %s in entry %s",
+                                     username, entry.__name__)
+        return len(parts)
     removeUser = remove_user
 
     @property
@@ -112,14 +546,20 @@ class GradeBook(CheckingLastModifiedBTreeContainer,
         return dict(self)
 
     def has_grades(self, username):
-        for part in self.values():
-            if part.has_grades(username):
-                return True
+        for unused_grade in self.iter_grades(username):
+            return True
         return False
 
     def iter_grades(self, username):
-        for part in self.values():
-            for grade in part.iter_grades(username):
+        if not self._use_grade_index():
+            for part in self.values():
+                for grade in part.iter_grades(username):
+                    yield grade
+            return
+        username = username.lower()
+        for entry in self._iter_indexed_entries(username):
+            grade = entry.get(username)
+            if grade is not None:
                 yield grade
 
     def iter_usernames(self):
@@ -467,10 +907,16 @@ def _entry_submitted_length(self):
     # need this.
     from nti.app.assessment.adapters import _histories_for_course
 
-    count = 0
     column = self.context
-    course = ICourseInstance(self)
     assignment_id = column.AssignmentId
+    # Books maintain this count as submissions come and go
+    book = find_interface(column, IGradeBook, strict=False)
+    count = book.submitted_count(assignment_id) if book is not None else None
+    if count is not None:
+        return count
+
+    count = 0
+    course = ICourseInstance(self)
     histories = _histories_for_course(course)
     # do count
     for history in list(histories.values()):
@@ -479,6 +925,54 @@ def _entry_submitted_length(self):
     return count
 
 
+def _iter_chunks(iterable, size):
+    chunk = []
+    for x in iterable:
+        chunk.append(x)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _prefetch(objects):
+    """
+    Ask the storage to load the state of the given (ghost) persistent
+    objects in one go, if it can.
+    """
+    objects = [x for x in objects if getattr(x, '_p_jar', None) is not None]
+    if objects:
+        prefetch = getattr(objects[0]._p_jar, 'prefetch', None)
+        if prefetch is not None:
+            prefetch(objects)
+
+
+def _prefetch_history_items(course, assignment_id, users):
+    """
+    Load the users, their assignment histories, and their submissions
+    of the given assignment in (a few) round trips, warming the
+    cache for the item lookups done one user at a time.
+    """
+    # See _entry_submitted_length
+    from nti.app.assessment.adapters import _histories_for_course
+    users = [x for x in users if x is not None]
+    if not users:
+        return
+    _prefetch(users)
+    histories = _histories_for_course(course)
+    histories = [histories.get(x.username) for x in users if IUser.providedBy(x)]
+    histories = [x for x in histories if x is not None]
+    _prefetch(histories)
+    containers = [x.get(assignment_id) for x in histories]
+    containers = [x for x in containers if x is not None]
+    _prefetch(containers)
+    items = []
+    for container in containers:
+        items.extend(container.values())
+    _prefetch(items)
+
+
 @component.adapter(IGradeBookEntry)
 @interface.implementer(ISubmittedAssignmentHistory)
 class _DefaultGradeBookEntrySubmittedAssignmentHistory(Contained):
@@ -491,6 +985,9 @@ class _DefaultGradeBookEntrySubmittedAssignmentHistory(Contained):
 
     as_summary = False
 
+    #: How many users are loaded together when iterating
+    prefetch_size = 100
+
     def __init__(self, entry, unused_request=None):
         self.context = self.__parent__ = entry
 
@@ -514,8 +1011,8 @@ class _DefaultGradeBookEntrySubmittedAssignmentHistory(Contained):
 
     def __len__(self):
         """
-        Getting the length of this object is extremely slow and should
-        be avoided.
+        Getting the length of this object is extremely slow (unless the
+        gradebook keeps submission counts) and should be avoided.
 
         The length is defined as the number of people that have submitted
         to the assignment; this is distinct from the number of grades that may
@@ -545,27 +1042,35 @@ class _DefaultGradeBookEntrySubmittedAssignmentHistory(Contained):
             x.lower() for x in forced_placeholder_usernames
         }
 
-        for username_that_submitted in usernames or ():
-            username_that_submitted = username_that_submitted.lower()
-
-            if username_that_submitted in forced_placeholder_usernames:
-                yield (username_that_submitted, placeholder)
-                continue
-
-            user = User.get_user(username_that_submitted)
-            if not IUser.providedBy(user):
-                continue
-            username_that_submitted = user.username  # go back to canonical
-            # TODO: Do we need this view at all?
-            # TODO: This is approximate
-            history_item = get_most_recent_history_item(user, course, assignment_id)
-            if history_item is not None:
-                if self.as_summary:
-                    history_item = IUsersCourseAssignmentHistoryItemSummary(history_item)
-                yield (username_that_submitted, history_item)
-            else:
-                if placeholder is not _NotGiven:
+        # Work in chunks, loading the users and history items
+        # of each chunk together
+        for chunk in _iter_chunks(usernames or (), self.prefetch_size):
+            chunk = [x.lower() for x in chunk]
+            users = {
+                x: User.get_user(x) for x in chunk
+                if x not in forced_placeholder_usernames
+            }
+            _prefetch_history_items(course, assignment_id, users.values())
+
+            for username_that_submitted in chunk:
+                if username_that_submitted in forced_placeholder_usernames:
                     yield (username_that_submitted, placeholder)
+                    continue
+
+                user = users[username_that_submitted]
+                if not IUser.providedBy(user):
+                    continue
+                username_that_submitted = user.username  # go back to canonical
+                # TODO: Do we need this view at all?
+                # TODO: This is approximate
+                history_item = get_most_recent_history_item(user, course, assignment_id)
+                if history_item is not None:
+                    if self.as_summary:
+                        history_item = IUsersCourseAssignmentHistoryItemSummary(history_item)
+                    yield (username_that_submitted, history_item)
+                else:
+                    if placeholder is not _NotGiven:
+                        yield (username_that_submitted, placeholder)
 
     def items(self,
               usernames=_NotGiven,
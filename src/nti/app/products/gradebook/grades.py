@@ -23,6 +23,10 @@ from zope.mimetype.interfaces import IContentTypeAware
 
 from nti.app.products.gradebook.interfaces import IGrade
 
+from nti.app.products.gradebook.normalization import GRADE_NUMERIC
+
+from nti.app.products.gradebook.normalization import normalize_grade_value
+
 from nti.base.interfaces import ICreated
 
 from nti.contenttypes.courses.grading.interfaces import IPredictedGrade
@@ -104,6 +108,31 @@ class Grade(CreatedModDateTrackingObject,
         if self.__parent__ is not None:
             return self.__parent__.AssignmentId
 
+    @property
+    def normalized_value(self):
+        """
+        The :class:`.NormalizedGrade` of our value. Persistent grades
+        keep it (volatile) until the value is replaced.
+        """
+        value = self.value
+        cached = self.__dict__.get('_v_normalized')
+        if cached is None or cached[0] is not value:
+            cached = (value, normalize_grade_value(value))
+            if isinstance(self, Persistent):
+                # non-persistent grades would pickle it
+                self._v_normalized = cached
+        return cached[1]
+
+    @property
+    def numeric_value(self):
+        """
+        Our value as a number, or None if it is not numeric.
+        """
+        normalized = self.normalized_value
+        if normalized.status == GRADE_NUMERIC:
+            return normalized.number
+        return None
+
     # Since we're not persistent, the regular use of CachedProperty fails
     @property
     def __acl__(self):
@@ -12,6 +12,8 @@ from __future__ import absolute_import
 
 import numbers
 
+from bisect import bisect_right
+
 import six
 
 from zope import interface
@@ -43,6 +45,41 @@ from nti.schema.schema import SchemaConfigured
 logger = __import__('logging').getLogger(__name__)
 
 
+class _CompiledLetterRanges(object):
+    """
+    The ranges of a letter grade scheme sorted by their lower bound,
+    for bisection. Only built for schemes without overlapping ranges,
+    where at most one range can match a value.
+    """
+
+    __slots__ = ('mins', 'maxs', 'letters', 'scaled_mins', 'scaled_maxs',
+                 'numbers', 'max_in_ranges')
+
+    def __init__(self, grades, ranges, max_in_ranges):
+        self.max_in_ranges = max_in_ranges
+        rows = sorted(zip(ranges, grades), key=lambda x: x[0][0])
+        self.mins = [r[0] for r, _ in rows]
+        self.maxs = [r[1] for r, _ in rows]
+        self.letters = [letter for _, letter in rows]
+        dem = float(max_in_ranges)
+        self.scaled_mins = [x / dem for x in self.mins]
+        self.scaled_maxs = [x / dem for x in self.maxs]
+        self.numbers = {}
+        for letter, r in zip(grades, ranges):
+            self.numbers.setdefault(letter, r[1])
+
+    @staticmethod
+    def overlap(ranges):
+        ranges = sorted(ranges, key=lambda x: x[0])
+        return any(b[0] <= a[1] for a, b in zip(ranges, ranges[1:]))
+
+    def find(self, value, mins, maxs):
+        idx = bisect_right(mins, value) - 1
+        if idx >= 0 and value <= maxs[idx]:
+            return self.letters[idx]
+        return None
+
+
 @WithRepr
 @EqHash('grades', 'ranges')
 @six.add_metaclass(MetaGradeBookObject)
@@ -63,7 +100,33 @@ class LetterGradeScheme(SchemaConfigured):
         self.ranges = self.default_ranges if ranges is None else ranges
         assert len(self.grades) == len(self.ranges)
 
+    def __getstate__(self):
+        return {k: v for k, v in self.__dict__.items()
+                if not k.startswith('_v_')}
+
+    def _compiled(self):
+        """
+        Return the :class:`_CompiledLetterRanges` of this scheme, rebuilt
+        when its grades or ranges are replaced, or None if its ranges
+        overlap.
+        """
+        grades, ranges = self.grades, self.ranges
+        cached = self.__dict__.get('_v_compiled')
+        if cached is None or cached[0] is not grades or cached[1] is not ranges:
+            compiled = None
+            if not _CompiledLetterRanges.overlap(ranges):
+                compiled = _CompiledLetterRanges(grades, ranges,
+                                                 self._max_in_ranges())
+            cached = self._v_compiled = (grades, ranges, compiled)
+        return cached[2]
+
+    def _invalidate(self):
+        self.__dict__.pop('_v_compiled', None)
+
     def toLetter(self, value):
+        compiled = self._compiled()
+        if compiled is not None:
+            return compiled.find(value, compiled.mins, compiled.maxs)
         for i, r in enumerate(self.ranges):
             _min, _max = r
             if value >= _min and value <= _max:
@@ -71,6 +134,9 @@ class LetterGradeScheme(SchemaConfigured):
         return None
 
     def toNumber(self, letter):
+        compiled = self._compiled()
+        if compiled is not None:
+            return compiled.numbers.get(letter.upper())
         try:
             index = self.grades.index(letter.upper())
             _, _max = self.ranges[index]
@@ -92,7 +158,11 @@ class LetterGradeScheme(SchemaConfigured):
         return result
 
     def toCorrectness(self, letter):
-        dem = self._max_in_ranges()
+        compiled = self._compiled()
+        if compiled is not None:
+            dem = compiled.max_in_ranges
+        else:
+            dem = self._max_in_ranges()
         num = self.toNumber(letter)
         return num / float(dem)
 
@@ -100,6 +170,9 @@ class LetterGradeScheme(SchemaConfigured):
         value = getattr(grade, 'RawValue', grade)
         value = (min(max(0, value), 1))
         value = round(value, 2)
+        compiled = self._compiled()
+        if compiled is not None:
+            return compiled.find(value, compiled.scaled_mins, compiled.scaled_maxs)
         dem = float(self._max_in_ranges())
         for i, r in enumerate(self.ranges):
             _min, _max = r
@@ -107,6 +180,18 @@ class LetterGradeScheme(SchemaConfigured):
                 return self.grades[i]
         return None
 
+    def fromCorrectness_many(self, grades):
+        """
+        Return the letters of the given grades (or correctness values).
+        """
+        compiled = self._compiled()
+        if compiled is None:
+            return [self.fromCorrectness(x) for x in grades]
+        find = compiled.find
+        mins, maxs = compiled.scaled_mins, compiled.scaled_maxs
+        return [find(round(min(max(0, getattr(x, 'RawValue', x)), 1), 2), mins, maxs)
+                for x in grades]
+
     def toDisplayableGrade(self, grade):
         return self.fromCorrectness(grade)
 
@@ -186,6 +271,12 @@ class NumericGradeScheme(SchemaConfigured):
         result = round(result, 2)
         return result
 
+    def fromCorrectness_many(self, grades):
+        # pylint: disable=no-member
+        low, scale = self.min, self.max - self.min
+        return [round(min(max(0, getattr(x, 'RawValue', x)), 1) * scale + low, 2)
+                for x in grades]
+
     def toDisplayableGrade(self, grade):
         return self.fromCorrectness(grade)
 
@@ -10,12 +10,18 @@ from __future__ import absolute_import
 
 #: [re]/export
 from nti.app.products.gradebook.grading.interfaces import IGradeBookGradingPolicy
+from nti.app.products.gradebook.grading.interfaces import IGradeBookBatchGradingPolicy
 
 #: [re]/export
 from nti.app.products.gradebook.grading.utils import PredictedGrade
 from nti.app.products.gradebook.grading.utils import calculate_grades
+from nti.app.products.gradebook.grading.utils import store_grades
+from nti.app.products.gradebook.grading.utils import grade_principals
+from nti.app.products.gradebook.grading.utils import get_course_principals
+from nti.app.products.gradebook.grading.utils import grade_course_principals
 from nti.app.products.gradebook.grading.utils import get_presentation_scheme
 from nti.app.products.gradebook.grading.utils import calculate_predicted_grade
+from nti.app.products.gradebook.grading.utils import calculate_predicted_grades
 
 #: [re]/export
 from nti.contenttypes.courses.grading import find_grading_policy_for_course
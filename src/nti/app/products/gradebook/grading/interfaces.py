@@ -41,6 +41,21 @@ class IGradeBookGradingPolicy(ICourseGradingPolicy):
         pass
 
 
+class IGradeBookBatchGradingPolicy(IGradeBookGradingPolicy):
+    """
+    A grading policy that can grade many principals at once. Policies
+    not providing it are graded one principal at a time.
+    """
+
+    def grade_many(principals, verbose=False):
+        """
+        Grade the given principals, gathering the course data
+        needed only once.
+
+        :returns an iterable of (principal, grade) pairs
+        """
+
+
 import zope.deferredimport
 zope.deferredimport.initialize()
 
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Per-course assignment metadata consulted by the grading policies.
+
+.. $Id$
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+from collections import namedtuple
+
+from zope import component
+
+from nti.app.products.gradebook.stamps import committed_stamp
+
+from nti.assessment.interfaces import IQAssignment
+from nti.assessment.interfaces import IQAssignmentDateContext
+
+from nti.contenttypes.courses.grading.policies import get_assignment_policies
+
+logger = __import__('logging').getLogger(__name__)
+
+
+AssignmentMetadata = namedtuple('AssignmentMetadata',
+                                ('ntiid', 'due', 'no_submit', 'category'))
+
+
+def assignment_has_questions(assignment):
+    for part in assignment.parts or ():
+        question_set = part.question_set
+        if len(question_set.questions or ()) > 0:
+            return True
+    return False
+
+
+def get_total_points(assignment_id, assignment_policies):
+    """
+    Return the auto-grade total points of the given assignment in the
+    given course assignment policies, if any.
+    """
+    result = None
+    try:
+        policy = assignment_policies[assignment_id]
+    except KeyError:
+        # If there is no entry for this assignment, we ignore it.
+        pass
+    else:
+        autograde_policy = policy.get('auto_grade', None)
+        if autograde_policy:
+            # If we have an autograde entry with total_points,
+            # return total_points. If it does not have total_points,
+            # or if no autograde entry exists, we return 0.
+            result = autograde_policy.get('total_points', None)
+    if not result:
+        logger.warning(
+            'Assignment without total_points cannot be part of grade policy (%s) (%s)',
+            assignment_id,
+            result)
+    return result
+
+
+class AssignmentMetadataTable(object):
+    """
+    The due dates, no-submit flags, categories, total points and
+    whether they have questions, of the assignments graded by a policy,
+    resolved once per assignment.
+
+    Total points and questions are resolved through the policy's
+    ``_get_total_points_for_assignment`` and ``_has_questions`` when it
+    defines them. Rows taken from an assignment are resolved again
+    once its ``lastModified`` changes.
+    """
+
+    def __init__(self, policy, assignment_policies=None, dates=None, validator=None):
+        self.validator = validator
+        course = policy.course
+        if assignment_policies is None:
+            assignment_policies = get_assignment_policies(course)
+        if dates is None:
+            dates = IQAssignmentDateContext(course, None)
+        self.dates = dates
+        self.assignment_policies = assignment_policies
+        self._get_total_points = getattr(policy, '_get_total_points_for_assignment',
+                                         get_total_points)
+        self._has_questions = getattr(policy, '_has_questions',
+                                      assignment_has_questions)
+        self._rows = {}
+        self._total_points = {}
+        self._questions = {}
+
+    def _build_row(self, ntiid, assignment):
+        due = None
+        no_submit = False
+        if assignment is not None:
+            no_submit = bool(assignment.no_submit)
+            if self.dates is not None:
+                # pylint: disable=no-member
+                due = self.dates.of(assignment).available_for_submission_ending
+        category = None
+        try:
+            grader = self.assignment_policies[ntiid].get('grader') or {}
+            category = grader.get('group')
+        except (KeyError, AttributeError):
+            pass
+        return AssignmentMetadata(ntiid, due, no_submit, category)
+
+    def get(self, assignment):
+        """
+        Return the :class:`AssignmentMetadata` of the given assignment
+        (or assignment ntiid).
+        """
+        if IQAssignment.providedBy(assignment):
+            ntiid = assignment.ntiid
+        else:
+            ntiid = assignment
+            assignment = component.queryUtility(IQAssignment, name=ntiid)
+        modified = getattr(assignment, 'lastModified', None)
+        row = self._rows.get(ntiid)
+        if row is None or row[0] != modified:
+            row = (modified, self._build_row(ntiid, assignment))
+            self._rows[ntiid] = row
+        return row[1]
+
+    def is_late(self, assignment, now):
+        due = self.get(assignment).due
+        return bool(due and now > due)
+
+    def no_submit(self, assignment):
+        return self.get(assignment).no_submit
+
+    def total_points(self, assignment_id):
+        try:
+            result = self._total_points[assignment_id]
+        except KeyError:
+            result = self._get_total_points(assignment_id,
+                                            self.assignment_policies)
+            self._total_points[assignment_id] = result
+        return result
+
+    def has_questions(self, assignment):
+        modified = getattr(assignment, 'lastModified', None)
+        row = self._questions.get(assignment.ntiid)
+        if row is None or row[0] != modified:
+            row = (modified, self._has_questions(assignment))
+            self._questions[assignment.ntiid] = row
+        return row[1]
+
+
+def get_assignment_metadata(policy):
+    """
+    Return the :class:`AssignmentMetadataTable` of the given grading
+    policy. It is kept on the policy until the course assignment
+    policies (which hold the date overrides) or date context change;
+    its rows are also validated by the ``lastModified`` of their
+    assignments.
+    """
+    course = policy.course
+    dates = IQAssignmentDateContext(course, None)
+    assignment_policies = get_assignment_policies(course)
+    stamp = committed_stamp(assignment_policies)
+    if stamp is None:
+        # Uncommitted changes (or non-persistent policies); never reuse
+        return AssignmentMetadataTable(policy, assignment_policies, dates)
+    validator = (stamp, getattr(dates, 'lastModified', None))
+    result = getattr(policy, '_v_assignment_metadata', None)
+    if result is None or result.validator != validator:
+        result = AssignmentMetadataTable(policy, assignment_policies, dates,
+                                         validator)
+        policy._v_assignment_metadata = result
+    return result
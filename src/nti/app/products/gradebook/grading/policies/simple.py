@@ -14,12 +14,19 @@ import six
 
 from zope import interface
 
+from zope.cachedescriptors.property import Lazy
 from zope.cachedescriptors.property import readproperty
 
 from zope.security.interfaces import IPrincipal
 
+from nti.app.products.gradebook.grading.interfaces import IGradeBookBatchGradingPolicy
+
 from nti.app.products.gradebook.grading.policies.interfaces import ISimpleTotalingGradingPolicy
 
+from nti.app.products.gradebook.grading.policies.metadata import get_total_points
+from nti.app.products.gradebook.grading.policies.metadata import get_assignment_metadata
+from nti.app.products.gradebook.grading.policies.metadata import assignment_has_questions
+
 from nti.app.products.gradebook.gradescheme import NumericGradeScheme
 
 from nti.app.products.gradebook.interfaces import IGradeBook
@@ -38,8 +45,6 @@ from nti.contenttypes.courses.interfaces import get_course_assessment_predicate_
 
 from nti.contenttypes.courses.grading.policies import DefaultCourseGradingPolicy
 
-from nti.contenttypes.courses.grading.policies import get_assignment_policies
-
 from nti.property.property import alias
 
 from nti.schema.fieldproperty import createDirectFieldProperties
@@ -47,8 +52,49 @@ from nti.schema.fieldproperty import createDirectFieldProperties
 logger = __import__('logging').getLogger(__name__)
 
 
+class _GradingContext(object):
+    """
+    Course data shared by all the principals graded in one pass.
+    """
+
+    def __init__(self, policy, now=None):
+        self.policy = policy
+        self.now = now or datetime.utcnow()
+        self.metadata = get_assignment_metadata(policy)
+        self._counts_when_missing = {}
+
+    @Lazy
+    def assignments(self):
+        catalog = ICourseAssignmentCatalog(self.policy.course)
+        # Must grab all assignments in our parent
+        # pylint: disable=too-many-function-args
+        return tuple(catalog.iter_assignments(True))
+
+    def total_points(self, assignment_id):
+        return self.metadata.total_points(assignment_id)
+
+    def counts_when_missing(self, assignment):
+        """
+        Whether an ungraded assignment counts against the student:
+        it is past due, expects a submission and has questions.
+        """
+        ntiid = assignment.ntiid
+        try:
+            result = self._counts_when_missing[ntiid]
+        except KeyError:
+            policy = self.policy
+            metadata = self.metadata
+            # pylint: disable=protected-access
+            result = self._counts_when_missing[ntiid] = \
+                    policy._is_due(assignment, self.now) \
+                and not metadata.no_submit(assignment) \
+                and metadata.has_questions(assignment)
+        return result
+
+
 @six.add_metaclass(MetaGradeBookObject)
-@interface.implementer(ISimpleTotalingGradingPolicy)
+@interface.implementer(ISimpleTotalingGradingPolicy,
+                       IGradeBookBatchGradingPolicy)
 class SimpleTotalingGradingPolicy(DefaultCourseGradingPolicy):
     createDirectFieldProperties(ISimpleTotalingGradingPolicy)
 
@@ -74,21 +120,33 @@ class SimpleTotalingGradingPolicy(DefaultCourseGradingPolicy):
         return True
 
     def _is_due(self, assignment, now):
-        dates = self.dateContext
-        if assignment is not None and dates is not None:
-            # pylint: disable=no-member
-            _ending = dates.of(assignment).available_for_submission_ending
-            return bool(_ending and now > _ending)
+        if assignment is not None:
+            return get_assignment_metadata(self).is_late(assignment, now)
         return False
 
+    def _grading_context(self, now=None):
+        return _GradingContext(self, now)
+
     # pylint: disable=arguments-differ,keyword-arg-before-vararg
     def grade(self, principal, scheme=None, *unused_args, **unused_kwargs):
-        now = datetime.utcnow()
+        context = self._grading_context()
+        return self._grade(principal, context, scheme)
+
+    # pylint: disable=keyword-arg-before-vararg
+    def grade_many(self, principals, scheme=None, *unused_args, **unused_kwargs):
+        """
+        Grade the given principals, yielding (principal, grade) pairs. The
+        course data needed for grading is only gathered once.
+        """
+        context = self._grading_context()
+        for principal in principals:
+            yield principal, self._grade(principal, context, scheme)
+
+    def _grade(self, principal, context, scheme=None):
         total_points_earned = 0
         total_points_available = 0
 
         gradebook_assignment_ids = set()
-        assignment_policies = get_assignment_policies(self.course)
         username = IPrincipal(principal).id
 
         # First we look through all grades for a certain username
@@ -107,9 +165,7 @@ class SimpleTotalingGradingPolicy(DefaultCourseGradingPolicy):
                     and name in FINAL_GRADE_NAMES:
                     continue
 
-                ntiid = grade.AssignmentId
-                total_points = self._get_total_points_for_assignment(ntiid,
-                                                                     assignment_policies)
+                total_points = context.total_points(grade.AssignmentId)
                 if not total_points:
                     # If an assignment doesn't have a total_point value, we
                     # ignore it.
@@ -126,19 +182,17 @@ class SimpleTotalingGradingPolicy(DefaultCourseGradingPolicy):
 
         # Now fetch assignments we haven't seen that are past due.
         all_assignments = self._get_all_assignments_for_user(self.course,
-                                                             principal)
+                                                             principal,
+                                                             context.assignments)
 
         # Ignore assignments that we've looked at already. Also
         # ignore no-submit assignments that haven't been graded yet,
         # and assignments that aren't due yet.
         for assignment in all_assignments:
             ntiid = assignment.ntiid
-            if      self._is_due(assignment, now) \
-                and not ntiid in gradebook_assignment_ids \
-                and not assignment.no_submit \
-                and self._has_questions(assignment):
-                total_points = self._get_total_points_for_assignment(ntiid,
-                                                                     assignment_policies)
+            if      not ntiid in gradebook_assignment_ids \
+                and context.counts_when_missing(assignment):
+                total_points = context.total_points(ntiid)
                 if total_points:
                     total_points_available += total_points
 
@@ -154,41 +208,19 @@ class SimpleTotalingGradingPolicy(DefaultCourseGradingPolicy):
                                      scheme=scheme)
 
     def _has_questions(self, assignment):
-        assignment_parts = assignment.parts or ()
-        for part in assignment_parts:
-            question_set = part.question_set
-            if len(question_set.questions or ()) > 0:
-                return True
-        return False
+        return assignment_has_questions(assignment)
 
-    def _get_all_assignments_for_user(self, course, user):
-        catalog = ICourseAssignmentCatalog(course)
+    def _get_all_assignments_for_user(self, course, user, assignments=None):
         uber_filter = get_course_assessment_predicate_for_user(user, course)
-        # Must grab all assignments in our parent
-        # pylint: disable=too-many-function-args
-        assignments = catalog.iter_assignments(True)
+        if assignments is None:
+            catalog = ICourseAssignmentCatalog(course)
+            # Must grab all assignments in our parent
+            # pylint: disable=too-many-function-args
+            assignments = catalog.iter_assignments(True)
         return tuple(x for x in assignments if uber_filter(x))
 
     def _get_total_points_for_assignment(self, assignment_id, assignment_policies):
-        result = None
-        try:
-            policy = assignment_policies[assignment_id]
-        except KeyError:
-            # If there is no entry for this assignment, we ignore it.
-            pass
-        else:
-            autograde_policy = policy.get('auto_grade', None)
-            if autograde_policy:
-                # If we have an autograde entry with total_points,
-                # return total_points. If it does not have total_points,
-                # or if no autograde entry exists, we return 0.
-                result = autograde_policy.get('total_points', None)
-        if not result:
-            logger.warning(
-                'Assignment without total_points cannot be part of grade policy (%s) (%s)',
-                assignment_id,
-                result)
-        return result
+        return get_total_points(assignment_id, assignment_policies)
 
     def _get_earned_points_for_assignment(self, grade):
         try:
@@ -9,6 +9,7 @@ from __future__ import absolute_import
 
 from hamcrest import is_
 from hamcrest import is_not
+from hamcrest import close_to
 from hamcrest import has_key
 from hamcrest import has_entry
 from hamcrest import has_length
@@ -25,6 +26,8 @@ import unittest
 
 import fudge
 
+from zope import interface
+
 import simplejson
 
 from nti.app.products.gradebook.gradebook import GradeBookPart
@@ -33,6 +36,7 @@ from nti.app.products.gradebook.gradebook import GradeBookEntry
 from nti.app.products.gradebook.grades import PersistentGrade
 
 from nti.app.products.gradebook.interfaces import IGradeBook
+from nti.app.products.gradebook.interfaces import IExcusedGrade
 
 from nti.app.products.gradebook.gradescheme import NumericGradeScheme
 from nti.app.products.gradebook.gradescheme import IntegerGradeScheme
@@ -42,6 +46,9 @@ from nti.app.products.gradebook.grading.interfaces import IGradeBookGradingPolic
 from nti.app.products.gradebook.grading.policies.interfaces import ICategoryGradeScheme
 from nti.app.products.gradebook.grading.policies.interfaces import ICS1323CourseGradingPolicy
 
+from nti.app.products.gradebook.grading.policies.trytten import INVALID
+from nti.app.products.gradebook.grading.policies.trytten import EXCUSED
+from nti.app.products.gradebook.grading.policies.trytten import CategoryGrades
 from nti.app.products.gradebook.grading.policies.trytten import CategoryGradeScheme
 from nti.app.products.gradebook.grading.policies.trytten import CS1323EqualGroupGrader
 from nti.app.products.gradebook.grading.policies.trytten import CS1323CourseGradingPolicy
@@ -165,3 +172,63 @@ class TestCS1323GradingPolicy(unittest.TestCase):
         assert_that(grade.correctness, is_(50))
         assert_that(grade.points_available, is_(None))
         assert_that(grade.points_earned, is_(None))
+
+    def test_category_grades(self):
+        grades = CategoryGrades()
+        grades.append(u'a1', 0.5, 0.25)
+        grades.append(u'a2', 0.2, 0.25, EXCUSED)
+        grades.append(u'a3', 0.5, 0.25)
+        grades.append(u'a4', 0, 0.25, INVALID)
+        assert_that(grades, has_length(4))
+        # stable sort by correctness
+        assert_that(grades.sorted_indexes(), is_([3, 1, 0, 2]))
+        assert_that(list(grades.flags), is_([0, EXCUSED, 0, INVALID]))
+
+    @WithMockDSTrans
+    @fudge.patch('nti.contenttypes.courses.grading.policies.get_assignment',
+                 'nti.contenttypes.courses.grading.policies.get_assignment_policies',
+                 'nti.app.products.gradebook.grading.utils.get_presentation_scheme')
+    def test_grade_drop_lowest_and_excused(self, mock_ga, mock_gap, mock_presentation):
+        connection = mock_dataserver.current_transaction
+        course = CourseInstance()
+        connection.add(course)
+
+        policy = self.cs1323_policy
+        policy.__parent__ = course
+
+        mock_ga.is_callable().with_args().returns(fudge.Fake())
+        cap = MappingAssignmentPolicies()
+        for name in ('a1', 'a3', 'a4'):
+            cap[name] = {'grader': {'group': 'iclicker', 'points': 10}}
+        for name in ('a2', 'a5'):
+            cap[name] = {'grader': {'group': 'turingscraft', 'points': 10}}
+
+        mock_gap.is_callable().with_args().returns(cap)
+        presentation_scheme = NumericGradeScheme()
+        mock_presentation.is_callable().with_args().returns(presentation_scheme)
+        policy.validate()
+
+        book = IGradeBook(course)
+        for cat in ('iclicker', 'turingscraft'):
+            book[cat] = GradeBookPart()
+        for name, cat, value in ((u'a1', 'iclicker', 6),
+                                 (u'a3', 'iclicker', 10),
+                                 (u'a4', 'iclicker', 2),
+                                 (u'a2', 'turingscraft', 5),
+                                 (u'a5', 'turingscraft', 10)):
+            entry = GradeBookEntry()
+            entry.assignmentId = name
+            book[cat][name] = entry
+
+            grade = PersistentGrade()
+            grade.value = value
+            grade.username = u'cald3307'
+            if name == u'a5':
+                interface.alsoProvides(grade, IExcusedGrade)
+            entry[u'cald3307'] = grade
+
+        # iclicker drops a4 and rebalances: (0.6 + 1.0) * 0.5 * 0.25
+        # turingscraft skips the excused a5: 0.5 * 1.0 * 0.25
+        grade = policy.grade('cald3307')
+        assert_that(grade.RawValue, is_(close_to(0.65, 0.0001)))
+        assert_that(grade.correctness, is_(65))
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+# pylint: disable=protected-access,too-many-public-methods
+
+from hamcrest import is_
+from hamcrest import none
+from hamcrest import assert_that
+from hamcrest import same_instance
+from hamcrest import is_not as does_not
+
+from datetime import datetime
+from datetime import timedelta
+
+import fudge
+
+import unittest
+
+from zope import interface
+
+from nti.app.products.gradebook.grading.policies.metadata import get_assignment_metadata
+
+from nti.app.products.gradebook.tests import SharedConfiguringTestLayer
+
+from nti.assessment.interfaces import IQAssignment
+
+
+@interface.implementer(IQAssignment)
+class _Assignment(object):
+
+    parts = ()
+
+    def __init__(self, ntiid, no_submit=False):
+        self.ntiid = ntiid
+        self.no_submit = no_submit
+
+
+class _Dates(object):
+
+    lastModified = 0
+
+    def __init__(self, endings):
+        self.endings = endings
+
+    def of(self, assignment):
+        result = fudge.Fake()
+        result.has_attr(available_for_submission_ending=self.endings.get(assignment.ntiid))
+        return result
+
+
+class _Policies(dict):
+
+    _p_jar = object()
+    _p_changed = False
+    _p_serial = b'serial'
+    lastModified = 0
+
+
+class _Policy(object):
+
+    course = None
+
+    def __init__(self):
+        self.questions_calls = 0
+
+    def _has_questions(self, unused_assignment):
+        self.questions_calls += 1
+        return True
+
+
+class TestAssignmentMetadata(unittest.TestCase):
+
+    layer = SharedConfiguringTestLayer
+
+    @fudge.patch('nti.app.products.gradebook.grading.policies.metadata.get_assignment_policies',
+                 'nti.app.products.gradebook.grading.policies.metadata.IQAssignmentDateContext')
+    def test_metadata(self, mock_gap, mock_dates):
+        now = datetime.utcnow()
+        policies = _Policies()
+        policies['a1'] = {'auto_grade': {'total_points': 10},
+                          'grader': {'group': 'quizzes'}}
+        dates = _Dates({'a1': now - timedelta(days=1),
+                        'a2': now + timedelta(days=1)})
+        mock_gap.is_callable().returns(policies)
+        mock_dates.is_callable().returns(dates)
+
+        policy = _Policy()
+        a1 = _Assignment('a1')
+        a2 = _Assignment('a2', no_submit=True)
+
+        table = get_assignment_metadata(policy)
+        assert_that(table.is_late(a1, now), is_(True))
+        assert_that(table.is_late(a2, now), is_(False))
+        assert_that(table.no_submit(a2), is_(True))
+        assert_that(table.get(a1).category, is_('quizzes'))
+        assert_that(table.total_points('a1'), is_(10))
+        assert_that(table.total_points('a2'), is_(none()))
+        assert_that(table.has_questions(a1), is_(True))
+        assert_that(table.has_questions(a1), is_(True))
+        assert_that(policy.questions_calls, is_(1))
+
+        # modified assignments are resolved again
+        a2.no_submit = False
+        assert_that(table.no_submit(a2), is_(True))
+        a2.lastModified = 1
+        assert_that(table.no_submit(a2), is_(False))
+        a1.lastModified = 1
+        assert_that(table.has_questions(a1), is_(True))
+        assert_that(policy.questions_calls, is_(2))
+
+        # kept on the policy
+        assert_that(get_assignment_metadata(policy), same_instance(table))
+
+        # assignment policy changes invalidate
+        policies._p_serial = b'serial2'
+        assert_that(get_assignment_metadata(policy),
+                    does_not(same_instance(table)))
+        table = get_assignment_metadata(policy)
+
+        # as do date context changes
+        dates.lastModified = 1
+        assert_that(get_assignment_metadata(policy),
+                    does_not(same_instance(table)))
+
+        # uncommitted changes are not kept
+        policies._p_changed = True
+        assert_that(get_assignment_metadata(policy),
+                    does_not(same_instance(get_assignment_metadata(policy))))
@@ -10,6 +10,8 @@ from __future__ import absolute_import
 
 import logging
 
+from array import array
+
 from datetime import datetime
 from collections import defaultdict
 
@@ -17,7 +19,6 @@ import six
 
 from ZODB import loglevels
 
-from zope import component
 from zope import interface
 
 from zope.cachedescriptors.property import Lazy
@@ -28,10 +29,14 @@ from zope.security.interfaces import IPrincipal
 from nti.app.products.gradebook.gradescheme import NumericGradeScheme
 from nti.app.products.gradebook.gradescheme import LetterNumericGradeScheme
 
+from nti.app.products.gradebook.grading.interfaces import IGradeBookBatchGradingPolicy
+
 from nti.app.products.gradebook.grading.policies.interfaces import ICategoryGradeScheme
 from nti.app.products.gradebook.grading.policies.interfaces import ICS1323EqualGroupGrader
 from nti.app.products.gradebook.grading.policies.interfaces import ICS1323CourseGradingPolicy
 
+from nti.app.products.gradebook.grading.policies.metadata import get_assignment_metadata
+
 from nti.app.products.gradebook.grading.utils import build_predicted_grade
 
 from nti.app.products.gradebook.interfaces import FINAL_GRADE_NAMES
@@ -42,7 +47,6 @@ from nti.app.products.gradebook.interfaces import IExcusedGrade
 
 from nti.app.products.gradebook.utils import MetaGradeBookObject
 
-from nti.assessment.interfaces import IQAssignment
 from nti.assessment.interfaces import IQAssignmentDateContext
 
 from nti.contenttypes.courses.grading.policies import EqualGroupGrader
@@ -97,6 +101,57 @@ class GradeProxy(object):
         return result
 
 
+def _grade_correctness(value, scheme, assignmentId, penalty=0.0):
+    """
+    Return the correctness of a grade value, or None if the value
+    is not valid for the scheme.
+    """
+    try:
+        result = to_correctness(value, scheme)
+        return result * (1 - penalty)
+    except (ValueError, TypeError):
+        logger.error("Invalid value %s for grade scheme %s in assignment %s",
+                     value, scheme, assignmentId)
+        return None
+
+
+#: :class:`CategoryGrades` flags
+EXCUSED = 1
+INVALID = 2
+
+
+class CategoryGrades(object):
+    """
+    The (entered and missing) grades of a student in a category, as
+    parallel arrays of assignment ids, correctness, weights and
+    excused/invalid flags.
+    """
+
+    __slots__ = ('assignment_ids', 'correctness', 'weights', 'flags')
+
+    def __init__(self):
+        self.assignment_ids = []
+        self.correctness = array('d')
+        self.weights = array('d')
+        self.flags = bytearray()
+
+    def __len__(self):
+        return len(self.assignment_ids)
+
+    def append(self, assignmentId, correctness, weight, flags=0):
+        self.assignment_ids.append(assignmentId)
+        self.correctness.append(correctness)
+        self.weights.append(weight)
+        self.flags.append(flags)
+
+    def sorted_indexes(self):
+        """
+        Return the indexes of the grades sorted (stable) by correctness.
+        """
+        return sorted(range(len(self.assignment_ids)),
+                      key=self.correctness.__getitem__)
+
+
 @WithRepr
 @six.add_metaclass(MetaGradeBookObject)
 @interface.implementer(ICategoryGradeScheme)
@@ -116,7 +171,8 @@ class CS1323EqualGroupGrader(EqualGroupGrader):
 
 
 @six.add_metaclass(MetaGradeBookObject)
-@interface.implementer(ICS1323CourseGradingPolicy)
+@interface.implementer(ICS1323CourseGradingPolicy,
+                       IGradeBookBatchGradingPolicy)
 class CS1323CourseGradingPolicy(DefaultCourseGradingPolicy):
     createDirectFieldProperties(ICS1323CourseGradingPolicy)
 
@@ -215,23 +271,38 @@ class CS1323CourseGradingPolicy(DefaultCourseGradingPolicy):
             result[name] = scheme
         return result
 
-    def _is_late(self, assignmentId, now=None):
-        dates = self.dateContext
+    def _is_late(self, assignmentId, now=None, metadata=None):
         now = now or datetime.utcnow()
+        metadata = get_assignment_metadata(self) if metadata is None else metadata
+        return metadata.is_late(assignmentId, now)
+
+    def _is_no_submit(self, assignmentId, metadata=None):
+        metadata = get_assignment_metadata(self) if metadata is None else metadata
+        return metadata.no_submit(assignmentId)
+
+    def _assignment_states(self, now=None):
+        """
+        Return a map of policy assignment ids to their
+        (is_late, is_no_submit) flags.
+        """
+        now = now or datetime.utcnow()
+        metadata = get_assignment_metadata(self)
+        result = {}
         # pylint: disable=no-member
-        assignment = component.queryUtility(IQAssignment, name=assignmentId)
-        if assignment is not None and dates is not None:
-            _ending = dates.of(assignment).available_for_submission_ending
-            return bool(_ending and now > _ending)
-        return False
-
-    def _is_no_submit(self, assignmentId):
-        assignment = component.queryUtility(IQAssignment, name=assignmentId)
-        return bool(assignment is not None and assignment.no_submit)
-
-    def _grade_map(self, username):
-        now = datetime.utcnow()
-        result = defaultdict(list)
+        for assignments in self._assignments.values():
+            for assignmentId in assignments:
+                result[assignmentId] = (self._is_late(assignmentId, now, metadata),
+                                        self._is_no_submit(assignmentId, metadata))
+        return result
+
+    def _category_grades(self, username, states=None):
+        """
+        Return a map of category names to the :class:`CategoryGrades`
+        of the given user.
+        """
+        if states is None:
+            states = self._assignment_states()
+        result = defaultdict(CategoryGrades)
         entered = defaultdict(set)
         # pylint: disable=no-member
         # parse all grades and bucket them by category
@@ -258,37 +329,34 @@ class CS1323CourseGradingPolicy(DefaultCourseGradingPolicy):
                              assignmentId)
                 continue
 
-            correctness = None
-            excused = IExcusedGrade.providedBy(grade)
-            is_late = self._is_late(assignmentId, now)
+            flags = EXCUSED if IExcusedGrade.providedBy(grade) else 0
 
             value = grade.value
             if value is None:  # not graded assume correct
-                value = 0
                 correctness = 1
+            else:
+                correctness = _grade_correctness(value, scheme, assignmentId)
+                if correctness is None:
+                    correctness = 0
+                    flags |= INVALID
 
             # record grade
-            proxy = GradeProxy(assignmentId, value, weight, scheme, excused)
-            if correctness is not None:
-                proxy.correctness = correctness
             # pylint: disable=unsubscriptable-object
             cat_name = self._rev_categories[assignmentId]
-            result[cat_name].append(proxy)
+            result[cat_name].append(assignmentId, correctness, weight, flags)
             entered[cat_name].add(assignmentId)
 
-        # now create proxy grades with 0 correctes for missing ones
+        # now add grades with 0 correctness for missing ones
         # that we know about in the policy
         for cat_name, assignments in self._assignments.items():
             inputed = entered[cat_name]
             for assignmentId in assignments.difference(inputed):
 
-                is_late = self._is_late(assignmentId, now)
-                is_no_submit = self._is_no_submit(assignmentId)
+                is_late, is_no_submit = states[assignmentId]
 
                 # we assume the assigment is correct
                 correctness = 1
                 weight = self._weights.get(assignmentId)
-                scheme = self._schemes.get(assignmentId)
 
                 # check if the assigment is late
                 if is_late:
@@ -298,16 +366,7 @@ class CS1323CourseGradingPolicy(DefaultCourseGradingPolicy):
                         penalty = 1
                         correctness = 1 - penalty
 
-                # create proxy grade
-                proxy = GradeProxy(assignmentId, 0, weight, scheme)
-                proxy.correctness = correctness
-                result[cat_name].append(proxy)
-
-        # sort by correctness
-        for name in result.keys():
-            result[name].sort(key=lambda g: g.correctness)
-
-        # return
+                result[cat_name].append(assignmentId, correctness, weight)
         return result
 
     def grade(self, principal, verbose=False, scheme=None):  # pylint: disable=arguments-differ
@@ -330,43 +389,58 @@ class CS1323CourseGradingPolicy(DefaultCourseGradingPolicy):
         Sum up the result derived from each category and arrive at predictor grade
         """
 
+        return self._grade(principal, None, verbose, scheme)
+
+    def grade_many(self, principals, verbose=False, scheme=None):
+        """
+        Grade the given principals, yielding (principal, grade) pairs. The
+        assignment due and no-submit states are only gathered once.
+        """
+        states = self._assignment_states()
+        for principal in principals:
+            yield principal, self._grade(principal, states, verbose, scheme)
+
+    def _grade(self, principal, states=None, verbose=False, scheme=None):
         LOGLEVEL = logging.INFO if verbose else loglevels.TRACE
 
         logger.log(LOGLEVEL, "Grading %s", principal)
 
         result = 0
         username = IPrincipal(principal).id
-        grade_map = self._grade_map(username)
-        for name, grades in grade_map.items():
+        category_grades = self._category_grades(username, states)
+        for name, grades in category_grades.items():
             logger.log(LOGLEVEL,
                        "Grading category %s", name)
 
             drop_count = 0
-            grade_count = len(grades)
             category = self.groups[name]
+            # indexes sorted by correctness
+            indexes = grades.sorted_indexes()
+            grade_count = len(indexes)
 
             # drop excused grades and invalid grades
+            flags = grades.flags
+            assignment_ids = grades.assignment_ids
             logger.log(LOGLEVEL,
                        "%s have been skipped",
-                       [x for x in grades if x.excused or x.invalid_grade])
+                       [assignment_ids[i] for i in indexes if flags[i]])
 
-            grades = [
-                x for x in grades if not x.excused and not x.invalid_grade
-            ]
-            drop_count += (grade_count - len(grades))
-            grade_count = len(grades)
+            indexes = [i for i in indexes if not flags[i]]
+            drop_count += (grade_count - len(indexes))
+            grade_count = len(indexes)
 
             # drop lowest grades in the category
             # make sure we don't drop excused grades
             if category.DropLowest and category.DropLowest < grade_count:
                 logger.log(LOGLEVEL,
                            "%s have been dropped",
-                           grades[0:category.DropLowest])
-                grades = grades[category.DropLowest:]
-                drop_count += (grade_count - len(grades))
+                           [assignment_ids[i] for i in indexes[0:category.DropLowest]])
+                indexes = indexes[category.DropLowest:]
+                drop_count += (grade_count - len(indexes))
 
+            weights = grades.weights
             # if we drop any rebalance weights equally
-            if drop_count and grades:
+            if drop_count and indexes:
                 # pylint: disable=no-member
                 assignments = len(self._assignments.get(name) or ())
                 denominator = assignments - drop_count
@@ -378,22 +452,16 @@ class CS1323CourseGradingPolicy(DefaultCourseGradingPolicy):
                                   drop_count)
                     item_weight = 0
 
-                for grade in grades:
-                    grade.weight = item_weight * category.weight
+                weights = array('d', [item_weight * category.weight]) * len(weights)
 
             # go through remaining grades
-            for grade in grades:
-                weight = grade.weight
-                if grade.excused:
-                    result += weight
-                    logger.log(LOGLEVEL, "%s is excused. Skipped", grade)
-                    continue
-                correctness = grade.correctness
-                weighted_correctness = correctness * weight
+            correctness = grades.correctness
+            for i in indexes:
+                weighted_correctness = correctness[i] * weights[i]
                 result += weighted_correctness
                 logger.log(LOGLEVEL,
                            "%s correctness and weighted correctness are %s, %s",
-                           grade, correctness, weighted_correctness)
+                           assignment_ids[i], correctness[i], weighted_correctness)
 
         logger.log(LOGLEVEL,
                    "Unjusted total grade percentage is %s. Adjust weight is %s",
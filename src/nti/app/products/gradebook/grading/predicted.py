@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Cached predicted grades.
+
+.. $Id$
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import hashlib
+
+from datetime import datetime
+
+from zope.security.interfaces import IPrincipal
+
+from nti.app.products.gradebook.enrollments import get_enrollment_scopes
+
+from nti.app.products.gradebook.gradebook import gradebook_for_course
+
+from nti.app.products.gradebook.grading.policies.metadata import get_assignment_metadata
+
+from nti.app.products.gradebook.grading.utils import calculate_predicted_grades
+
+from nti.app.products.gradebook.stamps import committed_stamp
+
+from nti.app.products.gradebook.utils.cache import ValidatedLRUCache
+
+from nti.contenttypes.courses.interfaces import ICourseAssignmentCatalog
+
+#: How many predicted grades we keep around per process
+PREDICTED_GRADE_CACHE_SIZE = 20000
+
+logger = __import__('logging').getLogger(__name__)
+
+
+def _assignment_state(policy, now):
+    """
+    Return the validator of the assignment metadata of the policy,
+    a digest of the published course assignments and the number of
+    them past due; predicted grades change as assignments are
+    published or removed and as missing ones become late.
+    """
+    metadata = get_assignment_metadata(policy)
+    catalog = ICourseAssignmentCatalog(policy.course)
+    ntiids = []
+    due_count = 0
+    for assignment in catalog.iter_assignments(course_lineage=True,
+                                               require_published=True):
+        ntiids.append(assignment.ntiid)
+        if metadata.is_late(assignment, now):
+            due_count += 1
+    data = u'\n'.join(sorted(ntiids)).encode('utf-8')
+    return metadata.validator, hashlib.sha1(data).hexdigest(), due_count
+
+
+def course_predicted_grade_validator(policy, now=None):
+    """
+    Return the part of the validators of cached predicted grades shared
+    by all the users of the course of the given policy, or None if they
+    cannot be cached. It changes when the policy, the course assignment
+    policies (and dates) or the published assignments change, or when
+    an assignment becomes past due.
+    """
+    now = now or datetime.utcnow()
+    policy_stamp = committed_stamp(policy)
+    metadata_stamp, assignments, due_count = _assignment_state(policy, now)
+    if policy_stamp is None or metadata_stamp is None:
+        return None
+    return (policy_stamp, metadata_stamp, assignments, due_count)
+
+
+def predicted_grade_validator(user, policy, course_validator, book=None, scopes=None):
+    """
+    Return the validator of the cached predicted grade of the given
+    user, or None if it cannot be cached. Besides the course validator
+    (see :func:`course_predicted_grade_validator`), it changes when the
+    user's grades or enrollment scope change.
+    """
+    if course_validator is None:
+        return None
+    course = policy.course
+    if book is None:
+        book = gradebook_for_course(course, False)
+    if book is None:
+        return None
+    if scopes is None:
+        scopes = get_enrollment_scopes(course)
+    username = IPrincipal(user).id
+    # pylint: disable=too-many-function-args
+    user_stamp = book.user_change_stamp(username)
+    if user_stamp is None:
+        return None
+    for_credit = username.lower() in scopes.for_credit
+    return (course_validator, user_stamp, for_credit)
+
+
+_predicted_cache = ValidatedLRUCache(PREDICTED_GRADE_CACHE_SIZE)
+
+
+def get_predicted_grades(users, policy, scheme=u'', recompute=False):
+    """
+    Return a list of (user, predicted grade) pairs of the given users
+    under the given policy, as :func:`calculate_predicted_grades` does.
+    Cached grades are reused, the others are computed in a single pass
+    of the policy. Pass ``recompute`` to bypass (and refresh) the cache.
+    """
+    users = list(users)
+    result = [None] * len(users)
+    book = gradebook_for_course(policy.course, False)
+    ntiid = getattr(book, 'NTIID', None)
+    course_validator = None
+    if ntiid:
+        course_validator = course_predicted_grade_validator(policy)
+    scopes = get_enrollment_scopes(policy.course) if course_validator else None
+
+    pending = []
+    for idx, user in enumerate(users):
+        key = validator = None
+        if course_validator is not None:
+            key = (ntiid, IPrincipal(user).id.lower(), scheme)
+            validator = predicted_grade_validator(user, policy, course_validator,
+                                                  book, scopes)
+        if validator is not None and not recompute:
+            cached = _predicted_cache.query(key, validator)
+            if cached is not None:
+                result[idx] = (user, cached[0])
+                continue
+        pending.append((idx, key, validator))
+
+    if pending:
+        computed = calculate_predicted_grades([users[x[0]] for x in pending],
+                                              policy, scheme)
+        for (idx, key, validator), (user, grade) in zip(pending, computed):
+            result[idx] = (user, grade)
+            if validator is not None:
+                # wrap it, the grade may be None
+                _predicted_cache.store(key, validator, (grade,))
+    return result
+
+
+def get_predicted_grade(user, policy, scheme=u'', recompute=False):
+    """
+    Return the (possibly cached) predicted grade of the given user
+    under the given policy, as :func:`calculate_predicted_grade` does.
+    Pass ``recompute`` to bypass (and refresh) the cache.
+    """
+    return get_predicted_grades((user,), policy, scheme, recompute)[0][1]
@@ -11,8 +11,16 @@ from __future__ import absolute_import
 import os
 import argparse
 import importlib
+import multiprocessing
 
+from six.moves import queue
+
+import transaction
+
+from nti.app.products.gradebook.grading.utils import store_grades
 from nti.app.products.gradebook.grading.utils import calculate_grades
+from nti.app.products.gradebook.grading.utils import get_course_principals
+from nti.app.products.gradebook.grading.utils import grade_course_principals
 
 from nti.app.products.gradebook.interfaces import IGradeScheme
 
@@ -25,11 +33,115 @@ from nti.dataserver.utils.base_script import create_context
 
 from nti.ntiids.ntiids import find_object_with_ntiid
 
+#: The ZCML packages the dataserver is configured with
+CONF_PACKAGES = ('nti.appserver',)
+
+#: Seconds between checks of the grading processes health
+WORKER_POLL_TIMEOUT = 30
+
 logger = __import__('logging').getLogger(__name__)
 
 
+def _get_course(ntiid):
+    context = find_object_with_ntiid(ntiid)
+    course = ICourseInstance(context, None)
+    if course is None:
+        raise ValueError("Course not found", ntiid)
+    return course
+
+
+def _run(env_dir, function, verbose=False):
+    context = create_context(env_dir, with_library=True)
+    return run_with_dataserver(environment_dir=env_dir,
+                               verbose=verbose,
+                               context=context,
+                               minimal_ds=True,
+                               xmlconfig_packages=CONF_PACKAGES,
+                               function=function)
+
+
+def _grade_chunk(site, ntiid, usernames, verbose=False):
+    # read-only, nothing in the worker is ever committed
+    transaction.doom()
+    set_site(site)
+    course = _get_course(ntiid)
+    principals = get_course_principals(course, set(usernames))
+    graded = grade_course_principals(course, principals, verbose)
+    return [(principal.id.lower(), correctness)
+            for principal, correctness in graded]
+
+
+def _grade_worker(env_dir, site, ntiid, verbose, tasks, results):
+    usernames = tasks.get()
+    if usernames is None:
+        return
+    try:
+        graded = _run(env_dir,
+                      lambda: _grade_chunk(site, ntiid, usernames, verbose),
+                      verbose)
+        results.put((True, graded))
+    except Exception as e:  # pylint: disable=broad-except
+        logger.exception("Cannot grade users")
+        results.put((False, repr(e)))
+
+
+class GradeWorkers(object):
+    """
+    A set of grading processes. They are started before the dataserver
+    is opened, and each one opens its own connection to grade a single
+    chunk of usernames and returns their correctness.
+    """
+
+    def __init__(self, count, env_dir, site, ntiid, verbose=False):
+        self.tasks = multiprocessing.Queue()
+        self.results = multiprocessing.Queue()
+        self.processes = []
+        for _ in range(count):
+            process = multiprocessing.Process(target=_grade_worker,
+                                              args=(env_dir, site, ntiid, verbose,
+                                                    self.tasks, self.results))
+            process.daemon = True
+            process.start()
+            self.processes.append(process)
+        self._idle = count
+
+    def grade(self, usernames):
+        """
+        Grade the given usernames, returning (username, correctness) pairs.
+        """
+        count = min(self._idle, len(usernames))
+        chunks = [usernames[i::count] for i in range(count)]
+        for chunk in chunks:
+            self.tasks.put(chunk)
+        self._idle -= count
+        result = []
+        pending = len(chunks)
+        while pending:
+            try:
+                success, value = self.results.get(timeout=WORKER_POLL_TIMEOUT)
+            except queue.Empty:
+                # a worker killed (or crashed) before reporting
+                # its result would make us wait forever
+                if      any(x.exitcode for x in self.processes) \
+                    or not any(x.is_alive() for x in self.processes):
+                    raise ValueError("Grading worker died")
+                continue
+            if not success:
+                raise ValueError("Grading worker failed", value)
+            result.extend(value)
+            pending -= 1
+        return result
+
+    def close(self):
+        for _ in range(self._idle):
+            self.tasks.put(None)
+        self._idle = 0
+        for process in self.processes:
+            process.join()
+
+
 def _process_args(ntiid, scheme=None, usernames=(), site=None,
-                  entry_name=None, verbose=False):
+                  entry_name=None, verbose=False, workers=None):
     if scheme:
         module_name, class_name = scheme.rsplit(".", 1)
         module = importlib.import_module(module_name)
@@ -40,17 +152,22 @@ def _process_args(ntiid, scheme=None, usernames=(), site=None,
         grade_scheme = None
 
     set_site(site)
-    context = find_object_with_ntiid(ntiid)
-    course = ICourseInstance(context, None)
-    if course is None:
-        raise ValueError("Course not found", ntiid)
+    course = _get_course(ntiid)
 
     usernames = {x.lower() for x in usernames or ()}
-    result = calculate_grades(course,
-                              usernames=usernames,
+    if workers is not None:
+        principals = get_course_principals(course, usernames)
+        graded = workers.grade([x.id.lower() for x in principals])
+        result = store_grades(course,
+                              graded,
                               grade_scheme=grade_scheme,
-                              entry_name=entry_name,
-                              verbose=verbose)
+                              entry_name=entry_name)
+    else:
+        result = calculate_grades(course,
+                                  usernames=usernames,
+                                  grade_scheme=grade_scheme,
+                                  entry_name=entry_name,
+                                  verbose=verbose)
     if not entry_name or verbose:
         print("\nGrades...")
         for name, grade in result.items():
@@ -78,6 +195,10 @@ def main():
                             nargs="+",
                             default=(),
                             help="The usernames")
+
+    arg_parser.add_argument('-w', '--workers', dest='workers',
+                            type=int, default=0,
+                            help="Number of grading processes")
     args = arg_parser.parse_args()
     verbose = args.verbose
 
@@ -86,19 +207,24 @@ def main():
         print('WARN: NO site specified')
 
     env_dir = os.getenv('DATASERVER_DIR')
-    context = create_context(env_dir, with_library=True)
-    conf_packages = ('nti.appserver',)
-    run_with_dataserver(environment_dir=env_dir,
-                        verbose=verbose,
-                        context=context,
-                        minimal_ds=True,
-                        xmlconfig_packages=conf_packages,
-                        function=lambda: _process_args(site=site,
-                                                       verbose=verbose,
-                                                       ntiid=args.ntiid,
-                                                       scheme=args.scheme,
-                                                       entry_name=args.entry,
-                                                       usernames=args.usernames))
+    workers = None
+    if args.workers > 1:
+        # fork before the dataserver is opened
+        workers = GradeWorkers(args.workers, env_dir, site,
+                               args.ntiid, verbose)
+    try:
+        _run(env_dir,
+             lambda: _process_args(site=site,
+                                   verbose=verbose,
+                                   workers=workers,
+                                   ntiid=args.ntiid,
+                                   scheme=args.scheme,
+                                   entry_name=args.entry,
+                                   usernames=args.usernames),
+             verbose)
+    finally:
+        if workers is not None:
+            workers.close()
 
 
 if __name__ == '__main__':
@@ -16,10 +16,13 @@ from zope.security.interfaces import IPrincipal
 
 from nti.app.products.gradebook.assignments import create_assignment_part
 
+from nti.app.products.gradebook.coalescing import coalesced_grade_events
+
 from nti.app.products.gradebook.grades import PredictedGrade
 from nti.app.products.gradebook.grades import PersistentGrade
 
 from nti.app.products.gradebook.grading.interfaces import IGradeBookGradingPolicy
+from nti.app.products.gradebook.grading.interfaces import IGradeBookBatchGradingPolicy
 
 from nti.app.products.gradebook.interfaces import NO_SUBMIT_PART_NAME
 
@@ -33,16 +36,45 @@ from nti.contenttypes.courses.interfaces import ICourseEnrollments
 logger = __import__('logging').getLogger(__name__)
 
 
-def calculate_grades(context,
-                     usernames=(),
-                     grade_scheme=None,
-                     entry_name=None,
-                     verbose=False):
-    result = {}
-    course = ICourseInstance(context)
+def get_course_principals(course, usernames=()):
+    """
+    Return the principals enrolled in the given course, optionally
+    restricted to the given (lowercase) usernames.
+    """
+    principals = []
+    for record in ICourseEnrollments(course).iter_enrollments():
+        principal = IPrincipal(record.Principal, None)
+        if principal is None:
+            # ignore dup enrollment
+            continue
+        # pylint: disable=no-member
+        username = principal.id.lower()
+        if usernames and username not in usernames:
+            continue
+        principals.append(principal)
+    return principals
+
+
+def grade_course_principals(course, principals, verbose=False):
+    """
+    Grade the given principals with the grading policy of the given
+    course, yielding (principal, correctness) pairs.
+    """
     policy = find_grading_policy_for_course(course)
     if policy is None:
         raise ValueError("Course does not have grading policy")
+    if IGradeBookGradingPolicy.providedBy(policy):
+        return grade_principals(policy, principals, verbose=verbose)
+    return grade_principals(policy, principals)
+
+
+def store_grades(course, graded, grade_scheme=None, entry_name=None):
+    """
+    Create a grade for each of the given (username, correctness) pairs,
+    converting them with the grade scheme, and store them in the
+    ``entry_name`` entry (if any) of the given course in a single batch.
+    """
+    result = {}
     # pylint: disable=too-many-function-args
     if entry_name:
         part = create_assignment_part(course, NO_SUBMIT_PART_NAME)
@@ -55,33 +87,55 @@ def calculate_grades(context,
             part[INameChooser(part).chooseName(entry_name, entry)] = entry
     else:
         entry = None
-    for record in ICourseEnrollments(course).iter_enrollments():
-        principal = IPrincipal(record.Principal, None)
-        if principal is None:
-            # ignore dup enrollment
-            continue
-        # pylint: disable=no-member
-        username = principal.id.lower()
-        if usernames and username not in usernames:
-            continue
-        # grade correctness
-        if IGradeBookGradingPolicy.providedBy(policy):
-            # pylint: disable=unexpected-keyword-arg
-            value = correctness = policy.grade(principal, verbose=verbose)
-        else:
-            value = correctness = policy.grade(principal)
-        # if there is a grade scheme convert value
+    # grade subscribers do their work once per user when we are done
+    with coalesced_grade_events():
+        graded = list(graded)
+        values = [correctness for _, correctness in graded]
+        # if there is a grade scheme convert values
         if grade_scheme is not None:
-            value = grade_scheme.fromCorrectness(correctness)
-        grade = PersistentGrade(value=value)
-        grade.username = username
-        result[username] = grade
-        # if entry is available save it
-        if entry is not None:
-            entry[username] = grade
+            from_many = getattr(grade_scheme, 'fromCorrectness_many', None)
+            if from_many is not None:
+                values = from_many(values)
+            else:
+                values = [grade_scheme.fromCorrectness(x) for x in values]
+        for (username, _), value in zip(graded, values):
+            grade = PersistentGrade(value=value)
+            grade.username = username
+            result[username] = grade
+            # if entry is available save it
+            if entry is not None:
+                entry[username] = grade
     return result
 
 
+def calculate_grades(context,
+                     usernames=(),
+                     grade_scheme=None,
+                     entry_name=None,
+                     verbose=False):
+    course = ICourseInstance(context)
+    principals = get_course_principals(course, usernames)
+    # grade correctness
+    graded = grade_course_principals(course, principals, verbose)
+    graded = ((principal.id.lower(), correctness)
+              for principal, correctness in graded)
+    return store_grades(course, graded, grade_scheme, entry_name)
+
+
+def grade_principals(policy, principals, **kwargs):
+    """
+    Grade the given principals with the policy, yielding (principal, grade)
+    pairs. Policies that support batch grading only gather their course
+    data once.
+    """
+    if IGradeBookBatchGradingPolicy.providedBy(policy):
+        for principal, grade in policy.grade_many(principals, **kwargs):
+            yield principal, grade
+    else:
+        for principal in principals:
+            yield principal, policy.grade(principal, **kwargs)
+
+
 def get_presentation_scheme(policy):
     if IGradeBookGradingPolicy.providedBy(policy):
         return policy.PresentationGradeScheme
@@ -95,6 +149,15 @@ def calculate_predicted_grade(user, policy, scheme=''):
     return predicted_grade
 
 
+def calculate_predicted_grades(users, policy, scheme=''):
+    """
+    Return a generator of (user, predicted grade) pairs.
+    """
+    if not scheme:
+        scheme = get_presentation_scheme(policy)
+    return grade_principals(policy, users, scheme=scheme)
+
+
 def build_predicted_grade(policy, points_earned=None, points_available=None, 
                           raw_value=None, scheme=None):
 
@@ -17,6 +17,10 @@ from zope.intid.interfaces import IIntIds
 
 from zope.location import locate
 
+from nti.app.assessment.common.history import get_most_recent_history_item
+
+from nti.app.assessment.interfaces import IUsersCourseAssignmentHistoryItem
+
 from nti.app.products.gradebook.interfaces import IGrade
 
 from nti.base._compat import text_
@@ -24,6 +28,8 @@ from nti.base._compat import text_
 from nti.contenttypes.courses.interfaces import ICourseInstance
 from nti.contenttypes.courses.interfaces import ICourseCatalogEntry
 
+from nti.dataserver.users.users import User
+
 from nti.site.interfaces import IHostPolicyFolder
 
 from nti.traversal.traversal import find_interface
@@ -48,6 +54,11 @@ IX_ASSIGNMENT_ID = 'assignmentId'
 IX_STUDENT = IX_USERNAME = 'username'
 IX_CREATOR = IX_INSTRUCTOR = 'creator'
 IX_COURSE = IX_ENTRY = IX_GRADE_COURSE = 'gradeCourse'
+IX_SUBMITTED_TIME = 'submittedTime'
+IX_FEEDBACK_COUNT = 'feedbackCount'
+
+#: The indexes whose values come from the history item of a grade
+SUBMISSION_INDEXES = (IX_SUBMITTED_TIME, IX_FEEDBACK_COUNT)
 
 logger = __import__('logging').getLogger(__name__)
 
@@ -175,6 +186,76 @@ class CatalogEntryIDIndex(ValueIndex):
     default_interface = ValidatingGradeCatalogEntryID
 
 
+def get_grade_history_item(grade):
+    """
+    Return the (most recent) assignment history item of the grade.
+    """
+    username = getattr(grade, 'Username', None)
+    assignment_id = getattr(grade, 'AssignmentId', None)
+    user = User.get_user(username) if username else None
+    course = find_interface(grade, ICourseInstance, strict=False)
+    if user is None or course is None or not assignment_id:
+        return None
+    return get_most_recent_history_item(user, course, assignment_id)
+
+
+class ValidatingGradeSubmission(object):
+    """
+    The "interface" we adapt to to find the submission time and
+    feedback count of a grade. Their values come from the history item
+    of the grade (see :func:`reindex_grade_submission`); indexing the
+    grade itself keeps them, so that its history item is not looked up
+    every time the grade is modified.
+    """
+
+    __slots__ = ('createdTime', 'FeedbackCount')
+
+    def __new__(cls, obj, default=None):
+        if not IUsersCourseAssignmentHistoryItem.providedBy(obj):
+            return default
+        return super(ValidatingGradeSubmission, cls).__new__(cls)
+
+    def __init__(self, item, unused_default=None):
+        self.createdTime = item.createdTime
+        self.FeedbackCount = item.FeedbackCount
+
+    def __reduce__(self):
+        raise TypeError()
+
+
+class GradeSubmittedTimeIndex(ValueIndex):
+    default_field_name = 'createdTime'
+    default_interface = ValidatingGradeSubmission
+
+
+class GradeFeedbackCountIndex(ValueIndex):
+    default_field_name = 'FeedbackCount'
+    default_interface = ValidatingGradeSubmission
+
+
+def reindex_grade_submission(grade, item=None, catalog=None, intids=None):
+    """
+    Reindex the values the grade takes from its history item, looking
+    the item up if not given.
+    """
+    catalog = get_grade_catalog() if catalog is None else catalog
+    intids = component.queryUtility(IIntIds) if intids is None else intids
+    doc_id = intids.queryId(grade) if intids is not None else None
+    if catalog is None or doc_id is None:
+        return False
+    if item is None:
+        item = get_grade_history_item(grade)
+    for name in SUBMISSION_INDEXES:
+        index = catalog.get(name)
+        if index is None:
+            continue
+        if item is None:
+            index.unindex_doc(doc_id)
+        else:
+            index.index_doc(doc_id, item)
+    return True
+
+
 @interface.implementer(IDeferredCatalog)
 class MetadataGradeCatalog(DeferredCatalog):
 
@@ -197,7 +278,9 @@ def create_grade_catalog(catalog=None, family=BTrees.family64):
                         (IX_USERNAME, GradeUsernameIndex),
                         (IX_GRADE_TYPE, GradeValueTypeIndex),
                         (IX_ASSIGNMENT_ID, AssignmentIdIndex),
-                        (IX_GRADE_COURSE, CatalogEntryIDIndex)):
+                        (IX_GRADE_COURSE, CatalogEntryIDIndex),
+                        (IX_SUBMITTED_TIME, GradeSubmittedTimeIndex),
+                        (IX_FEEDBACK_COUNT, GradeFeedbackCountIndex)):
         index = clazz(family=family)
         locate(index, catalog, name)
         catalog[name] = index
@@ -120,4 +120,8 @@ class _LetterGradeSchemeObjectUpdater(object):
 
         self.obj.ranges = tuple(ranges)
         self.obj.grades = tuple(grades)
+        # drop the compiled ranges
+        invalidate = getattr(self.obj, '_invalidate', None)
+        if invalidate is not None:
+            invalidate()
         return True
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Columnar, non-persistent snapshots of a gradebook.
+
+.. $Id$
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import sys
+
+from array import array
+
+from bisect import bisect_left
+
+from collections import namedtuple
+
+from zope.cachedescriptors.property import Lazy
+
+from nti.app.products.gradebook.interfaces import IGradeBook
+from nti.app.products.gradebook.interfaces import IExcusedGrade
+
+from nti.app.products.gradebook.normalization import NAN
+from nti.app.products.gradebook.normalization import normalize_grades
+
+from nti.app.products.gradebook.utils.cache import ValidatedLRUCache
+
+#: Cell flags
+PRESENT = 1
+EXCUSED = 2
+
+#: How many bytes (estimated) of course matrices we keep around per process
+MATRIX_CACHE_BYTES = 256 * 1024 * 1024
+
+logger = __import__('logging').getLogger(__name__)
+
+
+GradeMatrixColumn = namedtuple('GradeMatrixColumn',
+                               ('assignment_id', 'part_name', 'entry_name'))
+
+GradeMatrixCell = namedtuple('GradeMatrixCell',
+                             ('value', 'number', 'excused', 'lastModified'))
+
+
+class GradeMatrix(object):
+    """
+    An immutable snapshot of all the grades of a gradebook, with a
+    row per (lowercased) username and a column per gradebook entry.
+
+    Only the cells with a grade are stored, column by column, in
+    compact arrays: the (sorted) row indexes of the grades, their raw
+    values, their numeric values (``NaN`` if not numeric), their
+    excused flags and their last modified times.
+    """
+
+    def __init__(self, columns, usernames, rows, values, numbers, flags,
+                 last_modified):
+        self.columns = tuple(columns)
+        self.usernames = tuple(usernames)
+        self.rows = rows
+        self.values = values
+        self.numbers = numbers
+        self.flags = flags
+        self.last_modified = last_modified
+        self._user_index = {x: idx for idx, x in enumerate(self.usernames)}
+        self._column_index = {}
+        for idx, column in enumerate(self.columns):
+            self._column_index.setdefault(column.assignment_id, idx)
+
+    @classmethod
+    def build(cls, book):
+        """
+        Build a matrix for the given book walking its grades once.
+        """
+        columns = []
+        grades = []
+        usernames = set()
+        for part_name, part in tuple(book.items()):
+            for entry_name, entry in tuple(part.items()):
+                columns.append(GradeMatrixColumn(entry.assignmentId,
+                                                 part_name,
+                                                 entry_name))
+                column_grades = []
+                for username, grade in tuple(entry.items()):
+                    username = username.lower()
+                    usernames.add(username)
+                    column_grades.append((username, grade))
+                grades.append(column_grades)
+
+        usernames = sorted(usernames)
+        user_index = {x: idx for idx, x in enumerate(usernames)}
+        rows, values, numbers, flags, last_modified = [], [], [], [], []
+        for column_grades in grades:
+            column_grades = sorted((user_index[username], grade)
+                                   for username, grade in column_grades)
+            cells = [x[1] for x in column_grades]
+            rows.append(array('l', [x[0] for x in column_grades]))
+            values.append([x.value for x in cells])
+            numbers.append(normalize_grades(cells, excused=False).numbers)
+            flags.append(bytearray(
+                PRESENT | (EXCUSED if IExcusedGrade.providedBy(x) else 0)
+                for x in cells))
+            last_modified.append(array('d', [x.lastModified or 0.0 for x in cells]))
+        return cls(columns, usernames, rows, values, numbers, flags, last_modified)
+
+    @property
+    def width(self):
+        return len(self.columns)
+
+    @Lazy
+    def estimated_size(self):
+        """
+        The approximate number of bytes this matrix takes.
+        """
+        result = sys.getsizeof(self._user_index)
+        result += sum(sys.getsizeof(x) for x in self.usernames)
+        for col in range(self.width):
+            result += sys.getsizeof(self.values[col])
+            result += sum(sys.getsizeof(x) for x in self.values[col])
+            for data in (self.rows, self.numbers, self.flags, self.last_modified):
+                result += sys.getsizeof(data[col])
+        return result
+
+    def __len__(self):
+        return len(self.usernames)
+
+    def __contains__(self, username):
+        return username.lower() in self._user_index
+
+    def row_index(self, username):
+        return self._user_index.get(username.lower())
+
+    def column_index(self, assignment_id):
+        return self._column_index.get(assignment_id)
+
+    def cell(self, row, col):
+        """
+        Return the cell at the given row and column indexes, or None
+        if there is no grade there.
+        """
+        rows = self.rows[col]
+        idx = bisect_left(rows, row)
+        if idx >= len(rows) or rows[idx] != row:
+            return None
+        return self._cell(col, idx)
+
+    def _cell(self, col, idx):
+        return GradeMatrixCell(self.values[col][idx],
+                               self.numbers[col][idx],
+                               bool(self.flags[col][idx] & EXCUSED),
+                               self.last_modified[col][idx])
+
+    def get(self, username, assignment_id):
+        row = self.row_index(username)
+        col = self.column_index(assignment_id)
+        if row is None or col is None:
+            return None
+        return self.cell(row, col)
+
+    def row(self, username):
+        """
+        Return an iterable of (column, cell) for the user's grades.
+        """
+        row = self.row_index(username)
+        if row is None:
+            return
+        for col, column in enumerate(self.columns):
+            cell = self.cell(row, col)
+            if cell is not None:
+                yield column, cell
+
+    def iter_column(self, col):
+        """
+        Return an iterable of (username, cell) for the grades in the
+        column at the given index.
+        """
+        for idx, row in enumerate(self.rows[col]):
+            yield self.usernames[row], self._cell(col, idx)
+
+    def column(self, assignment_id):
+        col = self.column_index(assignment_id)
+        if col is None:
+            return ()
+        return self.iter_column(col)
+
+    def numeric_column(self, assignment_id):
+        """
+        Return an array with the numeric values of the column, one per
+        row (``NaN`` where there is no numeric grade).
+        """
+        col = self.column_index(assignment_id)
+        if col is None:
+            return array('d')
+        result = array('d', [NAN]) * len(self.usernames)
+        for row, number in zip(self.rows[col], self.numbers[col]):
+            result[row] = number
+        return result
+
+
+def _matrix_size(matrix):
+    return matrix.estimated_size
+
+
+_matrix_cache = ValidatedLRUCache(MATRIX_CACHE_BYTES, _matrix_size)
+
+
+def get_grade_matrix(context):
+    """
+    Return the (possibly cached) :class:`GradeMatrix` of the gradebook
+    for the given context. Cached matrices are validated against the
+    book change stamp, which the grade and entry subscribers bump.
+    """
+    book = IGradeBook(context)
+    key = book.NTIID
+    validator = book.change_stamp
+    # Only committed states are cached
+    cacheable = bool(key) and validator is not None
+    result = _matrix_cache.query(key, validator) if cacheable else None
+    if result is None:
+        result = GradeMatrix.build(book)
+        if cacheable:
+            _matrix_cache.store(key, validator, result)
+    return result
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Grade value normalization.
+
+Grade values are numbers or, more often, strings sent by the webapp:
+``"75 -"`` when the instructor typed a number, ``"90 A"`` or ``"A-"``
+otherwise. Each value is parsed once into a :class:`NormalizedGrade`.
+
+.. $Id$
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+from array import array
+
+from collections import namedtuple
+from collections import OrderedDict
+
+from six import string_types
+from six import integer_types
+
+from nti.app.products.gradebook.interfaces import IExcusedGrade
+
+#: Grade value statuses
+GRADE_BLANK = 0
+GRADE_NUMERIC = 1
+GRADE_LETTER = 2
+GRADE_EXCUSED = 3
+GRADE_INVALID = 4
+
+#: How many parsed grade strings we keep around per process
+NORMALIZED_CACHE_SIZE = 10000
+
+NAN = float('nan')
+
+logger = __import__('logging').getLogger(__name__)
+
+
+# The status of a grade value, its leading number (if any) and the
+# text that follows it (all of it without a number), e.g. (GRADE_NUMERIC, 75.0, u'-') for "75 -"
+# and (GRADE_LETTER, 90.0, u'A') for "90 A".
+NormalizedGrade = namedtuple('NormalizedGrade',
+                             ('status', 'number', 'suffix'))
+
+# The numbers (NaN unless numeric) and statuses of a sequence of grades
+NormalizedGrades = namedtuple('NormalizedGrades',
+                              ('numbers', 'statuses'))
+
+BLANK = NormalizedGrade(GRADE_BLANK, None, u'')
+INVALID = NormalizedGrade(GRADE_INVALID, None, u'')
+EXCUSED = NormalizedGrade(GRADE_EXCUSED, None, u'')
+
+
+def _to_float(text):
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def _parse(text):
+    # Numbers are what numeric_grade_val always accepted: a float,
+    # or a float followed by " -" (what the webapp sends)
+    tokens = text.split()
+    if not tokens:
+        return BLANK
+    if text.endswith(' -'):
+        number = _to_float(tokens[0])
+        suffix = u'-'
+    else:
+        number = _to_float(text)
+        suffix = u''
+    if number is not None:
+        return NormalizedGrade(GRADE_NUMERIC, number, suffix)
+    number = _to_float(tokens[0])
+    if number is not None:
+        # "90 A"
+        return NormalizedGrade(GRADE_LETTER, number, u' '.join(tokens[1:]))
+    if tokens[0][0].isalpha():
+        return NormalizedGrade(GRADE_LETTER, None, text.strip())
+    return INVALID
+
+
+# Not a utils.cache.LRUCache: grades (imported by the utils package)
+# depend on this module. Evicted in insertion order, most values
+# are the same few strings.
+_parsed = OrderedDict()
+
+
+def normalize_grade_value(value):
+    """
+    Return the :class:`NormalizedGrade` of the given grade value.
+    """
+    if value is None:
+        return BLANK
+    if isinstance(value, (integer_types, float)):
+        return NormalizedGrade(GRADE_NUMERIC, value, u'')
+    if not isinstance(value, string_types):
+        return INVALID
+    try:
+        return _parsed[value]
+    except KeyError:
+        pass
+    result = _parse(value)
+    _parsed[value] = result
+    while len(_parsed) > NORMALIZED_CACHE_SIZE:
+        try:
+            _parsed.popitem(last=False)
+        except KeyError:  # emptied by another thread
+            break
+    return result
+
+
+def grade_normalized_value(grade):
+    """
+    Return the :class:`NormalizedGrade` of the value of the given grade
+    object (ignoring whether it is excused), kept on the grade when it
+    can be.
+    """
+    if grade is None:
+        return BLANK
+    try:
+        return grade.normalized_value
+    except AttributeError:
+        return normalize_grade_value(getattr(grade, 'value', None))
+
+
+def normalize_grade(grade):
+    """
+    Return the :class:`NormalizedGrade` of the given grade object.
+    """
+    if grade is None:
+        return BLANK
+    if IExcusedGrade.providedBy(grade):
+        return EXCUSED
+    return grade_normalized_value(grade)
+
+
+def _normalize_all(items, normalize):
+    numbers = array('d')
+    statuses = bytearray()
+    for item in items:
+        normalized = normalize(item)
+        status = normalized.status
+        numbers.append(normalized.number if status == GRADE_NUMERIC else NAN)
+        statuses.append(status)
+    return NormalizedGrades(numbers, statuses)
+
+
+def normalize_grade_values(values):
+    """
+    Normalize the given grade values in a single pass, returning
+    their numbers (NaN unless numeric) and statuses.
+    """
+    return _normalize_all(values, normalize_grade_value)
+
+
+def normalize_grades(grades, excused=True):
+    """
+    Normalize the given grade objects (or None) in a single pass,
+    returning their numbers (NaN unless numeric) and statuses. Pass
+    ``excused=False`` to normalize the values of excused grades too.
+    """
+    return _normalize_all(grades,
+                          normalize_grade if excused else grade_normalized_value)
+
+
+def grade_number(value):
+    """
+    Return the number of the given grade value if it is numeric,
+    otherwise None.
+    """
+    normalized = normalize_grade_value(value)
+    if normalized.status == GRADE_NUMERIC:
+        return normalized.number
+    return None
+
+
+def grade_parts(value):
+    """
+    Return the given grade value as a tuple of its leading number and
+    the words that follow it, e.g. ``(90.0, 'A')``, or ``(value,)``.
+    """
+    result = (value,)
+    if value and isinstance(value, string_types):
+        try:
+            values = value.split()
+            values[0] = float(values[0])
+            result = tuple(values)
+        except ValueError:
+            pass
+    return result
+
+
+def grade_numeric_value(grade):
+    """
+    Return the number of the value of the given grade object if it is
+    numeric, otherwise None.
+    """
+    normalized = grade_normalized_value(grade)
+    if normalized.status == GRADE_NUMERIC:
+        return normalized.number
+    return None
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Cached, presorted course rosters for cursor based paging.
+
+.. $Id$
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import json
+import base64
+import binascii
+
+import six
+
+from bisect import bisect_left
+from bisect import bisect_right
+
+from nti.app.products.gradebook.enrollments import get_enrollment_scopes
+
+from nti.app.products.gradebook.gradebook import gradebook_for_course
+
+from nti.app.products.gradebook.utils.cache import ValidatedLRUCache
+
+from nti.app.products.gradebook.utils.names import get_user_name_keys
+from nti.app.products.gradebook.utils.names import get_sortable_last_name
+
+from nti.dataserver.users.users import User
+
+#: The roster sorts
+SORT_LAST_NAME = u'lastname'
+SORT_USERNAME = u'username'
+ROSTER_SORTS = (SORT_LAST_NAME, SORT_USERNAME)
+
+#: The roster enrollment scopes
+SCOPE_ALL = u'All'
+SCOPE_OPEN = u'Open'
+SCOPE_FOR_CREDIT = u'ForCredit'
+
+#: How many sorted rosters we keep around per process
+ROSTER_CACHE_SIZE = 200
+
+logger = __import__('logging').getLogger(__name__)
+
+
+def roster_sort_key(name_keys, sort_on):
+    """
+    Return the (lowercase) key the user with the given
+    :class:`.UserNameKeys` sorts by.
+    """
+    if sort_on == SORT_USERNAME:
+        value = name_keys.display_username
+    else:
+        value = get_sortable_last_name(name_keys)
+    return value.lower() if value else u''
+
+
+class SortedRoster(object):
+    """
+    The (sort key, username) rows of the students of a course scope,
+    in ascending order. Ties are broken by username.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def iter_after(self, after=None, descending=False):
+        """
+        Iterate the rows following the given (sort key, username) row,
+        or from the beginning.
+        """
+        rows = self.rows
+        if descending:
+            idx = bisect_left(rows, after) if after is not None else len(rows)
+            for i in range(idx - 1, -1, -1):
+                yield rows[i]
+        else:
+            idx = bisect_right(rows, after) if after is not None else 0
+            for i in range(idx, len(rows)):
+                yield rows[i]
+
+
+def build_sorted_roster(usernames, sort_on):
+    rows = []
+    for username in usernames:
+        user = User.get_user(username)
+        if user is None:
+            continue
+        key = roster_sort_key(get_user_name_keys(user), sort_on)
+        rows.append((key, username))
+    rows.sort()
+    return SortedRoster(rows)
+
+
+_roster_cache = ValidatedLRUCache(ROSTER_CACHE_SIZE)
+
+
+def _scope_usernames(scopes, scope_name):
+    # The scopes of the gradebook summaries
+    if scope_name == SCOPE_OPEN:
+        return scopes.sharing_open
+    elif scope_name == SCOPE_ALL:
+        return scopes.sharing_all
+    return scopes.sharing_for_credit
+
+
+def _roster_key(course, scope_name, sort_on):
+    book = gradebook_for_course(course, False)
+    return (getattr(book, 'NTIID', None), scope_name, sort_on), book
+
+
+def get_sorted_roster(course, scope_name, sort_on):
+    """
+    Return the (possibly cached) :class:`SortedRoster` of the students
+    of the given course enrollment scope. Cached rosters are validated
+    like the enrollment scopes and by the book name stamp; callers
+    that still see a stale name drop the roster through
+    :func:`invalidate_sorted_roster`.
+    """
+    scopes = get_enrollment_scopes(course)
+    key, book = _roster_key(course, scope_name, sort_on)
+    stamp = getattr(book, 'enrollment_stamp', None)
+    name_stamp = getattr(book, 'name_stamp', None)
+    # Only committed states are cached
+    cacheable = bool(key[0]) and None not in (stamp, name_stamp)
+    validator = (stamp, name_stamp, scopes.instructors)
+    result = _roster_cache.query(key, validator) if cacheable else None
+    if result is None:
+        result = build_sorted_roster(_scope_usernames(scopes, scope_name),
+                                     sort_on)
+        if cacheable:
+            _roster_cache.store(key, validator, result)
+    return result
+
+
+def invalidate_sorted_roster(course, scope_name, sort_on):
+    key, _ = _roster_key(course, scope_name, sort_on)
+    _roster_cache.pop(key)
+
+
+def encode_roster_cursor(sort_on, row):
+    """
+    Return an opaque cursor for the rows following the given one.
+    """
+    data = json.dumps([sort_on, row[0], row[1]])
+    return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+
+
+def decode_roster_cursor(cursor, sort_on):
+    """
+    Return the (sort key, username) row of the given cursor, raising
+    a :class:`ValueError` if it is not valid for the given sort.
+    """
+    try:
+        data = base64.urlsafe_b64decode(str(cursor))
+        cursor_sort, key, username = json.loads(data.decode('utf-8'))
+    except (TypeError, ValueError, UnicodeError, binascii.Error):
+        raise ValueError("Invalid cursor", cursor)
+    if cursor_sort != sort_on:
+        raise ValueError("Cursor for another sort", cursor)
+    # The roster sorts all key on text
+    if      not isinstance(key, six.string_types) \
+        or not isinstance(username, six.string_types):
+        raise ValueError("Invalid cursor row", cursor)
+    return (key, username)
@@ -12,19 +12,25 @@ logger = __import__('logging').getLogger(__name__)
 import os
 import sys
 import argparse
+import multiprocessing
 
 from zope import component
 
 from nti.app.assessment.interfaces import IUsersCourseAssignmentHistories
 
+from nti.app.products.gradebook.coalescing import coalesced_grade_events
+
 from nti.app.products.gradebook.utils import set_grade_by_assignment_history_item
 
 from nti.assessment.interfaces import IQAssignment
 
 from nti.contenttypes.courses.interfaces import ICourseInstance
+from nti.contenttypes.courses.interfaces import ICourseAssignmentCatalog
 
 from nti.contenttypes.courses.legacy_catalog import ILegacyCourseInstance
 
+from nti.dataserver.interfaces import IDataserverTransactionRunner
+
 from nti.dataserver.utils import run_with_dataserver
 
 from nti.dataserver.utils.base_script import set_site
@@ -48,24 +54,144 @@ def get_assignment(ntiid):
     return result
 
 
-def _process_args(args):
+#: How many times a chunk is retried on conflicts
+CHUNK_RETRIES = 3
+
+#: The ZCML packages the dataserver is configured with
+CONF_PACKAGES = ('nti.appserver',)
+
+
+class Checkpoint(object):
+    """
+    Append-only record of the users whose submissions have been
+    regraded (and committed) by a run. Each process of a run writes its
+    own file, named after the checkpoint path, and a rerun of the same
+    course and assignment(s) skips the users recorded in any of them.
+    """
+
+    def __init__(self, path, identity):
+        self.path = path
+        self.identity = identity
+        self.done = set()
+        for name in self.files():
+            with open(name) as fp:
+                header = fp.readline().strip()
+                if header != identity:
+                    raise ValueError("Checkpoint belongs to another run", name)
+                self.done.update(x.strip() for x in fp if x.strip())
+
+    def files(self):
+        dirname, basename = os.path.split(os.path.abspath(self.path))
+        prefix = basename + '.'
+        for name in sorted(os.listdir(dirname)):
+            if name == basename \
+                    or (name.startswith(prefix) and name[len(prefix):].isdigit()):
+                yield os.path.join(dirname, name)
+
+    def record(self, usernames, index=None):
+        name = self.path if index is None else '%s.%s' % (self.path, index)
+        exists = os.path.exists(name)
+        with open(name, 'a') as fp:
+            if not exists:
+                fp.write(self.identity + '\n')
+            for username in usernames:
+                fp.write(username + '\n')
+            fp.flush()
+            os.fsync(fp.fileno())
+        self.done.update(usernames)
+
+    def remove(self):
+        for name in list(self.files()):
+            os.remove(name)
+
+
+def _checkpoint_identity(args):
+    assignment = '*' if args.all_assignments else args.assignment
+    return '# %s %s' % (args.course, assignment)
+
+
+def _iter_chunks(iterable, size):
+    chunk = []
+    for x in iterable:
+        chunk.append(x)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _get_assignments(args):
     set_site(args.site)
     course = get_course(args.course)
-    _ = get_assignment(args.assignment)
-    histories = IUsersCourseAssignmentHistories(course)
+    if args.all_assignments:
+        catalog = ICourseAssignmentCatalog(course)
+        # pylint: disable=too-many-function-args
+        assignments = [x.ntiid for x in catalog.iter_assignments(True)]
+    else:
+        _ = get_assignment(args.assignment)
+        assignments = [args.assignment]
+    return course, assignments
+
+
+def _get_users(args, index=None, workers=1):
+    course, _ = _get_assignments(args)
     if not args.users:
-        users = list(histories.keys())
+        histories = IUsersCourseAssignmentHistories(course)
+        users = sorted(histories.keys())
     else:
-        users = set(args.users)
+        users = sorted(set(args.users))
+    return users[index or 0::workers]
+
+
+def _process_args(args, index=None, workers=1):
+    """
+    Regrade the submissions of the users in the given share (every
+    ``workers``-th user starting at ``index``), each chunk in its own
+    transaction.
+    """
+    runner = component.getUtility(IDataserverTransactionRunner)
+    users = runner(lambda: _get_users(args, index, workers))
+
+    checkpoint = None
+    if args.checkpoint:
+        checkpoint = Checkpoint(args.checkpoint, _checkpoint_identity(args))
+        users = [x for x in users if x not in checkpoint.done]
 
     if not users:
         logger.warn("No submissions in course")
 
+    count = processed = 0
+    for chunk in _iter_chunks(users, args.chunk_size):
+        count += runner(lambda chunk=chunk: _grade_chunk(chunk, args),
+                        retries=CHUNK_RETRIES)
+        if checkpoint is not None:
+            checkpoint.record(chunk, index)
+        processed += len(chunk)
+        logger.info("%s/%s user(s) processed", processed, len(users))
+    logger.info("%s grade(s) updated", count)
+
+
+def _grade_chunk(users, args):
+    """
+    Regrade the given users submissions. This runs as a transaction
+    job, committed (or retried on conflicts) by the runner.
+    """
+    count = 0
+    course, assignments = _get_assignments(args)
+    histories = IUsersCourseAssignmentHistories(course)
+    with coalesced_grade_events():
+        for assignmentId in assignments:
+            count += _grade_submissions(histories, users,
+                                        assignmentId, args)
+    return count
+
+
+def _grade_submissions(histories, users, assignmentId, args):
     count = 0
-    assignmentId = args.assignment
     for username in users:
-        history = histories[username]
-        if assignmentId not in history:
+        history = histories.get(username)
+        if history is None or assignmentId not in history:
             continue
         submission_container = history[assignmentId]
         # These are ordered
@@ -88,8 +214,18 @@ def _process_args(args):
                     logger.info("Setting grade for user %s to %s",
                                 username,
                                 grade.value)
+    return count
 
-    logger.info("%s grade(s) updated", count)
+
+def _run(env_dir, args, index=None, workers=1):
+    context = create_context(env_dir, with_library=True)
+    run_with_dataserver(environment_dir=env_dir,
+                        verbose=args.verbose,
+                        xmlconfig_packages=CONF_PACKAGES,
+                        context=context,
+                        minimal_ds=True,
+                        use_transaction_runner=False,
+                        function=lambda: _process_args(args, index, workers))
 
 
 def main():
@@ -122,6 +258,27 @@ def main():
                             default=(),
                             help="The usernames")
 
+    arg_parser.add_argument('--all-assignments',
+                            help="Grade all course assignments",
+                            action='store_true',
+                            dest='all_assignments')
+
+    arg_parser.add_argument('--chunk-size',
+                            dest='chunk_size',
+                            type=int,
+                            default=100,
+                            help="Number of users graded per transaction")
+
+    arg_parser.add_argument('--checkpoint',
+                            dest='checkpoint',
+                            help="Checkpoint file used to resume the run")
+
+    arg_parser.add_argument('-w', '--workers',
+                            dest='workers',
+                            type=int,
+                            default=0,
+                            help="Number of grading processes")
+
     args = arg_parser.parse_args()
     env_dir = os.getenv('DATASERVER_DIR')
     if not env_dir or not os.path.exists(env_dir) and not os.path.isdir(env_dir):
@@ -133,18 +290,32 @@ def main():
     if not args.course:
         raise ValueError("Course not specified")
 
-    if not args.assignment:
+    if not args.assignment and not args.all_assignments:
         raise ValueError("Assignment not specified")
 
-    conf_packages = ('nti.appserver',)
-    context = create_context(env_dir, with_library=True)
+    if args.chunk_size < 1:
+        raise ValueError("Invalid chunk size")
+
+    if args.workers > 1:
+        # each process opens its own dataserver and grades its share
+        processes = []
+        for index in range(args.workers):
+            process = multiprocessing.Process(target=_run,
+                                              args=(env_dir, args,
+                                                    index, args.workers))
+            process.start()
+            processes.append(process)
+        for process in processes:
+            process.join()
+        if any(process.exitcode for process in processes):
+            logger.error("Not all users were graded, rerun to resume")
+            sys.exit(1)
+    else:
+        _run(env_dir, args)
 
-    run_with_dataserver(environment_dir=env_dir,
-                        verbose=args.verbose,
-                        xmlconfig_packages=conf_packages,
-                        context=context,
-                        minimal_ds=True,
-                        function=lambda: _process_args(args))
+    if args.checkpoint:
+        # done, a new run starts over
+        Checkpoint(args.checkpoint, _checkpoint_identity(args)).remove()
     sys.exit(0)
 
 
@@ -0,0 +1,29 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Validators of the committed state of persistent objects, used by
+the process-local caches.
+
+This module has no gradebook dependencies so that any module can
+use it.
+
+.. $Id$
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+logger = __import__('logging').getLogger(__name__)
+
+
+def committed_stamp(obj):
+    """
+    Return a value identifying the committed state of the given
+    object, or None if it has uncommitted changes (or is not
+    persistent).
+    """
+    # pylint: disable=protected-access
+    if getattr(obj, '_p_jar', None) is None or obj._p_changed:
+        return None
+    return (getattr(obj, 'lastModified', None), obj._p_serial)
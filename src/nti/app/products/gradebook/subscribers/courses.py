@@ -64,3 +64,12 @@ def _on_course_instance_removed(course, unused_event=True):
     book = gradebook_for_course(course, False)
     if book is not None:
         book.clear()
+
+
+# Registered in ZCML for added, modified and removed records
+def _record_enrollment_change(record, unused_event=None):
+    # Invalidates the cached enrollment scopes of the course
+    course = record.CourseInstance
+    book = gradebook_for_course(course, False) if course is not None else None
+    if book is not None:
+        book.record_enrollment_change()
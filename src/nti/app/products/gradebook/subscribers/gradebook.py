@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*
+"""
+.. $Id$
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+from zope import component
+
+from zope.container.interfaces import IContainerModifiedEvent
+
+from zope.lifecycleevent.interfaces import IObjectMovedEvent
+from zope.lifecycleevent.interfaces import IObjectModifiedEvent
+
+from nti.app.products.gradebook.interfaces import IGradeBook
+from nti.app.products.gradebook.interfaces import IGradeBookPart
+from nti.app.products.gradebook.interfaces import IGradeBookEntry
+
+logger = __import__('logging').getLogger(__name__)
+
+
+def _book_for_part(part):
+    book = getattr(part, '__parent__', None)
+    return book if IGradeBook.providedBy(book) else None
+
+
+def _book_for_entry_parent(parent):
+    if IGradeBookPart.providedBy(parent):
+        return _book_for_part(parent)
+    return None
+
+
+@component.adapter(IGradeBookEntry, IObjectMovedEvent)
+def _on_gradebook_entry_moved(entry, event):
+    # Added, removed and moved events all land here
+    old_book = _book_for_entry_parent(event.oldParent)
+    if old_book is not None:
+        old_book.unindex_entry(entry)
+        old_book.record_change()
+    new_book = _book_for_entry_parent(event.newParent)
+    if new_book is not None:
+        new_book.index_entry(entry)
+        if new_book is not old_book:
+            new_book.record_change()
+
+
+@component.adapter(IGradeBookPart, IObjectMovedEvent)
+def _on_gradebook_part_moved(part, event):
+    old_book = event.oldParent
+    if IGradeBook.providedBy(old_book):
+        for entry in part.values():
+            old_book.unindex_entry(entry)
+        old_book.record_change()
+    new_book = event.newParent
+    if IGradeBook.providedBy(new_book):
+        for entry in part.values():
+            new_book.index_entry(entry)
+        if new_book is not old_book:
+            new_book.record_change()
+
+
+@component.adapter(IGradeBookEntry, IObjectModifiedEvent)
+def _on_gradebook_entry_modified(entry, event):
+    # Grades added to or removed from the entry do not change
+    # its assignment
+    if IContainerModifiedEvent.providedBy(event):
+        return
+    book = _book_for_entry_parent(getattr(entry, '__parent__', None))
+    if book is not None:
+        book.reindex_entry(entry)
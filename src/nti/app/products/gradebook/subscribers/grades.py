@@ -25,7 +25,10 @@ from zope.lifecycleevent.interfaces import IObjectModifiedEvent
 
 from zope.security.management import queryInteraction
 
+from nti.app.products.gradebook.coalescing import queue_grade_action
+
 from nti.app.products.gradebook.interfaces import IGrade
+from nti.app.products.gradebook.interfaces import IGradeBook
 from nti.app.products.gradebook.interfaces import IGradeRemovedEvent
 from nti.app.products.gradebook.interfaces import IGradeChangeContainer
 
@@ -45,6 +48,8 @@ from nti.dataserver.users.users import User
 
 from nti.ntiids.ntiids import find_object_with_ntiid
 
+from nti.traversal.traversal import find_interface
+
 _CHANGE_KEY = 'nti.app.products.gradebook.subscribers.ENTRY_CHANGE_KEY'
 
 logger = __import__('logging').getLogger(__name__)
@@ -110,12 +115,23 @@ def _do_store_grade_created_event(grade, _):
     return change
 
 
+def _store_queued_grade_change(grade, entry, event):
+    # The grade may have been removed or replaced meanwhile
+    if      entry is not None \
+        and entry.get(grade.Username) is grade \
+        and grade.value is not None:
+        _do_store_grade_created_event(grade, event)
+
+
 @component.adapter(IGrade, IObjectAddedEvent)
 @component.adapter(IGrade, IObjectModifiedEvent)
 def _store_grade_created_event(grade, event):
     # We're registered for both added and modified events,
     # and we only store a change when the grade actually
     # gets a value for the first time.
+    if queue_grade_action('change', grade.Username, grade.AssignmentId,
+                          _store_queued_grade_change, grade, grade.__parent__, event):
+        return
     if grade.value is not None:
         _do_store_grade_created_event(grade, event)
 
@@ -129,6 +145,19 @@ def _remove_grade_event(grade, unused_event=None):
         pass
 
 
+def _notify_progress_removed(assignment_ntiid, user, course):
+    assignment = find_object_with_ntiid(assignment_ntiid)
+    notify(UserProgressRemovedEvent(assignment,
+                                    user,
+                                    course))
+
+
+def _update_progress(assignment_ntiid, user, course):
+    if not queue_grade_action('progress', user.username, assignment_ntiid,
+                              _notify_progress_removed, assignment_ntiid, user, course):
+        _notify_progress_removed(assignment_ntiid, user, course)
+
+
 @component.adapter(IGrade, IObjectAddedEvent)
 @component.adapter(IGrade, IObjectModifiedEvent)
 def update_grade_progress(grade, unused_event=None):
@@ -138,13 +167,10 @@ def update_grade_progress(grade, unused_event=None):
     # Tests
     if user is None:
         return
-    assignment = find_object_with_ntiid(grade.AssignmentId)
     course = ICourseInstance(grade)
     # Do the removed event since we want to recalculate progress
     # after this step.
-    notify(UserProgressRemovedEvent(assignment,
-                                    user,
-                                    course))
+    _update_progress(grade.AssignmentId, user, course)
 
 
 @component.adapter(IGrade, IGradeRemovedEvent)
@@ -155,8 +181,45 @@ def _on_grade_removed(unused_grade, event):
     # Tests
     if event.user is None:
         return
-    assignment = find_object_with_ntiid(event.assignment_ntiid)
-    notify(UserProgressRemovedEvent(assignment,
-                                    event.user,
-                                    event.course))
+    _update_progress(event.assignment_ntiid, event.user, event.course)
+
 
+@component.adapter(IGrade, IObjectAddedEvent)
+def _index_added_grade(grade, event):
+    entry = event.newParent
+    book = find_interface(entry, IGradeBook, strict=False)
+    if book is not None:
+        book.index_grade(event.newName or grade.Username, entry)
+
+
+@component.adapter(IGrade, IObjectRemovedEvent)
+def _unindex_removed_grade(grade, event):
+    entry = event.oldParent
+    book = find_interface(entry, IGradeBook, strict=False)
+    if book is not None:
+        book.unindex_grade(event.oldName or grade.Username, entry)
+
+
+# Registered in ZCML for added, modified and removed grades
+def _record_grade_change(grade, event=None):
+    # Invalidates the non-persistent snapshots (e.g. the grade
+    # matrix and the predicted grades) of the book
+    book = find_interface(grade, IGradeBook, strict=False)
+    if book is None and IObjectRemovedEvent.providedBy(event):
+        book = find_interface(event.oldParent, IGradeBook, strict=False)
+    if book is not None:
+        username = getattr(event, 'oldName', None) or grade.Username
+        book.record_change(username)
+
+
+# Registered in ZCML for added, modified and removed grades
+def _update_ungraded_index(grade, event):
+    if IObjectRemovedEvent.providedBy(event):
+        entry, username = event.oldParent, event.oldName
+    elif IObjectAddedEvent.providedBy(event):
+        entry, username = event.newParent, event.newName
+    else:
+        entry, username = grade.__parent__, grade.Username
+    book = find_interface(entry, IGradeBook, strict=False)
+    if book is not None and username:
+        book.update_ungraded(username, entry.assignmentId)
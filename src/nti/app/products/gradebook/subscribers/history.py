@@ -10,17 +10,26 @@ from __future__ import absolute_import
 
 from zope import component
 
+from zope.intid.interfaces import IIntIdAddedEvent
+
 from zope.lifecycleevent.interfaces import IObjectAddedEvent
 from zope.lifecycleevent.interfaces import IObjectRemovedEvent
 from zope.lifecycleevent.interfaces import IObjectModifiedEvent
 
 from nti.app.assessment.interfaces import IObjectRegradeEvent
 from nti.app.assessment.interfaces import IUsersCourseAssignmentHistoryItem
+from nti.app.assessment.interfaces import IUsersCourseAssignmentHistoryItemFeedback
 
 from nti.app.assessment.common.history import get_most_recent_history_item
 
 from nti.app.products.gradebook.autograde_policies import find_autograde_policy
 
+from nti.app.products.gradebook.coalescing import queue_grade_action
+
+from nti.app.products.gradebook.gradebook import gradebook_for_course
+
+from nti.app.products.gradebook.index import reindex_grade_submission
+
 from nti.app.products.gradebook.interfaces import IGrade
 
 from nti.app.products.gradebook.utils.gradebook import find_entry_for_item
@@ -33,6 +42,8 @@ from nti.dataserver.interfaces import IUser
 
 from nti.dataserver.users.users import User
 
+from nti.traversal.traversal import find_interface
+
 logger = __import__('logging').getLogger(__name__)
 
 
@@ -46,6 +57,12 @@ def _grade_modified(grade, unused_event=None):
     if entry is None or not entry.AssignmentId:
         # not yet
         return
+    if not queue_grade_action('history', grade.username, entry.AssignmentId,
+                              _update_history_item, grade, entry):
+        _update_history_item(grade, entry)
+
+
+def _update_history_item(grade, entry):
     user = User.get_user(grade.username)
     if user is None:
         return
@@ -88,3 +105,71 @@ def _regrade_assignment_history_item(item, unused_event=None):
     policy = find_autograde_policy(course, assignmentId)
     if policy is not None:
         set_grade_by_assignment_history_item(item)
+
+
+def _book_and_username_for_item(item):
+    course = ICourseInstance(item, None)
+    user = IUser(item, None)
+    if course is None or user is None:
+        return None, None
+    return gradebook_for_course(course, False), user.username
+
+
+@component.adapter(IUsersCourseAssignmentHistoryItem, IObjectAddedEvent)
+def _index_assignment_history_item_added(item, unused_event=None):
+    book, username = _book_and_username_for_item(item)
+    if book is not None:
+        book.record_submission_change()
+        book.index_submission(username, item.assignmentId)
+    _reindex_item_grade(item)
+
+
+@component.adapter(IUsersCourseAssignmentHistoryItem, IObjectRemovedEvent)
+def _unindex_assignment_history_item_removed(item, event):
+    book, username = _book_and_username_for_item(item)
+    if book is None:
+        return
+    book.record_submission_change()
+    if event.oldParent:
+        # Still has other submissions
+        return
+    book.unindex_submission(username, item.assignmentId)
+
+
+def _record_item_feedback_change(item):
+    book, _ = _book_and_username_for_item(item)
+    if book is not None:
+        book.record_submission_change()
+
+
+def _reindex_item_grade(item):
+    entry = find_entry_for_item(item)
+    user = IUser(item, None)
+    if entry is None or user is None:
+        return
+    grade = entry.get(user.username)
+    if grade is not None:
+        reindex_grade_submission(grade, item)
+
+
+@component.adapter(IGrade, IIntIdAddedEvent)
+def _index_grade_submission(grade, unused_event=None):
+    reindex_grade_submission(grade)
+
+
+@component.adapter(IUsersCourseAssignmentHistoryItemFeedback, IObjectAddedEvent)
+def _feedback_added(feedback, unused_event=None):
+    item = find_interface(feedback, IUsersCourseAssignmentHistoryItem,
+                          strict=False)
+    if item is not None:
+        _record_item_feedback_change(item)
+        _reindex_item_grade(item)
+
+
+@component.adapter(IUsersCourseAssignmentHistoryItemFeedback, IObjectRemovedEvent)
+def _feedback_removed(feedback, event):
+    item = find_interface(event.oldParent, IUsersCourseAssignmentHistoryItem,
+                          strict=False)
+    if item is not None:
+        _record_item_feedback_change(item)
+        _reindex_item_grade(item)
@@ -12,6 +12,10 @@ from zope import component
 
 from zope.intid.interfaces import IIntIds
 
+from zope.lifecycleevent.interfaces import IObjectModifiedEvent
+
+from nti.app.products.gradebook.gradebook import gradebook_for_course
+
 from nti.app.products.gradebook.index import IX_STUDENT
 from nti.app.products.gradebook.index import get_grade_catalog
 
@@ -68,3 +72,17 @@ def _on_user_will_be_removed(user, unused_event=None):
     logger.info("Removing gradebook data for user %s", user)
     unindex_grade_data(user.username)
     delete_user_data(user=user)
+
+
+@component.adapter(IUser, IObjectModifiedEvent)
+def _on_user_modified(user, unused_event=None):
+    # Realname and alias changes reorder the rosters (and change the
+    # summaries) of the courses of the user
+    catalog = get_enrollment_catalog()
+    intids = component.getUtility(IIntIds)
+    query = {IX_USERNAME: {'any_of': (user.username,)}}
+    for uid in catalog.apply(query) or ():
+        course = ICourseInstance(intids.queryObject(uid), None)
+        book = gradebook_for_course(course, False) if course is not None else None
+        if book is not None:
+            book.record_name_change()
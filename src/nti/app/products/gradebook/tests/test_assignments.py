@@ -760,6 +760,26 @@ class TestAssignments(ApplicationLayerTest):
         assert_that([x[0] for x in sum_res.json_body['Items']],
                     is_(['aaa@nextthought.com', 'sjohnson@nextthought.com']))
 
+        # Paged, these are index-ordered scans
+        for sort_on, sort_order, batch_start, expected in (
+                ('dateSubmitted', 'descending', 0, 'aaa@nextthought.com'),
+                ('dateSubmitted', 'descending', 1, 'sjohnson@nextthought.com'),
+                ('dateSubmitted', 'ascending', 0, 'sjohnson@nextthought.com'),
+                ('feedbackCount', 'ascending', 0, 'aaa@nextthought.com'),
+                ('feedbackCount', 'ascending', 1, 'sjohnson@nextthought.com'),
+                ('feedbackCount', 'descending', 0, 'sjohnson@nextthought.com')):
+            sum_res = self.testapp.get(sum_link,
+                                       {'filter': 'LegacyEnrollmentStatusOpen',
+                                        'sortOn': sort_on,
+                                        'sortOrder': sort_order,
+                                        'batchSize': 1,
+                                        'batchStart': batch_start},
+                                       extra_environ=instructor_environ)
+            assert_that(sum_res.json_body, has_entry('Items', has_length(1)))
+            assert_that([x[0] for x in sum_res.json_body['Items']],
+                        is_([expected]))
+            assert_that(sum_res.json_body['Items'][0][1], is_(not_none()))
+
         sum_res = self.testapp.get(sum_link,
                                    {'filter': 'LegacyEnrollmentStatusOpen',
                                     'sortOn': 'gradeValue'},
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+# pylint: disable=protected-access,too-many-public-methods
+
+from hamcrest import is_
+from hamcrest import assert_that
+from hamcrest import instance_of
+from hamcrest import same_instance
+from hamcrest import is_not as does_not
+
+import fudge
+
+import unittest
+
+from nti.app.products.gradebook.autograde_policies import PointBasedAutoGradePolicy
+from nti.app.products.gradebook.autograde_policies import find_autograde_policy
+
+from nti.app.products.gradebook.tests import SharedConfiguringTestLayer
+
+
+class _Course(object):
+    ntiid = u'tag:nextthought.com,2011-10:NTI-CourseInfo-Bleach'
+
+
+class _Policies(object):
+
+    _p_jar = object()
+    _p_changed = False
+    _p_serial = b'serial'
+    lastModified = 0
+
+    def __init__(self, policies):
+        self.policies = policies
+
+    def getPolicyForAssignment(self, assignmentId):
+        return self.policies.get(assignmentId)
+
+
+class TestAutogradePolicies(unittest.TestCase):
+
+    layer = SharedConfiguringTestLayer
+
+    def test_question_points(self):
+        policy = PointBasedAutoGradePolicy({'name': 'pointbased',
+                                            'total_points': 5,
+                                            'questions': {'q1': 3,
+                                                          'q2': 0,
+                                                          'default': 1}},
+                                           'a1')
+        assert_that(policy.question_points('q1'), is_(3))
+        assert_that(policy.question_points('q2'), is_(1))
+        assert_that(policy.question_points('q3'), is_(1))
+
+        policy = PointBasedAutoGradePolicy({'name': 'pointbased',
+                                            'q1': 2,
+                                            'default': 4},
+                                           'a1')
+        assert_that(policy.question_points('q1'), is_(2))
+        assert_that(policy.question_points('q3'), is_(4))
+
+    @fudge.patch('nti.app.products.gradebook.autograde_policies.IQAssignmentPolicies')
+    def test_cached_policies(self, mock_policies):
+        course = _Course()
+        policies = _Policies({'a1': {'auto_grade': {'name': 'pointbased',
+                                                    'total_points': 5}}})
+        mock_policies.is_callable().returns(policies)
+
+        policy = find_autograde_policy(course, 'a1')
+        assert_that(policy, instance_of(PointBasedAutoGradePolicy))
+        assert_that(find_autograde_policy(course, 'a1'), same_instance(policy))
+
+        # policy changes invalidate
+        policies._p_serial = b'serial2'
+        assert_that(find_autograde_policy(course, 'a1'),
+                    does_not(same_instance(policy)))
+
+        # uncommitted changes are not kept
+        policies._p_changed = True
+        assert_that(find_autograde_policy(course, 'a1'),
+                    does_not(same_instance(find_autograde_policy(course, 'a1'))))
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+# pylint: disable=protected-access,too-many-public-methods
+
+from hamcrest import is_
+from hamcrest import none
+from hamcrest import assert_that
+
+import unittest
+
+from nti.app.products.gradebook.utils.cache import LRUCache
+from nti.app.products.gradebook.utils.cache import ValidatedLRUCache
+
+
+class TestCache(unittest.TestCase):
+
+    def test_lru(self):
+        cache = LRUCache(2)
+        cache['ichigo'] = 1
+        cache['aizen'] = 2
+        assert_that(cache.get('ichigo'), is_(1))
+        cache['rukia'] = 3
+        # the least recently used goes
+        assert_that(cache.get('aizen'), is_(none()))
+        assert_that(len(cache), is_(2))
+
+    def test_weighed(self):
+        cache = ValidatedLRUCache(10, len)
+        cache.store('ichigo', 1, u'xxxx')
+        cache.store('aizen', 1, u'xxxx')
+        assert_that(cache.weight, is_(8))
+        cache.store('rukia', 1, u'xxxx')
+        assert_that(cache.query('ichigo', 1), is_(none()))
+        assert_that(cache.query('aizen', 1), is_(u'xxxx'))
+        assert_that(cache.weight, is_(8))
+
+        # too large to be cached at all
+        cache.store('renji', 1, u'x' * 11)
+        assert_that(cache.query('renji', 1), is_(none()))
+        assert_that(len(cache), is_(2))
+
+        cache.pop('aizen')
+        assert_that(cache.weight, is_(4))
+        cache.clear()
+        assert_that(cache.weight, is_(0))
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+# pylint: disable=protected-access,too-many-public-methods
+
+from hamcrest import is_
+from hamcrest import none
+from hamcrest import not_none
+from hamcrest import assert_that
+
+import unittest
+
+from nti.app.products.gradebook.coalescing import queue_grade_action
+from nti.app.products.gradebook.coalescing import coalesced_grade_events
+from nti.app.products.gradebook.coalescing import current_grade_event_queue
+
+
+class TestCoalescing(unittest.TestCase):
+
+    def test_coalesced_grade_events(self):
+        calls = []
+        assert_that(queue_grade_action('progress', u'Ichigo', u'one',
+                                       calls.append, 0),
+                    is_(False))
+        assert_that(current_grade_event_queue(), is_(none()))
+
+        with coalesced_grade_events() as queue:
+            assert_that(current_grade_event_queue(), is_(not_none()))
+            for value in (1, 2):
+                assert_that(queue_grade_action('progress', u'Ichigo', u'one',
+                                               calls.append, value),
+                            is_(True))
+            queue_grade_action('progress', u'ichigo', u'two', calls.append, 3)
+            # nested blocks join the outer one
+            with coalesced_grade_events() as inner:
+                assert_that(inner, is_(queue))
+                queue_grade_action('change', u'ichigo', u'one', calls.append, 4)
+            assert_that(calls, is_([]))
+            assert_that(len(queue), is_(3))
+
+        # The last queued action of each key, in first queued order
+        assert_that(calls, is_([2, 3, 4]))
+        assert_that(current_grade_event_queue(), is_(none()))
+
+        try:
+            with coalesced_grade_events():
+                queue_grade_action('progress', u'ichigo', u'one', calls.append, 5)
+                raise ValueError()
+        except ValueError:
+            pass
+        assert_that(calls, is_([2, 3, 4]))
+        assert_that(current_grade_event_queue(), is_(none()))
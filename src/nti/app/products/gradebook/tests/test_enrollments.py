@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+# pylint: disable=protected-access,too-many-public-methods
+
+from hamcrest import is_
+from hamcrest import assert_that
+from hamcrest import same_instance
+from hamcrest import is_not as does_not
+
+import fudge
+
+import unittest
+
+from nti.app.products.gradebook.enrollments import get_enrollment_scopes
+
+from nti.app.products.gradebook.tests import SharedConfiguringTestLayer
+
+from nti.contenttypes.courses.interfaces import ES_CREDIT
+from nti.contenttypes.courses.interfaces import ES_PUBLIC
+from nti.contenttypes.courses.interfaces import ES_CREDIT_DEGREE
+
+
+class _Principal(object):
+
+    def __init__(self, username):
+        self.id = self.username = username
+
+
+class _Record(object):
+
+    def __init__(self, username, scope):
+        self.Principal = _Principal(username) if username else None
+        self.Scope = scope
+
+
+class _Enrollments(object):
+
+    def __init__(self, records):
+        self.records = records
+
+    def iter_enrollments(self):
+        return iter(self.records)
+
+    def iter_principals(self):
+        return (x.Principal.id for x in self.records if x.Principal is not None)
+
+    def count_enrollments(self):
+        return len(self.records)
+
+    def count_legacy_forcredit_enrollments(self):
+        return len([x for x in self.records if x.Scope != ES_PUBLIC])
+
+
+class _Scope(object):
+
+    def __init__(self, usernames):
+        self.usernames = usernames
+
+    def iter_usernames(self):
+        return iter(self.usernames)
+
+
+class _Book(object):
+
+    NTIID = u'tag:nextthought.com,2011-10:course-gradebook'
+    enrollment_stamp = (1, b'serial')
+
+
+class _Course(object):
+
+    def __init__(self, instructors, credit_scope=()):
+        self.instructors = [_Principal(x) for x in instructors]
+        self.SharingScopes = {ES_CREDIT: _Scope(list(credit_scope))}
+
+
+class TestEnrollments(unittest.TestCase):
+
+    layer = SharedConfiguringTestLayer
+
+    @fudge.patch('nti.app.products.gradebook.enrollments.ICourseEnrollments',
+                 'nti.app.products.gradebook.enrollments.IEnumerableEntityContainer',
+                 'nti.app.products.gradebook.enrollments.gradebook_for_course')
+    def test_enrollment_scopes(self, mock_enrollments, mock_container, mock_book):
+        book = _Book()
+        # The sharing scope may disagree with the records
+        course = _Course([u'Harp4162'], (u'Ichigo', u'harp4162', u'aizen'))
+        enrollments = _Enrollments([_Record(u'Ichigo', ES_PUBLIC),
+                                    _Record(u'rukia', ES_CREDIT_DEGREE),
+                                    _Record(u'harp4162', ES_CREDIT_DEGREE),
+                                    _Record(None, ES_CREDIT_DEGREE)])
+        mock_enrollments.is_callable().returns(enrollments)
+        mock_container.is_callable().calls(lambda x: x)
+        mock_book.is_callable().returns(book)
+
+        scopes = get_enrollment_scopes(course)
+        assert_that(scopes.all, is_({u'ichigo', u'rukia'}))
+        assert_that(scopes.open, is_({u'ichigo'}))
+        assert_that(scopes.for_credit, is_({u'rukia'}))
+        assert_that(scopes.instructors, is_({u'harp4162'}))
+        assert_that(scopes.enrollment_count, is_(4))
+        assert_that(scopes.for_credit_enrollment_count, is_(3))
+        assert_that(scopes.sharing_all, is_({u'ichigo', u'rukia'}))
+        assert_that(scopes.sharing_open, is_({u'rukia'}))
+        assert_that(scopes.sharing_for_credit, is_({u'ichigo'}))
+
+        # cached
+        assert_that(get_enrollment_scopes(course), same_instance(scopes))
+
+        # enrollment changes invalidate
+        enrollments.records.append(_Record(u'orihime', ES_PUBLIC))
+        book.enrollment_stamp = (2, b'serial2')
+        new_scopes = get_enrollment_scopes(course)
+        assert_that(new_scopes, does_not(same_instance(scopes)))
+        assert_that(new_scopes.open, is_({u'ichigo', u'orihime'}))
+
+        # as do instructor changes
+        course.instructors.append(_Principal(u'orihime'))
+        new_scopes = get_enrollment_scopes(course)
+        assert_that(new_scopes.open, is_({u'ichigo'}))
+
+        # uncommitted changes are not cached
+        book.enrollment_stamp = None
+        assert_that(get_enrollment_scopes(course),
+                    does_not(same_instance(get_enrollment_scopes(course))))
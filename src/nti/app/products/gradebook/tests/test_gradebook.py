@@ -8,9 +8,11 @@ from __future__ import absolute_import
 # pylint: disable=protected-access,too-many-public-methods
 
 from hamcrest import is_
+from hamcrest import none
 from hamcrest import is_in
 from hamcrest import is_not
 from hamcrest import has_key
+from hamcrest import has_length
 from hamcrest import assert_that
 does_not = is_not
 
@@ -19,10 +21,17 @@ from nti.testing.matchers import verifiably_provides
 
 import unittest
 
+from zope.event import notify
+
+from zope.lifecycleevent import ObjectModifiedEvent
+
 from nti.app.products.gradebook.gradebook import GradeBook
 from nti.app.products.gradebook.gradebook import GradeBookPart
 from nti.app.products.gradebook.gradebook import GradeBookEntry
 
+from nti.app.products.gradebook.gradebook import _prefetch
+from nti.app.products.gradebook.gradebook import _iter_chunks
+
 from nti.app.products.gradebook.interfaces import IGradeBook
 from nti.app.products.gradebook.interfaces import IGradeBookPart
 from nti.app.products.gradebook.interfaces import IGradeBookEntry
@@ -93,3 +102,286 @@ class TestGradebook(unittest.TestCase):
         assert_that(entry, does_not(has_key('ichigo')))
         assert_that(list(part.iter_usernames()), is_([]))
         assert_that(list(book.iter_usernames()), is_([]))
+
+    def test_gradebook_delete_unevolved(self):
+        book = GradeBook()
+
+        part = GradeBookPart()
+        part.order = 1
+        part.displayName = u'part'
+        book['part'] = part
+
+        entry = GradeBookEntry()
+        entry.order = 1
+        entry.assignmentId = u'xzy'
+        entry.displayName = u'entry'
+        part['entry'] = entry
+        entry['ichigo'] = Grade()
+
+        # Books from before the indexes remove grades part by part
+        for name in ('_assignment_index', '_user_grade_index',
+                     '_user_submission_index', '_user_ungraded_index',
+                     '_assignment_submission_counts'):
+            setattr(book, name, None)
+
+        assert_that(book.remove_user(u'Ichigo'), is_(1))
+        assert_that(entry, does_not(has_key('ichigo')))
+        assert_that(list(book.iter_usernames()), is_([]))
+
+    def test_rebuild_indexes(self):
+        book = GradeBook()
+
+        part = GradeBookPart()
+        part.order = 1
+        part.displayName = u'part'
+        book['part'] = part
+
+        entry = GradeBookEntry()
+        entry.order = 1
+        entry.assignmentId = u'xzy'
+        entry.displayName = u'entry'
+        part['entry'] = entry
+        entry['Ichigo'] = Grade()
+
+        for name in ('_assignment_index', '_user_grade_index',
+                     '_user_submission_index', '_user_ungraded_index',
+                     '_assignment_submission_counts'):
+            setattr(book, name, None)
+
+        book.rebuild_indexes()
+        assert_that(book._assignment_index, has_key('xzy'))
+        assert_that(list(book._user_grade_index['ichigo']),
+                    is_([('part', 'entry')]))
+        # No course, no submissions
+        assert_that(book.has_submission_index(), is_(True))
+        assert_that(book.submitted_count(u'xzy'), is_(0))
+
+    def test_assignment_index(self):
+        book = GradeBook()
+
+        part = GradeBookPart()
+        part.order = 1
+        part.displayName = u'part'
+        book['part'] = part
+
+        entry = GradeBookEntry()
+        entry.order = 1
+        entry.assignmentId = u'xzy'
+        entry.displayName = u'entry'
+        part['entry'] = entry
+
+        assert_that(book._assignment_index, has_key('xzy'))
+        assert_that(book.getColumnForAssignmentId('xzy'), is_(entry))
+        assert_that(book.getColumnForAssignmentId('entry'), is_(none()))
+        assert_that(book.getColumnForAssignmentId('entry', True), is_(entry))
+
+        del part['entry']
+        assert_that(book._assignment_index, does_not(has_key('xzy')))
+        assert_that(book.getColumnForAssignmentId('xzy'), is_(none()))
+
+        # Older books without an index are rebuilt on the next change
+        part['entry'] = entry
+        book._assignment_index = None
+        assert_that(book.getColumnForAssignmentId('xzy'), is_(entry))
+        book.rebuild_assignment_index()
+        assert_that(book._assignment_index, has_key('xzy'))
+
+    def test_assignment_index_duplicates(self):
+        book = GradeBook()
+
+        part = GradeBookPart()
+        part.order = 1
+        part.displayName = u'part'
+        book['part'] = part
+
+        entries = {}
+        for name in ('two', 'one'):
+            entry = entries[name] = GradeBookEntry()
+            entry.order = 1
+            entry.assignmentId = u'xzy'
+            entry.displayName = name
+            part[name] = entry
+
+        # The first entry in scan order wins, as on a rebuild
+        assert_that(book.getColumnForAssignmentId('xzy'), is_(entries['one']))
+        book.rebuild_assignment_index()
+        assert_that(book.getColumnForAssignmentId('xzy'), is_(entries['one']))
+
+        # Removing it falls back to the other one
+        del part['one']
+        assert_that(book.getColumnForAssignmentId('xzy'), is_(entries['two']))
+
+        # Reassigned entries are reindexed
+        entry = entries['two']
+        entry.assignmentId = u'abc'
+        notify(ObjectModifiedEvent(entry))
+        assert_that(book._assignment_index, does_not(has_key('xzy')))
+        assert_that(book.getColumnForAssignmentId('abc'), is_(entry))
+
+    def test_user_grade_index(self):
+        book = GradeBook()
+
+        part = GradeBookPart()
+        part.order = 1
+        part.displayName = u'part'
+        book['part'] = part
+
+        for name in ('one', 'two'):
+            entry = GradeBookEntry()
+            entry.order = 1
+            entry.assignmentId = name
+            entry.displayName = name
+            part[name] = entry
+            entry['Ichigo'] = Grade()
+
+        assert_that(book._user_grade_index, has_key('ichigo'))
+        assert_that(list(book._user_grade_index['ichigo']),
+                    is_([('part', 'one'), ('part', 'two')]))
+        assert_that(book.has_grades('ICHIGO'), is_(True))
+        assert_that(list(book.iter_grades('ichigo')), has_length(2))
+
+        del part['one']['Ichigo']
+        assert_that(list(book._user_grade_index['ichigo']),
+                    is_([('part', 'two')]))
+        assert_that(list(book.iter_grades('ichigo')), has_length(1))
+
+        book.remove_user('ichigo')
+        assert_that(book._user_grade_index, does_not(has_key('ichigo')))
+        assert_that(book.has_grades('ichigo'), is_(False))
+
+        # Rebuilding matches the maintained index
+        part['two']['aizen'] = Grade()
+        book.rebuild_user_grade_index()
+        assert_that(list(book._user_grade_index['aizen']),
+                    is_([('part', 'two')]))
+
+    def test_user_grade_index_without_assignment(self):
+        book = GradeBook()
+
+        part = GradeBookPart()
+        part.order = 1
+        part.displayName = u'part'
+        book['part'] = part
+
+        # Entries without an assignment, or sharing one
+        for name, assignmentId in (('one', None), ('two', u'xzy'),
+                                   ('three', u'xzy')):
+            entry = GradeBookEntry()
+            entry.order = 1
+            if assignmentId:
+                entry.assignmentId = assignmentId
+            entry.displayName = name
+            part[name] = entry
+            entry['Ichigo'] = Grade()
+
+        assert_that(list(book.iter_grades('ichigo')), has_length(3))
+        book.rebuild_user_grade_index()
+        assert_that(list(book.iter_grades('ichigo')), has_length(3))
+
+        assert_that(book.remove_user('ichigo'), is_(1))
+        for entry in part.values():
+            assert_that(entry, does_not(has_key('ichigo')))
+        assert_that(book.has_grades('ichigo'), is_(False))
+
+        # Entries moving in with their grades are indexed
+        entry = part['one']
+        entry['aizen'] = Grade()
+        del part['one']
+        assert_that(book.has_grades('aizen'), is_(False))
+        part['four'] = entry
+        assert_that(list(book.iter_grades('aizen')), has_length(1))
+
+    def test_submission_index(self):
+        book = GradeBook()
+
+        part = GradeBookPart()
+        part.order = 1
+        part.displayName = u'part'
+        book['part'] = part
+
+        entry = GradeBookEntry()
+        entry.order = 1
+        entry.assignmentId = u'one'
+        entry.displayName = u'one'
+        part['one'] = entry
+
+        assert_that(book.submitted_count(u'one'), is_(0))
+        book.index_submission(u'Ichigo', u'one')
+        book.index_submission(u'ichigo', u'one')
+        book.index_submission(u'aizen', u'one')
+        assert_that(book.submitted_count(u'one'), is_(2))
+        assert_that(list(book.submitted_assignments(u'ichigo')), is_([u'one']))
+        assert_that(list(book.ungraded_assignments(u'ichigo')), is_([u'one']))
+
+        # A grade without a value is still ungraded
+        entry['ichigo'] = Grade()
+        assert_that(list(book.ungraded_assignments(u'ichigo')), is_([u'one']))
+
+        entry['ichigo'].value = 10
+        book.update_ungraded(u'ichigo', u'one')
+        assert_that(book.ungraded_assignments(u'ichigo'), has_length(0))
+
+        del entry['ichigo']
+        assert_that(list(book.ungraded_assignments(u'ichigo')), is_([u'one']))
+
+        book.unindex_submission(u'ichigo', u'one')
+        assert_that(book.submitted_assignments(u'ichigo'), has_length(0))
+        assert_that(book.ungraded_assignments(u'ichigo'), has_length(0))
+        assert_that(book.submitted_count(u'one'), is_(1))
+
+        book.remove_user(u'aizen')
+        assert_that(book.submitted_count(u'one'), is_(0))
+
+    def test_prefetch(self):
+        assert_that(list(_iter_chunks(range(5), 2)),
+                    is_([[0, 1], [2, 3], [4]]))
+
+        class Jar(object):
+            prefetched = ()
+
+            def prefetch(self, objects):
+                self.prefetched = objects
+
+        class Ghost(object):
+            _p_jar = None
+
+        jar = Jar()
+        stored = Ghost()
+        stored._p_jar = jar
+        _prefetch([None, Ghost(), stored])
+        assert_that(jar.prefetched, is_([stored]))
+
+    def test_user_change_stamp(self):
+        book = GradeBook()
+        assert_that(book.user_change_stamp(u'ichigo'), is_(0))
+        book.record_change(u'Ichigo')
+        assert_that(book._user_change_counts[u'ichigo'](), is_(1))
+        # unsaved books have no committed stamp
+        assert_that(book.user_change_stamp(u'ichigo'), is_(none()))
+        assert_that(book.user_change_stamp(u'aizen'), is_(0))
+
+        book.record_name_change()
+        assert_that(book._name_change_count(), is_(1))
+        assert_that(book.name_stamp, is_(none()))
+
+    def test_initialize_counters(self):
+        book = GradeBook()
+        counter = book._change_count
+        for name in ('_change_count', '_enrollment_change_count',
+                     '_submission_change_count', '_name_change_count',
+                     '_user_change_counts'):
+            setattr(book, name, None)
+        # Older books get theirs when evolved
+        assert_that(book.change_stamp, is_(0))
+        book.initialize_counters()
+        book.record_change(u'ichigo')
+        book.record_enrollment_change()
+        book.record_submission_change()
+        book.record_name_change()
+        assert_that(book._change_count(), is_(1))
+        assert_that(book._user_change_counts[u'ichigo'](), is_(1))
+
+        # Existing counters are kept
+        book._change_count = counter
+        book.initialize_counters()
+        assert_that(book._change_count, is_(counter))
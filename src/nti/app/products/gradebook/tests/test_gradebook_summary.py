@@ -26,6 +26,8 @@ from nti.app.products.gradebook.interfaces import IGradeBook
 
 from nti.app.products.gradebook.grades import PredictedGrade
 
+from nti.app.products.gradebook.rosters import SortedRoster
+
 from nti.app.products.gradebook.views import _get_grade_parts
 
 from nti.app.products.gradebook.views.summary_views import UserGradeSummary
@@ -220,6 +222,53 @@ class TestGradeBookSummary(TestCase):
         assert_that(result, has_length(1))
         assert_that(result, contains(summary4))
 
+        # Partially sorted batches
+        request.params = {
+            'sortOn': 'username',
+            'sortOrder': 'descending',
+            'batchSize': 2,
+            'batchStart': 1
+        }
+        result = do_sort({}, summaries)
+        assert_that(result, contains(summary3, summary))
+
+        sorted_summaries = view._get_sorted_result_set(summaries,
+                                                       view._get_sort_key('username'),
+                                                       True)
+        assert_that(sorted_summaries, has_length(4))
+        assert_that(sorted_summaries[:3], contains(summary2, summary3, summary))
+
+    @fudge.patch('nti.app.products.gradebook.views.summary_views.get_sorted_roster')
+    def test_presorted_sorting(self, mock_roster):
+        """
+        Name sorts read the keys of the presorted roster.
+        """
+        mock_roster.is_callable().returns(
+            SortedRoster([(u'aaa', u'ichigo'), (u'mmm', u'aizen')]))
+        request = DummyRequest(params={'sortOn': 'lastname'})
+        gradebook = GradeBook()
+        gradebook.__parent__ = CourseInstance()
+        view = GradeBookSummaryView(gradebook, request)
+        view.filter_scope_name = u'ForCredit'
+
+        # Names are not resolved for rostered users
+        summary = MockSummary(last_name=None)
+        summary._username = u'aizen'
+        summary2 = MockSummary(last_name=None)
+        summary2._username = u'ichigo'
+        summary3 = MockSummary(last_name='zzz')
+        summary3._username = u'rukia'
+        summaries = [summary3, summary, summary2]
+
+        sort_key = view._get_presorted_key('lastname',
+                                           view._get_sort_key('lastname'))
+        assert_that(sorted(summaries, key=sort_key),
+                    contains(summary2, summary, summary3))
+
+        # Other sorts are unchanged
+        sort_key = view._get_sort_key('grade')
+        assert_that(view._get_presorted_key('grade', sort_key), is_(sort_key))
+
     @fudge.patch('nti.app.products.gradebook.views.summary_views.GradeBookSummaryView._get_enrollment_scoped_summaries')
     @fudge.patch('nti.app.products.gradebook.views.summary_views.GradeBookSummaryView.final_grade_entry')
     @fudge.patch('nti.app.products.gradebook.views.summary_views.GradeBookSummaryView.assignments')
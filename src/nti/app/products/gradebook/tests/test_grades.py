@@ -11,12 +11,14 @@ from hamcrest import is_
 from hamcrest import none
 from hamcrest import raises
 from hamcrest import calling
+from hamcrest import has_key
 from hamcrest import has_entry
 from hamcrest import assert_that
 from hamcrest import has_entries
 from hamcrest import has_property
 from hamcrest import same_instance
 from hamcrest import greater_than_or_equal_to
+from hamcrest import is_not as does_not
 
 from nti.testing.matchers import validly_provides
 
@@ -24,6 +26,8 @@ import time
 import pickle
 import unittest
 
+from nti.app.assessment.interfaces import IUsersCourseAssignmentHistoryItem
+
 from nti.app.products.gradebook.gradebook import GradeBookEntry
 
 from nti.app.products.gradebook.grades import Grade
@@ -33,6 +37,8 @@ from nti.app.products.gradebook.grades import PredictedGrade
 
 from nti.app.products.gradebook.gradescheme import LetterNumericGradeScheme
 
+from nti.app.products.gradebook.index import ValidatingGradeSubmission
+
 from nti.app.products.gradebook.interfaces import IGrade
 
 from nti.externalization.externalization import to_external_object
@@ -76,6 +82,23 @@ class TestGrades(unittest.TestCase):
 
             assert_that(grade, has_property('createdTime', grade.lastModified))
 
+    def test_numeric_value(self):
+        grade = PersistentGrade(value=u'75 -')
+        assert_that(grade.numeric_value, is_(75.0))
+        assert_that(grade.normalized_value,
+                    same_instance(grade.normalized_value))
+        assert_that(grade.__getstate__(), does_not(has_key('_v_normalized')))
+
+        grade.value = u'A'
+        assert_that(grade.numeric_value, is_(none()))
+        grade.value = 8
+        assert_that(grade.numeric_value, is_(8))
+
+        # not kept on non-persistent grades
+        grade = Grade(value=u'75 -')
+        assert_that(grade.numeric_value, is_(75.0))
+        assert_that(grade.__dict__, does_not(has_key('_v_normalized')))
+
     def test_wref(self):
         assert_that(calling(GradeWeakRef).with_args(Grade()),
                     raises(TypeError))
@@ -129,6 +152,15 @@ class TestGrades(unittest.TestCase):
                                 'PointsAvailable', is_(0),
                                 'PointsEarned', is_(1)))
 
+    def test_submission_index_values(self):
+        # Grades keep their values, they come from the history item
+        assert_that(ValidatingGradeSubmission(Grade(), None), is_(none()))
+
+        item = _HistoryItem()
+        adapted = ValidatingGradeSubmission(item, None)
+        assert_that(adapted, has_property('createdTime', 42))
+        assert_that(adapted, has_property('FeedbackCount', 3))
+
         # By default, DisplayableGrade should be the same
         # as Correctness. However, if we're using a grading
         # scheme, then it should display a formatted value
@@ -162,3 +194,9 @@ class _CheapWref(object):
 
     def __hash__(self):
         return 42
+
+
+@interface.implementer(IUsersCourseAssignmentHistoryItem)
+class _HistoryItem(object):
+    createdTime = 42
+    FeedbackCount = 3
@@ -8,8 +8,12 @@ __docformat__ = "restructuredtext en"
 # pylint: disable=W0212,R0904
 
 from hamcrest import is_
+from hamcrest import none
+from hamcrest import has_key
 from hamcrest import assert_that
+from hamcrest import is_not as does_not
 
+import pickle
 import unittest
 
 from nti.app.products.gradebook import gradescheme
@@ -71,6 +75,38 @@ class TestGradeScheme(unittest.TestCase):
         with self.assertRaises(ValueError):
             lgs.validate('X')
 
+    def test_compiled_letter_grade(self):
+        lgs = gradescheme.LetterGradeScheme()
+        values = [1.0, 0.896, 0.85, 0.79333333333, 0.5, 0.394, 0.397, -1, 2]
+        expected = [lgs.fromCorrectness(x) for x in values]
+        assert_that(expected,
+                    is_(['A', 'A', 'B', 'C', 'D', 'F', 'D', 'F', 'A']))
+        assert_that(lgs.fromCorrectness_many(values), is_(expected))
+        assert_that(lgs.toLetter(89.5), is_(none()))
+        assert_that(lgs.toNumber('b'), is_(89))
+        assert_that(lgs.toNumber('X'), is_(none()))
+
+        # not pickled
+        assert_that(pickle.loads(pickle.dumps(lgs)).__dict__,
+                    does_not(has_key('_v_compiled')))
+
+        # replacing the ranges recompiles
+        lgs.grades = (u'P', u'F')
+        lgs.ranges = ((50, 100), (0, 49))
+        assert_that(lgs.fromCorrectness(0.5), is_('P'))
+        assert_that(lgs.toNumber('P'), is_(100))
+
+        # overlapping ranges are scanned in order
+        lgs.ranges = ((50, 100), (0, 60))
+        assert_that(lgs.toLetter(55), is_('P'))
+        assert_that(lgs.toLetter(45), is_('F'))
+        assert_that(lgs.fromCorrectness_many([0.55, 0.2]), is_(['P', 'F']))
+
+        scheme = gradescheme.NumericGradeScheme(min=0.0, max=20.0)
+        values = [0.5, 0.333, 1.5]
+        assert_that(scheme.fromCorrectness_many(values),
+                    is_([scheme.fromCorrectness(x) for x in values]))
+
     def test_letter_numeric_grade(self):
         lngs = gradescheme.LetterNumericGradeScheme()
 
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+# pylint: disable=protected-access,too-many-public-methods
+
+from hamcrest import is_
+from hamcrest import none
+from hamcrest import contains
+from hamcrest import has_length
+from hamcrest import greater_than
+from hamcrest import assert_that
+
+import math
+import unittest
+
+from zope import interface
+
+from nti.app.products.gradebook.gradebook import GradeBook
+from nti.app.products.gradebook.gradebook import GradeBookPart
+from nti.app.products.gradebook.gradebook import GradeBookEntry
+
+from nti.app.products.gradebook.grades import PersistentGrade as Grade
+
+from nti.app.products.gradebook.interfaces import IExcusedGrade
+
+from nti.app.products.gradebook.matrix import GradeMatrix
+from nti.app.products.gradebook.matrix import get_grade_matrix
+
+from nti.app.products.gradebook.tests import SharedConfiguringTestLayer
+
+
+class TestGradeMatrix(unittest.TestCase):
+
+    layer = SharedConfiguringTestLayer
+
+    def _book(self):
+        book = GradeBook()
+        part = GradeBookPart()
+        part.order = 1
+        part.displayName = u'part'
+        book['part'] = part
+        for name in ('one', 'two'):
+            entry = GradeBookEntry()
+            entry.order = 1
+            entry.assignmentId = u'tag:' + name
+            entry.displayName = name
+            part[name] = entry
+        part['one']['Ichigo'] = Grade(value=u'75 -')
+        part['one']['aizen'] = Grade(value=u'A')
+        excused = Grade(value=10)
+        interface.alsoProvides(excused, IExcusedGrade)
+        part['two']['aizen'] = excused
+        return book
+
+    def test_build(self):
+        matrix = GradeMatrix.build(self._book())
+        assert_that(matrix, has_length(2))
+        assert_that(matrix.usernames, is_(('aizen', 'ichigo')))
+        assert_that([x.entry_name for x in matrix.columns],
+                    is_(['one', 'two']))
+
+        cell = matrix.get('ICHIGO', u'tag:one')
+        assert_that(cell.value, is_(u'75 -'))
+        assert_that(cell.number, is_(75.0))
+        assert_that(cell.excused, is_(False))
+        assert_that(matrix.get('ichigo', u'tag:two'), is_(none()))
+
+        cell = matrix.get('aizen', u'tag:one')
+        assert_that(math.isnan(cell.number), is_(True))
+        assert_that(matrix.get('aizen', u'tag:two').excused, is_(True))
+
+        assert_that([x[0].entry_name for x in matrix.row('aizen')],
+                    contains('one', 'two'))
+        assert_that([x[0] for x in matrix.column(u'tag:one')],
+                    contains('aizen', 'ichigo'))
+        numbers = matrix.numeric_column(u'tag:two')
+        assert_that(numbers, has_length(2))
+        assert_that(numbers[0], is_(10.0))
+        assert_that(math.isnan(numbers[1]), is_(True))
+
+        # Only the grades are stored
+        assert_that(matrix.rows[1], contains(0))
+        assert_that(matrix.cell(1, 1), is_(none()))
+        assert_that(matrix.estimated_size, greater_than(0))
+
+    def test_get_grade_matrix(self):
+        book = self._book()
+        matrix = get_grade_matrix(book)
+        assert_that(matrix.get('ichigo', u'tag:one').value, is_(u'75 -'))
+        # Unsaved books are not cached
+        book['part']['two']['ichigo'] = Grade(value=u'90 -')
+        matrix = get_grade_matrix(book)
+        assert_that(matrix.get('ichigo', u'tag:two').number, is_(90.0))
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+# pylint: disable=protected-access,too-many-public-methods
+
+from hamcrest import is_
+from hamcrest import none
+from hamcrest import assert_that
+from hamcrest import same_instance
+
+import unittest
+
+from zope import interface
+
+from nti.app.products.gradebook.utils.names import get_user_name_keys
+
+from nti.app.products.gradebook.tests import SharedConfiguringTestLayer
+
+from nti.dataserver.users.interfaces import IFriendlyNamed
+
+
+@interface.implementer(IFriendlyNamed)
+class _Named(object):
+
+    def __init__(self, username, realname=None, alias=None):
+        self.username = username
+        self.realname = realname
+        self.alias = alias
+
+    def get_searchable_realname_parts(self):
+        return self.realname.split() if self.realname else None
+
+
+class TestNames(unittest.TestCase):
+
+    layer = SharedConfiguringTestLayer
+
+    def test_name_keys(self):
+        user = _Named(u'ichigo', u'Ichigo Kurosaki', u'Strawberry')
+        keys = get_user_name_keys(user)
+        assert_that(keys.first, is_(u'Ichigo'))
+        assert_that(keys.last, is_(u'Kurosaki'))
+        assert_that(keys.alias, is_(u'Strawberry'))
+        assert_that(keys.display_username, is_(u'ichigo'))
+        assert_that(keys.realname_sort_key, is_(u'kurosaki ichigo'))
+        # cached
+        assert_that(get_user_name_keys(user), same_instance(keys))
+
+        # profile modifications invalidate
+        user.realname = u'Rukia Kuchiki'
+        keys = get_user_name_keys(user)
+        assert_that(keys.last, is_(u'Kuchiki'))
+        assert_that(keys.realname_sort_key, is_(u'kuchiki rukia'))
+
+        # emails are not parsed
+        user.realname = u'ichigo@bleach.org'
+        keys = get_user_name_keys(user)
+        assert_that(keys.last, is_(u''))
+
+        user.realname = None
+        keys = get_user_name_keys(user)
+        assert_that(keys.realname, is_(u''))
+        assert_that(keys.realname_sort_key, is_(none()))
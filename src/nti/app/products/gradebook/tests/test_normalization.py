@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+# pylint: disable=protected-access,too-many-public-methods
+
+from hamcrest import is_
+from hamcrest import none
+from hamcrest import assert_that
+
+import math
+import unittest
+
+from zope import interface
+
+from nti.app.products.gradebook.grades import PersistentGrade
+
+from nti.app.products.gradebook import normalization
+
+from nti.app.products.gradebook.interfaces import IExcusedGrade
+
+from nti.app.products.gradebook.normalization import GRADE_BLANK
+from nti.app.products.gradebook.normalization import GRADE_LETTER
+from nti.app.products.gradebook.normalization import GRADE_EXCUSED
+from nti.app.products.gradebook.normalization import GRADE_INVALID
+from nti.app.products.gradebook.normalization import GRADE_NUMERIC
+
+from nti.app.products.gradebook.normalization import grade_parts
+from nti.app.products.gradebook.normalization import grade_number
+from nti.app.products.gradebook.normalization import normalize_grades
+from nti.app.products.gradebook.normalization import normalize_grade_value
+
+from nti.app.products.gradebook.tests import SharedConfiguringTestLayer
+
+
+class TestNormalization(unittest.TestCase):
+
+    layer = SharedConfiguringTestLayer
+
+    def test_normalize_grade_value(self):
+        assert_that(normalize_grade_value(u'75 -'),
+                    is_((GRADE_NUMERIC, 75.0, u'-')))
+        assert_that(normalize_grade_value(u'90 A'),
+                    is_((GRADE_LETTER, 90.0, u'A')))
+        assert_that(normalize_grade_value(u'A-'),
+                    is_((GRADE_LETTER, None, u'A-')))
+        assert_that(normalize_grade_value(7),
+                    is_((GRADE_NUMERIC, 7, u'')))
+        assert_that(normalize_grade_value(u' ').status, is_(GRADE_BLANK))
+        assert_that(normalize_grade_value(None).status, is_(GRADE_BLANK))
+        assert_that(normalize_grade_value(u'-').status, is_(GRADE_INVALID))
+        assert_that(normalize_grade_value(object()).status, is_(GRADE_INVALID))
+
+        assert_that(grade_number(u'20'), is_(20.0))
+        assert_that(grade_number(u'90 A'), is_(none()))
+        assert_that(grade_parts(u'98 -'), is_((98.0, u'-')))
+        assert_that(grade_parts(u'90 A'), is_((90.0, u'A')))
+        assert_that(grade_parts(u'A'), is_((u'A',)))
+
+    def test_baseline_parsing(self):
+        # What numeric_grade_val and _get_grade_parts always did
+        assert_that(grade_number(u'75 -'), is_(75.0))
+        assert_that(grade_number(u' 75 '), is_(75.0))
+        assert_that(grade_number(u'75-'), is_(none()))
+        assert_that(grade_number(u'75 - '), is_(none()))
+        assert_that(grade_number(u''), is_(none()))
+        assert_that(grade_number(7), is_(7))
+        assert_that(normalize_grade_value(u'75-').status, is_(GRADE_INVALID))
+        assert_that(grade_parts(u'75-'), is_((u'75-',)))
+        assert_that(grade_parts(u'75 - '), is_((75.0, u'-')))
+        assert_that(grade_parts(u'75.0 -'), is_((75.0, u'-')))
+
+    def test_parsed_eviction(self):
+        size = normalization.NORMALIZED_CACHE_SIZE
+        normalization._parsed.clear()
+        normalization.NORMALIZED_CACHE_SIZE = 2
+        try:
+            for value in (u'1', u'2', u'3'):
+                normalize_grade_value(value)
+            # the oldest value goes, the others stay
+            assert_that(list(normalization._parsed), is_([u'2', u'3']))
+        finally:
+            normalization.NORMALIZED_CACHE_SIZE = size
+            normalization._parsed.clear()
+
+    def test_normalize_grades(self):
+        excused = PersistentGrade(value=u'50 -')
+        interface.alsoProvides(excused, IExcusedGrade)
+        grades = [PersistentGrade(value=u'75 -'), PersistentGrade(value=u'A'),
+                  None, excused]
+        numbers, statuses = normalize_grades(grades)
+        assert_that(list(statuses),
+                    is_([GRADE_NUMERIC, GRADE_LETTER, GRADE_BLANK, GRADE_EXCUSED]))
+        assert_that(numbers[0], is_(75.0))
+        assert_that([math.isnan(x) for x in numbers[1:]],
+                    is_([True, True, True]))
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+# pylint: disable=protected-access,too-many-public-methods
+
+from hamcrest import is_
+from hamcrest import assert_that
+
+import fudge
+
+import unittest
+
+from zope import interface
+
+from zope.security.interfaces import IPrincipal
+
+from nti.app.products.gradebook.enrollments import CourseEnrollmentScopes
+
+from nti.app.products.gradebook.grading.interfaces import IGradeBookBatchGradingPolicy
+
+from nti.app.products.gradebook.grading.predicted import get_predicted_grades
+
+from nti.app.products.gradebook.grading.utils import grade_principals
+
+from nti.app.products.gradebook.tests import SharedConfiguringTestLayer
+
+
+@interface.implementer(IPrincipal)
+class _User(object):
+
+    def __init__(self, username):
+        self.id = username
+
+
+class _Book(object):
+
+    NTIID = u'tag:nextthought.com,2011-10:NTI-OID-0x01'
+
+    def __init__(self):
+        self.stamps = {}
+
+    def user_change_stamp(self, username):
+        return self.stamps.get(username.lower(), 0)
+
+
+class _Policy(object):
+    course = object()
+
+
+class TestPredicted(unittest.TestCase):
+
+    layer = SharedConfiguringTestLayer
+
+    @fudge.patch('nti.app.products.gradebook.grading.predicted.gradebook_for_course',
+                 'nti.app.products.gradebook.grading.predicted.get_enrollment_scopes',
+                 'nti.app.products.gradebook.grading.predicted.course_predicted_grade_validator',
+                 'nti.app.products.gradebook.grading.predicted.calculate_predicted_grades')
+    def test_cached_predicted_grades(self, mock_book, mock_scopes, mock_validator, mock_calc):
+        book = _Book()
+        mock_book.is_callable().returns(book)
+        scopes = CourseEnrollmentScopes(frozenset((u'ichigo', u'aizen')),
+                                        frozenset((u'aizen',)),
+                                        frozenset((u'ichigo',)),
+                                        frozenset(), 2, 1)
+        mock_scopes.is_callable().returns(scopes)
+        mock_validator.is_callable().returns(('policy', 1))
+
+        computed = []
+
+        def calc(users, unused_policy, unused_scheme):
+            computed.extend(x.id for x in users)
+            return [(x, x.id.upper()) for x in users]
+        mock_calc.is_callable().calls(calc)
+
+        policy = _Policy()
+        ichigo, aizen = _User(u'ichigo'), _User(u'aizen')
+        result = get_predicted_grades((ichigo, aizen), policy)
+        assert_that([x[1] for x in result], is_([u'ICHIGO', u'AIZEN']))
+        assert_that(computed, is_([u'ichigo', u'aizen']))
+
+        # Cached, in a single pass for the others
+        del computed[:]
+        book.stamps[u'aizen'] = (1, b'serial')
+        result = get_predicted_grades((ichigo, aizen), policy)
+        assert_that([x[1] for x in result], is_([u'ICHIGO', u'AIZEN']))
+        assert_that(computed, is_([u'aizen']))
+
+        # Enrollment scope changes
+        del computed[:]
+        mock_scopes.is_callable().returns(scopes._replace(for_credit=frozenset()))
+        get_predicted_grades((ichigo,), policy)
+        assert_that(computed, is_([u'ichigo']))
+
+        del computed[:]
+        get_predicted_grades((ichigo,), policy, recompute=True)
+        assert_that(computed, is_([u'ichigo']))
+
+        # Uncommitted grades are not cached
+        del computed[:]
+        book.stamps[u'ichigo'] = None
+        get_predicted_grades((ichigo,), policy)
+        get_predicted_grades((ichigo,), policy)
+        assert_that(computed, is_([u'ichigo', u'ichigo']))
+
+    def test_grade_principals(self):
+
+        class Policy(object):
+
+            def grade(self, principal, **unused_kwargs):
+                return principal.upper()
+
+        # Policies without batch grading grade one principal at a time
+        assert_that(list(grade_principals(Policy(), (u'a', u'b'))),
+                    is_([(u'a', u'A'), (u'b', u'B')]))
+
+        @interface.implementer(IGradeBookBatchGradingPolicy)
+        class BatchPolicy(Policy):
+
+            def grade_many(self, principals, **unused_kwargs):
+                return [(x, x * 2) for x in principals]
+
+        assert_that(list(grade_principals(BatchPolicy(), (u'a',))),
+                    is_([(u'a', u'aa')]))
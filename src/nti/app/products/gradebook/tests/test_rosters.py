@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+# pylint: disable=protected-access,too-many-public-methods
+
+from hamcrest import is_
+from hamcrest import calling
+from hamcrest import raises
+from hamcrest import assert_that
+
+import unittest
+
+from nti.app.products.gradebook.rosters import SORT_USERNAME
+from nti.app.products.gradebook.rosters import SORT_LAST_NAME
+
+from nti.app.products.gradebook.rosters import SortedRoster
+from nti.app.products.gradebook.rosters import decode_roster_cursor
+from nti.app.products.gradebook.rosters import encode_roster_cursor
+
+from nti.app.products.gradebook.tests import SharedConfiguringTestLayer
+
+
+class TestRosters(unittest.TestCase):
+
+    layer = SharedConfiguringTestLayer
+
+    def test_iter_after(self):
+        rows = [(u'adams', u'user3'),
+                (u'baker', u'user1'),
+                (u'baker', u'user2'),
+                (u'clark', u'user0')]
+        roster = SortedRoster(rows)
+        assert_that(len(roster), is_(4))
+        assert_that(list(roster.iter_after()), is_(rows))
+        assert_that(list(roster.iter_after(rows[1])), is_(rows[2:]))
+        assert_that(list(roster.iter_after(rows[-1])), is_([]))
+        assert_that(list(roster.iter_after(descending=True)),
+                    is_(rows[::-1]))
+        assert_that(list(roster.iter_after(rows[2], descending=True)),
+                    is_(rows[1::-1]))
+
+        # Rows no longer in the roster
+        assert_that(list(roster.iter_after((u'baker', u'user15'))),
+                    is_(rows[2:]))
+        assert_that(list(roster.iter_after((u'baker', u'user15'), True)),
+                    is_(rows[1::-1]))
+
+    def test_cursor(self):
+        row = (u'b\xe4ker', u'user1')
+        cursor = encode_roster_cursor(SORT_LAST_NAME, row)
+        assert_that(decode_roster_cursor(cursor, SORT_LAST_NAME), is_(row))
+
+        assert_that(calling(decode_roster_cursor).with_args(cursor, SORT_USERNAME),
+                    raises(ValueError))
+        assert_that(calling(decode_roster_cursor).with_args(u'bleach', SORT_LAST_NAME),
+                    raises(ValueError))
+
+        # Rows that cannot be compared with the roster rows
+        for row in ((3, u'user1'), (None, u'user1'), ([u'baker'], u'user1'),
+                    (u'baker', 1)):
+            cursor = encode_roster_cursor(SORT_LAST_NAME, row)
+            assert_that(calling(decode_roster_cursor).with_args(cursor, SORT_LAST_NAME),
+                        raises(ValueError))
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+# pylint: disable=protected-access,too-many-public-methods
+
+from hamcrest import is_
+from hamcrest import calling
+from hamcrest import raises
+from hamcrest import has_length
+from hamcrest import assert_that
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from six.moves import queue
+
+from nti.app.products.gradebook.grading.scripts import nti_grade_calculator
+
+from nti.app.products.gradebook.grading.scripts.nti_grade_calculator import GradeWorkers
+
+from nti.app.products.gradebook.scripts.nti_grade_assignment_submissions import Checkpoint
+from nti.app.products.gradebook.scripts.nti_grade_assignment_submissions import _iter_chunks
+
+
+class TestGradeAssignmentSubmissions(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'grades.checkpoint')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, True)
+
+    def test_iter_chunks(self):
+        assert_that(list(_iter_chunks(range(5), 2)),
+                    is_([[0, 1], [2, 3], [4]]))
+        assert_that(list(_iter_chunks(range(4), 2)),
+                    is_([[0, 1], [2, 3]]))
+        assert_that(list(_iter_chunks((), 2)), is_([]))
+
+    def test_checkpoint_resume(self):
+        checkpoint = Checkpoint(self.path, '# course *')
+        assert_that(checkpoint.done, is_(set()))
+        checkpoint.record([u'ichigo', u'aizen'])
+        assert_that(checkpoint.done, is_({u'ichigo', u'aizen'}))
+
+        # A rerun skips them
+        checkpoint = Checkpoint(self.path, '# course *')
+        assert_that(checkpoint.done, is_({u'ichigo', u'aizen'}))
+        checkpoint.record([u'rukia'])
+        checkpoint = Checkpoint(self.path, '# course *')
+        assert_that(checkpoint.done, is_({u'ichigo', u'aizen', u'rukia'}))
+
+        checkpoint.remove()
+        assert_that(os.listdir(self.tmp_dir), has_length(0))
+        assert_that(Checkpoint(self.path, '# course *').done, is_(set()))
+
+    def test_checkpoint_workers(self):
+        checkpoint = Checkpoint(self.path, '# course *')
+        checkpoint.record([u'ichigo'], 0)
+        checkpoint.record([u'aizen'], 1)
+        # Unrelated files are ignored
+        with open(self.path + '.bak', 'w') as fp:
+            fp.write('# other run\nrukia\n')
+        assert_that(list(checkpoint.files()),
+                    is_([self.path + '.0', self.path + '.1']))
+
+        # A rerun with a different number of workers sees them all
+        checkpoint = Checkpoint(self.path, '# course *')
+        assert_that(checkpoint.done, is_({u'ichigo', u'aizen'}))
+
+        checkpoint.remove()
+        assert_that(os.listdir(self.tmp_dir), is_(['grades.checkpoint.bak']))
+
+    def test_checkpoint_identity(self):
+        Checkpoint(self.path, '# course *').record([u'ichigo'], 0)
+        assert_that(calling(Checkpoint).with_args(self.path, '# course assignment'),
+                    raises(ValueError))
+
+
+class _Process(object):
+
+    def __init__(self, exitcode=None):
+        self.exitcode = exitcode
+
+    def is_alive(self):
+        return self.exitcode is None
+
+
+class TestGradeWorkers(unittest.TestCase):
+
+    def _workers(self, *processes):
+        workers = GradeWorkers.__new__(GradeWorkers)
+        workers.tasks = queue.Queue()
+        workers.results = queue.Queue()
+        workers.processes = list(processes)
+        workers._idle = len(processes)
+        return workers
+
+    def test_grade(self):
+        workers = self._workers(_Process(), _Process())
+        workers.results.put((True, [(u'ichigo', 1.0)]))
+        workers.results.put((True, [(u'aizen', 0.5)]))
+        assert_that(sorted(workers.grade([u'ichigo', u'aizen'])),
+                    is_([(u'aizen', 0.5), (u'ichigo', 1.0)]))
+
+        workers = self._workers(_Process())
+        workers.results.put((False, 'error'))
+        assert_that(calling(workers.grade).with_args([u'ichigo']),
+                    raises(ValueError))
+
+    def test_dead_worker(self):
+        timeout = nti_grade_calculator.WORKER_POLL_TIMEOUT
+        nti_grade_calculator.WORKER_POLL_TIMEOUT = 0.01
+        try:
+            # killed
+            workers = self._workers(_Process(), _Process(-9))
+            workers.results.put((True, [(u'ichigo', 1.0)]))
+            assert_that(calling(workers.grade).with_args([u'ichigo', u'aizen']),
+                        raises(ValueError))
+
+            # gone without a result
+            workers = self._workers(_Process(0))
+            assert_that(calling(workers.grade).with_args([u'ichigo']),
+                        raises(ValueError))
+        finally:
+            nti_grade_calculator.WORKER_POLL_TIMEOUT = timeout
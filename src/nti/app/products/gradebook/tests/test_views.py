@@ -13,12 +13,26 @@ from hamcrest import has_item
 from hamcrest import has_key
 from hamcrest import not_none
 from hamcrest import has_length
+from hamcrest import none
 from hamcrest import assert_that
+from hamcrest import instance_of
 
 import csv
 import fudge
 from six import StringIO
 
+from zope import component
+
+from pyramid.request import Request
+
+from nti.app.assessment.interfaces import IUsersCourseAssignmentHistory
+
+from nti.app.products.gradebook.views import ConditionalGetMixin
+
+from nti.app.products.gradebook.views.admin_views import _tx_grade as admin_tx_grade
+
+from nti.app.products.gradebook.views.download_views import _tx_grade as download_tx_grade
+
 from nti.app.products.gradebook.views.grading_views import is_none
 
 from nti.app.products.gradebook.tests import InstructedCourseApplicationTestLayer
@@ -27,6 +41,14 @@ from nti.app.testing.application_webtest import ApplicationLayerTest
 
 from nti.app.testing.decorators import WithSharedApplicationMockDS
 
+from nti.contenttypes.courses.interfaces import ICourseInstance
+
+from nti.dataserver.tests import mock_dataserver
+
+from nti.dataserver.users.users import User
+
+from nti.ntiids.ntiids import find_object_with_ntiid
+
 COURSE_NTIID = u'tag:nextthought.com,2011-10:OU-HTML-CLC3403_LawAndJustice.course_info'
 
 
@@ -170,6 +192,22 @@ class TestViews(ApplicationLayerTest):
                     has_entry('PointsEarned', 10))
         assert_that(res.json_body, not_(has_key('FinalGrade')))
 
+        # Cached predicted grades follow grade changes
+        grade['value'] = 12
+        self.testapp.put_json(grade_entry_path, grade,
+                              extra_environ=instructor_environ)
+        for params in ({}, {'recompute': 'true'}):
+            res = self.testapp.get(current_grade_path, params)
+            assert_that(res.json_body['PredictedGrade'],
+                        has_entry('PointsEarned', 12))
+
+        grade['value'] = 10
+        self.testapp.put_json(grade_entry_path, grade,
+                              extra_environ=instructor_environ)
+        res = self.testapp.get(current_grade_path)
+        assert_that(res.json_body['PredictedGrade'],
+                    has_entry('PointsEarned', 10))
+
         # Should get a dict back with both 'PredictedGrade'
         # and 'FinalGrade' if we have both.
         grade = {'Class': 'Grade',
@@ -220,6 +258,62 @@ class TestViews(ApplicationLayerTest):
         assert_that(rows,
                     has_item(has_entry('Trivial Test Points Grade', '10')))
 
+    @WithSharedApplicationMockDS(users=True, testapp=True, default_authenticate=True)
+    def test_import_grades_view(self):
+        instructor_environ = self._make_extra_environ(username='harp4162')
+
+        book_path = '/dataserver2/users/CLC3403.ou.nextthought.com/LegacyCourses/CLC3403/GradeBook'
+        enroll_path = '/dataserver2/users/sjohnson@nextthought.com/Courses/EnrolledCourses'
+
+        self.testapp.post_json(enroll_path,
+                               COURSE_NTIID,
+                               extra_environ=self._make_extra_environ())
+
+        # Rejected values leave no placeholder submission behind
+        rows = [{'Username': 'sjohnson@nextthought.com',
+                 'Trivial Test Points Grade': 'not\na grade'}]
+        res = self.testapp.post_json(book_path + '/ImportGrades',
+                                     {'Items': rows},
+                                     extra_environ=instructor_environ,
+                                     status=200)
+        assert_that(res.json_body, has_entry('Updated', 0))
+        assert_that(res.json_body, has_entry('Errors', has_length(1)))
+        with mock_dataserver.mock_db_trans(self.ds):
+            course = ICourseInstance(find_object_with_ntiid(COURSE_NTIID))
+            user = User.get_user('sjohnson@nextthought.com')
+            history = component.queryMultiAdapter((course, user),
+                                                  IUsersCourseAssignmentHistory)
+            assert_that(list(history or ()), has_length(0))
+
+        rows = [{'Username': 'sjohnson@nextthought.com',
+                 'Trivial Test Points Grade': '20'},
+                {'Username': 'not_a_user',
+                 'Trivial Test Points Grade': '30'}]
+        res = self.testapp.post_json(book_path + '/ImportGrades',
+                                     {'Items': rows},
+                                     extra_environ=instructor_environ,
+                                     status=200)
+        assert_that(res.json_body, has_entry('Updated', 1))
+        assert_that(res.json_body, has_entry('Errors', has_length(1)))
+        assert_that(res.json_body['Errors'][0], has_entry('Row', 2))
+
+        res = self.testapp.get(book_path + '/contents.csv',
+                               extra_environ=instructor_environ,
+                               status=200)
+        csv_reader = csv.DictReader(StringIO(res.body))
+        assert_that([x for x in csv_reader],
+                    has_item(has_entry('Trivial Test Points Grade', '20')))
+
+        # The export can be imported back as is
+        res = self.testapp.post(book_path + '/ImportGrades',
+                                res.body,
+                                content_type='text/csv',
+                                extra_environ=instructor_environ,
+                                status=200)
+        assert_that(res.json_body, has_entry('Updated', 0))
+        assert_that(res.json_body, has_entry('Unchanged', 1))
+        assert_that(res.json_body, has_entry('Errors', has_length(0)))
+
     @WithSharedApplicationMockDS(users=True, testapp=True, default_authenticate=True)
     def test_policy_views(self):
 
@@ -258,3 +352,58 @@ class TestViews(ApplicationLayerTest):
         assert_that(is_none('--'), is_(False))
         assert_that(is_none('D - '), is_(False))
         assert_that(is_none('55 D-'), is_(False))
+
+    def test_tx_grade(self):
+        assert_that(download_tx_grade(u'75 -'), is_(75))
+        assert_that(download_tx_grade(u'75.0 -'), instance_of(float))
+        assert_that(download_tx_grade(u'75-'), is_(none()))
+        assert_that(admin_tx_grade(u'75-'), is_(75))
+        assert_that(admin_tx_grade(u'75.0 -'), instance_of(float))
+
+    def test_conditional_get(self):
+
+        class View(ConditionalGetMixin):
+            remoteUser = None
+            validator = (1, b'serial')
+
+            def __init__(self, request):
+                self.request = request
+
+            def _conditional_validator(self):
+                return self.validator
+
+            def _conditional_last_modified(self):
+                return 1500000000
+
+        path = '/dataserver2/GradeBook/@@Summary?batchSize=10'
+        request = Request.blank(path)
+        assert_that(View(request)._not_modified_response(), is_(none()))
+        etag = request.response.etag
+        assert_that(etag, not_none())
+
+        request = Request.blank(path, headers={'If-None-Match': '"%s"' % etag})
+        response = View(request)._not_modified_response()
+        assert_that(response.status_int, is_(304))
+        assert_that(response.etag, is_(etag))
+
+        # other parameters or states do not match
+        request = Request.blank(path + '&batchStart=10',
+                                headers={'If-None-Match': '"%s"' % etag})
+        assert_that(View(request)._not_modified_response(), is_(none()))
+        request = Request.blank(path, headers={'If-None-Match': '"%s"' % etag})
+        view = View(request)
+        view.validator = (2, b'serial')
+        assert_that(view._not_modified_response(), is_(none()))
+
+        # uncommitted states are never validated
+        view = View(Request.blank(path, headers={'If-None-Match': '*'}))
+        view.validator = None
+        assert_that(view._not_modified_response(), is_(none()))
+
+        since = 'Fri, 14 Jul 2017 02:40:00 GMT'
+        request = Request.blank(path, headers={'If-Modified-Since': since})
+        response = View(request)._not_modified_response()
+        assert_that(response.status_int, is_(304))
+        since = 'Fri, 14 Jul 2017 02:39:59 GMT'
+        request = Request.blank(path, headers={'If-Modified-Since': since})
+        assert_that(View(request)._not_modified_response(), is_(none()))
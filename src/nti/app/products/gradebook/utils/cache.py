@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Small process-local caches.
+
+.. $Id$
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+from collections import OrderedDict
+
+from threading import RLock
+
+logger = __import__('logging').getLogger(__name__)
+
+
+class LRUCache(object):
+    """
+    A bounded, thread-safe, least-recently-used mapping. It holds at
+    most ``maxsize`` values or, given a ``weigh`` function returning
+    the (estimated) size of a value, values whose sizes add up to at
+    most ``maxsize``.
+
+    Values stored here outlive transactions, so they must not
+    be (or reference) persistent objects.
+    """
+
+    def __init__(self, maxsize=1000, weigh=None):
+        self.maxsize = maxsize
+        self.weigh = weigh
+        self.weight = 0
+        self._lock = RLock()
+        self._data = OrderedDict()
+        self._weights = {}
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def _weigh(self, value):
+        return 1 if self.weigh is None else self.weigh(value)
+
+    def _remove(self, key, default=None):
+        value = self._data.pop(key, default)
+        self.weight -= self._weights.pop(key, 0)
+        return value
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                return default
+            self._data[key] = value
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._remove(key)
+            weight = self._weigh(value)
+            if weight > self.maxsize:
+                # would evict everything else
+                return value
+            self._data[key] = value
+            self._weights[key] = weight
+            self.weight += weight
+            while self.weight > self.maxsize:
+                self._remove(next(iter(self._data)))
+        return value
+    __setitem__ = set
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._remove(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._weights.clear()
+            self.weight = 0
+
+
+class ValidatedLRUCache(LRUCache):
+    """
+    A :class:`LRUCache` whose values are stored along with a validator;
+    a value is only returned if its validator matches the one given.
+    """
+
+    _missing = object()
+
+    def _weigh(self, value):
+        # stored as (validator, value)
+        return LRUCache._weigh(self, value[1])
+
+    def query(self, key, validator, default=None):
+        stored = LRUCache.get(self, key, self._missing)
+        if stored is self._missing or stored[0] != validator:
+            return default
+        return stored[1]
+
+    def store(self, key, validator, value):
+        self.set(key, (validator, value))
+        return value
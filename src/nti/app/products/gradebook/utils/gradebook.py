@@ -7,9 +7,6 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import absolute_import
 
-from six import string_types
-from six import integer_types
-
 from zope import component
 from zope import interface
 from zope import lifecycleevent
@@ -34,6 +31,8 @@ from nti.app.products.gradebook.grading import IGradeBookGradingPolicy
 from nti.app.products.gradebook.interfaces import IGradeBook
 from nti.app.products.gradebook.interfaces import GradeRemovedEvent
 
+from nti.app.products.gradebook.normalization import grade_number
+
 from nti.assessment.interfaces import IPlaceholderAssignmentSubmission
 
 from nti.assessment.submission import AssignmentSubmission
@@ -75,18 +74,7 @@ def numeric_grade_val(grade_val):
     Convert the grade's possible char "number - letter" scheme to a number,
     or None.
     """
-    result = None
-    if isinstance(grade_val, string_types):
-        try:
-            if grade_val.endswith(' -'):
-                result = float(grade_val.split()[0])
-            else:
-                result = float(grade_val)
-        except ValueError:
-            pass
-    elif isinstance(grade_val, (integer_types, float)):
-        result = grade_val
-    return result
+    return grade_number(grade_val)
 
 
 def mark_btree_bucket_as_changed(grade):
@@ -244,7 +232,7 @@ def set_grade_by_assignment_history_item(item, overwrite=False):
             # - or if we must accept most recent
             # Take the current grade if we want the highest graded submission
             # and our new grade is higher than the previous grade
-            numeric_val = numeric_grade_val(grade.value)
+            numeric_val = grade.numeric_value
             if grade.value is None or overwrite or most_recent:
                 grade.value = grade.AutoGrade
             elif not most_recent and grade.AutoGrade and grade.AutoGrade > numeric_val:
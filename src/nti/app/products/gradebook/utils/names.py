@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Cached parsing of user names for sorting and display.
+
+.. $Id$
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+from collections import namedtuple
+
+import nameparser
+
+from nti.app.products.gradebook.utils import replace_username
+
+from nti.app.products.gradebook.utils.cache import ValidatedLRUCache
+
+from nti.dataserver.users.interfaces import IFriendlyNamed
+
+#: How many parsed user names we keep around per process
+NAME_CACHE_SIZE = 20000
+
+logger = __import__('logging').getLogger(__name__)
+
+
+UserNameKeys = namedtuple('UserNameKeys',
+                          ('username', 'display_username', 'realname',
+                           'first', 'last', 'alias', 'realname_sort_key'))
+
+
+def _parse_user_names(username, realname, alias, named):
+    first = last = u''
+    if realname and '@' not in realname:
+        human_name = nameparser.HumanName(realname)
+        first = human_name.first or u''
+        last = human_name.last or u''
+    parts = named.get_searchable_realname_parts() if realname else None
+    if parts:
+        # last name first
+        realname_sort_key = u' '.join(reversed(parts)).lower()
+    else:
+        realname_sort_key = None
+    return UserNameKeys(username, replace_username(username), realname,
+                        first, last, alias, realname_sort_key)
+
+
+_name_cache = ValidatedLRUCache(NAME_CACHE_SIZE)
+
+
+def get_user_name_keys(user):
+    """
+    Return the :class:`UserNameKeys` of the given user.
+
+    Parsed names are cached by username and validated against the
+    current realname and alias of the user, so profile modifications
+    are picked up on the next call.
+    """
+    username = user.username
+    named = IFriendlyNamed(user)
+    realname = named.realname or u''
+    alias = named.alias
+    validator = (realname, alias)
+    result = _name_cache.query(username, validator)
+    if result is None:
+        result = _parse_user_names(username, realname, alias, named)
+        _name_cache.store(username, validator, result)
+    return result
+
+
+def get_sortable_last_name(name_keys):
+    """
+    Return the last name of the given :class:`UserNameKeys` users are
+    sorted by; empty for users without a real name.
+    """
+    if name_keys.realname == name_keys.username:
+        return u''
+    return name_keys.last
@@ -8,19 +8,34 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import absolute_import
 
+import csv
+import hashlib
+
+from calendar import timegm
+
+from pyramid import httpexceptions as hexc
+
 from pyramid.interfaces import IRequest
 
-from six import string_types
+import six
+from six import StringIO
 
 from zope import component
 from zope import interface
 
 from zope.traversing.interfaces import IPathAdapter
 
+from ZODB.TimeStamp import TimeStamp
+
 from nti.app.products.gradebook.interfaces import IGradeBook
 
+from nti.app.products.gradebook.normalization import grade_parts
+
 from nti.contenttypes.courses.interfaces import ICourseInstance
 
+#: Size (in characters) of the chunks written by :func:`iter_csv_chunks`
+CSV_CHUNK_SIZE = 64 * 1024
+
 logger = __import__('logging').getLogger(__name__)
 
 
@@ -28,15 +43,93 @@ def _get_grade_parts(grade_value):
     """
     Convert the webapp's "number - letter" scheme to a tuple.
     """
-    result = (grade_value,)
-    if grade_value and isinstance(grade_value, string_types):
-        try:
-            values = grade_value.split()
-            values[0] = float(values[0])
-            result = tuple(values)
-        except ValueError:
-            pass
-    return result
+    return grade_parts(grade_value)
+
+
+def iter_csv_chunks(rows, chunk_size=CSV_CHUNK_SIZE):
+    """
+    Serialize the given rows as CSV, yielding chunks of encoded data
+    suitable for a response ``app_iter``. Rows are only consumed as
+    chunks are requested, so callers can produce them lazily.
+
+    The rows are consumed after the view returns (and possibly after
+    the transaction ends), so they must not load persistent objects.
+    """
+    buf = StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow(row)
+        if buf.tell() >= chunk_size:
+            data = buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+            yield data.encode('utf-8') if isinstance(data, six.text_type) else data
+    data = buf.getvalue()
+    if data:
+        yield data.encode('utf-8') if isinstance(data, six.text_type) else data
+
+
+def stamp_time(stamp):
+    """
+    Return the commit time of the given counter stamp (see
+    :meth:`.GradeBook.change_stamp`), or 0 if it was never changed.
+    """
+    if not stamp:
+        return 0
+    return TimeStamp(stamp[1]).timeTime()
+
+
+class ConditionalGetMixin(object):
+    """
+    Answers conditional GETs (``If-None-Match``, ``If-Modified-Since``)
+    of views whose results only depend on the committed state of a few
+    cheap validators, without computing the results.
+    """
+
+    def _conditional_validator(self):
+        """
+        Return a value identifying the state the result depends on,
+        or None if it cannot be validated.
+        """
+        return None
+
+    def _conditional_last_modified(self):
+        return None
+
+    def _conditional_etag(self, validator):
+        request = self.request
+        params = sorted(request.params.items())
+        username = getattr(self.remoteUser, 'username', None)
+        data = repr((request.path, username, params, validator))
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+    def _not_modified_response(self):
+        """
+        Set the validators of the current response, returning a
+        ``304 Not Modified`` response if the client has the result.
+        """
+        validator = self._conditional_validator()
+        if validator is None:
+            return None
+        request = self.request
+        etag = self._conditional_etag(validator)
+        last_modified = self._conditional_last_modified()
+
+        if request.if_none_match:
+            not_modified = etag in request.if_none_match
+        elif request.if_modified_since and last_modified:
+            since = timegm(request.if_modified_since.utctimetuple())
+            not_modified = int(last_modified) <= since
+        else:
+            not_modified = False
+
+        response = hexc.HTTPNotModified() if not_modified else request.response
+        response.etag = etag
+        if last_modified:
+            response.last_modified = last_modified
+        response.cache_control.private = True
+        response.cache_control.must_revalidate = True
+        return response if not_modified else None
 
 
 @interface.implementer(IPathAdapter)
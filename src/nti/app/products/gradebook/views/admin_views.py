@@ -8,9 +8,6 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import absolute_import
 
-import csv
-from io import BytesIO
-
 from pyramid import httpexceptions as hexc
 
 from pyramid.view import view_config
@@ -40,13 +37,18 @@ from nti.app.products.gradebook import MessageFactory as _
 from nti.app.products.gradebook.assignments import synchronize_gradebook
 
 from nti.app.products.gradebook.index import get_grade_catalog
+from nti.app.products.gradebook.index import reindex_grade_submission
 
 from nti.app.products.gradebook.interfaces import IGradeBook
 from nti.app.products.gradebook.interfaces import IGradeScheme
 from nti.app.products.gradebook.interfaces import IGradeBookEntry
 
+from nti.app.products.gradebook.matrix import get_grade_matrix
+
 from nti.app.products.gradebook.utils import replace_username
 
+from nti.app.products.gradebook.views import iter_csv_chunks
+
 from nti.contenttypes.courses.interfaces import ICourseCatalog
 from nti.contenttypes.courses.interfaces import ICourseInstance
 from nti.contenttypes.courses.interfaces import ICourseCatalogEntry
@@ -128,31 +130,30 @@ class CourseGradesView(AbstractAuthenticatedView):
         if usernames:
             usernames = {x.lower() for x in usernames.split(',')}
 
-        bio = BytesIO()
-        csv_writer = csv.writer(bio)
-
-        # header
-        header = ['username', 'part', 'entry', 'assignment', 'grade']
-        csv_writer.writerow(header)
-
-        book = IGradeBook(course)
-        # pylint: disable=too-many-function-args
-        for part_name, part in tuple(book.items()):
-            for name, entry in tuple(part.items()):
-                for username, grade in tuple(entry.items()):
-                    username = username.lower()
-                    if usernames and username not in usernames:
+        matrix = get_grade_matrix(course)
+        # Display names may need the database, resolve them before
+        # we start streaming.
+        display_names = {
+            x: replace_username(x) for x in matrix.usernames
+            if not usernames or x in usernames
+        }
+
+        def _rows():
+            # header
+            yield ['username', 'part', 'entry', 'assignment', 'grade']
+            for col, column in enumerate(matrix.columns):
+                for username, cell in matrix.iter_column(col):
+                    if username not in display_names:
                         continue
-                    assignmentId = grade.assignmentId
-                    value = _tx_grade(grade.value)
+                    value = _tx_grade(cell.value)
                     value = value if value is not None else ''
-                    row_data = [replace_username(username),
-                                part_name, name,
-                                assignmentId, value]
-                    csv_writer.writerow([_tx_string(x) for x in row_data])
+                    row_data = [display_names[username],
+                                column.part_name, column.entry_name,
+                                column.assignment_id, value]
+                    yield [_tx_string(x) for x in row_data]
 
         response = self.request.response
-        response.body = bio.getvalue()
+        response.app_iter = iter_csv_chunks(_rows())
         response.content_disposition = 'attachment; filename="grades.csv"'
         return response
 
@@ -305,6 +306,7 @@ class RebuildGradeCatalogView(AbstractAuthenticatedView):
                     doc_id = intids.queryId(grade)
                     if doc_id is not None:
                         catalog.index_doc(doc_id, grade)
+                        reindex_grade_submission(grade, None, catalog, intids)
                         metadata_queue_add(doc_id, grade)
                         count += 1
         return count
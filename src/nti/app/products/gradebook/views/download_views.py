@@ -8,11 +8,7 @@ from __future__ import print_function, absolute_import, division
 
 logger = __import__('logging').getLogger(__name__)
 
-import csv
 import six
-import nameparser
-from six import StringIO
-from collections import defaultdict
 
 from zope import component
 
@@ -31,10 +27,15 @@ from nti.app.products.courseware.interfaces import ICourseInstanceEnrollment
 from nti.app.products.gradebook import MessageFactory as _
 
 from nti.app.products.gradebook.interfaces import IGradeBook
-from nti.app.products.gradebook.interfaces import IExcusedGrade
 from nti.app.products.gradebook.interfaces import FINAL_GRADE_NAMES
 from nti.app.products.gradebook.interfaces import NO_SUBMIT_PART_NAME
 
+from nti.app.products.gradebook.matrix import get_grade_matrix
+
+from nti.app.products.gradebook.utils.names import get_user_name_keys
+
+from nti.app.products.gradebook.views import iter_csv_chunks
+
 from nti.base.interfaces import DEFAULT_CONTENT_TYPE
 
 from nti.contenttypes.courses.interfaces import ICourseInstance
@@ -42,13 +43,10 @@ from nti.contenttypes.courses.interfaces import ICourseCatalogEntry
 
 from nti.dataserver import authorization as nauth
 
-from nti.dataserver.users.interfaces import IUserProfile
 from nti.dataserver.users.interfaces import IProfileDisplayableSupplementalFields
 
 from nti.dataserver.users.users import User
 
-from nti.externalization.interfaces import LocatedExternalList
-
 from nti.mailer.interfaces import IEmailAddressable
 
 from nti.namedfile.file import safe_filename
@@ -56,6 +54,30 @@ from nti.namedfile.file import safe_filename
 from nti.ntiids.ntiids import find_object_with_ntiid
 
 
+def _tx_string(val):
+    # At least in python 2, the CSV writer only works correctly with
+    # str objects, implicitly encoding otherwise.
+    if isinstance(val, six.text_type):
+        val = val.encode('utf-8')
+    return val
+
+
+def _tx_grade(value):
+    # Note that the webapp tends to send string values even when the user
+    # typed a number: "75 -". For export purposes, if we can reverse that to a number,
+    # we want it to be a number.
+    if not isinstance(value, six.string_types):
+        return value
+    if value.endswith(' -'):
+        try:
+            return int(value[:-2])
+        except ValueError:
+            try:
+                return float(value[:-2])
+            except ValueError:
+                return _tx_string(value)
+
+
 def get_valid_assignment(entry, course):
     """
     We only want entries that point to assignments that exist and are not
@@ -130,12 +152,10 @@ class GradebookDownloadView(AbstractAuthenticatedView):
         user = User.get_user(username)
         firstname = lastname = realname = ''
         if user is not None:
-            named_user = IUserProfile(user)
-            realname = named_user.realname
-            if named_user.realname and '@' not in named_user.realname:
-                human_name = nameparser.HumanName(named_user.realname)
-                lastname = human_name.last or ''
-                firstname = human_name.first or ''
+            name_keys = get_user_name_keys(user)
+            realname = name_keys.realname or None
+            lastname = name_keys.last
+            firstname = name_keys.first
         result = {'firstName': firstname,
                   'lastName': lastname,
                   'username': username,
@@ -184,28 +204,53 @@ class GradebookDownloadView(AbstractAuthenticatedView):
                 data.append(user_info_dict.get(supp_field, ''))
         return data
 
+    def _get_user_row_data(self, username, course, predicate):
+        """
+        Return the leading (identifying) columns for the user, or None
+        if the user should not be exported.
+        """
+        user = User.get_user(username)
+        if not user or not predicate(course, user):
+            return None
+        # The matrix lowercases usernames, export them as stored
+        username = user.username
+        user_info_dict = self._get_user_info_dict(username)
+        firstname = user_info_dict.get('firstName')
+        lastname = user_info_dict.get('lastName')
+        realname = user_info_dict.get('realname')
+        email_addressable = IEmailAddressable(user, None)
+        email = email_addressable.email if email_addressable else None
+
+        data = [username, firstname, lastname, realname, email]
+        data.extend(self._get_supplemental_data(user_info_dict))
+        sort_key = (lastname, firstname, username)
+        return sort_key, [_tx_string(x) for x in data]
+
     def __call__(self):
         gradebook = self.request.context
         course = ICourseInstance(gradebook)
         predicate = self._make_enrollment_predicate()
+        matrix = get_grade_matrix(gradebook)
+        positions = {
+            (x.part_name, x.entry_name): idx for idx, x in enumerate(matrix.columns)
+        }
 
-        # We build a dictionary of {user_data: {Assignment: Grade} }, where
-        # user_data contains first and last names, the username, and the realname.
-        # (This is to avoid parsing names more often than we need to.)
         # We keep track of known assignment names so we can sort appropriately;
         # it is keyed by the column name (as that's the only thing guaranteed
-        # to be unique) and the value is a sortable key.
-        usernames_to_assignment_dict = defaultdict(dict)
-        user_info_dicts = {}
+        # to be unique) and the value is a sortable key. Grades are read
+        # from the (plain data) grade matrix columns of each assignment,
+        # which lets us stream the rows out.
         # (assignment_ntiid, assignment_title) -> data
         seen_assignment_keys_to_start_time = dict()
-        final_grade_entry = None
+        assignment_keys_to_columns = dict()
+        final_grade_column = None
 
         for part in gradebook.values():
             for name, entry in part.items():
+                col = positions.get((part.__name__, name))
                 if	    part.__name__ == NO_SUBMIT_PART_NAME \
                     and name in FINAL_GRADE_NAMES:
-                    final_grade_entry = entry
+                    final_grade_column = col
                     continue
                 assignment = get_valid_assignment(entry, course)
                 if assignment is None:
@@ -214,29 +259,37 @@ class GradebookDownloadView(AbstractAuthenticatedView):
                 assignment_key = (assignment.ntiid, assignment.title)
                 sort_key = self._get_sort_key(entry, course)
                 seen_assignment_keys_to_start_time[assignment_key] = sort_key
-                for username, grade in entry.items():
-                    if username not in user_info_dicts:
-                        user_info_dicts[username] = self._get_user_info_dict(username)
-                    user_dict = usernames_to_assignment_dict[username]
-                    # This should not be possible anymore
-                    if assignment_key in user_dict:
-                        raise ValueError("Two entries in different part with same name")
-                    user_dict[assignment_key] = grade
+                columns = assignment_keys_to_columns.setdefault(assignment_key, [])
+                if col is not None:
+                    columns.append(col)
 
         sorted_assignment_keys = sorted(seen_assignment_keys_to_start_time,
                                         key=seen_assignment_keys_to_start_time.get)
-
-        # Now we can build up the rows.
-        rows = LocatedExternalList()
-        rows.__name__ = self.request.view_name
-        rows.__parent__ = self.request.context
-
-        def _tx_string(val):
-            # At least in python 2, the CSV writer only works correctly with
-            # str objects, implicitly encoding otherwise.
-            if isinstance(val, six.text_type):
-                val = val.encode('utf-8')
-            return val
+        sorted_columns = [
+            assignment_keys_to_columns[x] for x in sorted_assignment_keys
+        ]
+
+        # Only users with grades are exported
+        usernames = set()
+        for columns in sorted_columns:
+            assignment_users = set()
+            for col in columns:
+                for username, unused_cell in matrix.iter_column(col):
+                    # This should not be possible anymore
+                    if username in assignment_users:
+                        raise ValueError("Two entries in different part with same name")
+                    assignment_users.add(username)
+            usernames.update(assignment_users)
+
+        # Resolve the user data now, we only want plain data once
+        # we start streaming.
+        users = []
+        for username in usernames:
+            user_data = self._get_user_row_data(username, course, predicate)
+            if user_data is not None:
+                users.append((user_data[0], matrix.row_index(username), user_data[1]))
+        # Sort by last name, then first name, then username
+        users.sort(key=lambda x: x[0])
 
         # First a header row. Note that we are allowed to use multiple columns
         # to identify students.
@@ -251,82 +304,49 @@ class GradebookDownloadView(AbstractAuthenticatedView):
         headers.extend(['Adjusted Final Grade Numerator',
                         'Adjusted Final Grade Denominator',
                         'End-of-Line Indicator'])
-        rows.append(headers)
-
-        # Now a row for each user and each assignment in the same order.
-        # Note that the webapp tends to send string values even when the user
-        # typed a number: "75 -". For export purposes, if we can reverse that to a number,
-        # we want it to be a number.
-        def _tx_grade(value):
-            if not isinstance(value, six.string_types):
-                return value
-            if value.endswith(' -'):
-                try:
-                    return int(value[:-2])
-                except ValueError:
-                    try:
-                        return float(value[:-2])
-                    except ValueError:
-                        return _tx_string(value)
 
-        # Sort by last name, then first name, then username
-        for username, user_info_dict in sorted(user_info_dicts.items(),
-                                               key=lambda kv: (kv[1].get('lastName'),
-                                                               kv[1].get('firstName'),
-                                                               kv[1].get('username'))):
-            user = User.get_user(username)
-            if not user or not predicate(course, user):
-                continue
-            firstname = user_info_dict.get('firstName')
-            lastname = user_info_dict.get('lastName')
-            realname = user_info_dict.get('realname')
-            email_addressable = IEmailAddressable(user, None)
-            email = email_addressable.email if email_addressable else None
-
-            data = [username, firstname, lastname, realname, email]
-            data.extend(self._get_supplemental_data(user_info_dict))
-            row = [_tx_string(x) for x in data]
-
-            user_data_dict = usernames_to_assignment_dict.get(username)
-            for assignment_key in sorted_assignment_keys:
-                grade_val = ""
-                if assignment_key in user_data_dict:
-                    user_grade = user_data_dict[assignment_key]
-                    grade_val = user_grade.value
-                    # For CS1323, we need to expose Excused grades. It's not entirely clear
-                    # how to do so in a D2L import-compatible way, but we've seen text
-                    # exported values (from our system) anyway, which are probably not
-                    # imported into D2L.
-                    if IExcusedGrade.providedBy(user_grade):
-                        grade_val = _(u'Excused')
-                    else:
-                        grade_val = _tx_grade(grade_val)
-                row.append(grade_val)
-
-            if final_grade_entry:
-                final_grade = final_grade_entry.get(username)
-            else:
+        def _rows():
+            yield headers
+            # Now a row for each user and each assignment in the same order.
+            for unused_key, row_index, data in users:
+                row = list(data)
+                for columns in sorted_columns:
+                    grade_val = ""
+                    for col in columns:
+                        cell = matrix.cell(row_index, col)
+                        if cell is None:
+                            continue
+                        # For CS1323, we need to expose Excused grades. It's not entirely clear
+                        # how to do so in a D2L import-compatible way, but we've seen text
+                        # exported values (from our system) anyway, which are probably not
+                        # imported into D2L.
+                        if cell.excused:
+                            grade_val = _(u'Excused')
+                        else:
+                            grade_val = _tx_grade(cell.value)
+                        break
+                    row.append(grade_val)
+
                 final_grade = None
-            row.append(_tx_grade(final_grade.value) if final_grade else 0)
-            row.append(100)
+                if final_grade_column is not None:
+                    final_grade = matrix.cell(row_index, final_grade_column)
+                row.append(_tx_grade(final_grade.value) if final_grade else 0)
+                row.append(100)
 
-            # End-of-line
-            row.append('#')
-            rows.append(row)
+                # End-of-line
+                row.append('#')
+                yield row
 
         # Anyone enrolled but not submitted gets a blank row
         # at the bottom...except that breaks the D2L model
 
-        # Convert to CSV
+        # Stream as CSV
         # In the future, we might switch based on the accept header
         # and provide it as json or XLS alternately
-        buf = StringIO()
-        writer = csv.writer(buf)
-        writer.writerows(rows)
-
         filename = self._get_filename(course)
         content_disposition = 'attachment; filename="%s"' % safe_filename(filename)
-        self.request.response.body = buf.getvalue()
-        self.request.response.content_disposition = content_disposition
-        self.request.response.content_type = DEFAULT_CONTENT_TYPE
-        return self.request.response
+        response = self.request.response
+        response.app_iter = iter_csv_chunks(_rows())
+        response.content_disposition = content_disposition
+        response.content_type = DEFAULT_CONTENT_TYPE
+        return response
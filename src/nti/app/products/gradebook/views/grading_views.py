@@ -28,7 +28,7 @@ from nti.app.products.gradebook import MessageFactory as _
 
 from nti.app.products.gradebook.grading import VIEW_CURRENT_GRADE
 
-from nti.app.products.gradebook.grading.utils import calculate_predicted_grade
+from nti.app.products.gradebook.grading.predicted import get_predicted_grade
 
 from nti.app.products.gradebook.interfaces import IGradeBook
 from nti.app.products.gradebook.interfaces import ACT_VIEW_GRADES
@@ -37,6 +37,8 @@ from nti.app.products.gradebook.interfaces import NO_SUBMIT_PART_NAME
 
 from nti.appserver.pyramid_authorization import has_permission
 
+from nti.common.string import is_true
+
 from nti.contenttypes.courses.grading import find_grading_policy_for_course
 
 from nti.contenttypes.courses.interfaces import ICourseInstance
@@ -78,6 +80,10 @@ class CurrentGradeView(AbstractAuthenticatedView):
     course's `ICourseGradePolicy` (required). The caller must
     have `ACT_VIEW_GRADES` permission on the gradebook to view
     this for others.
+
+    Predicted grades are cached until the user's grades, the policy or
+    the assignment dates change; pass ``recompute=true`` to bypass the
+    cache.
     """
 
     def _get_user(self, params):
@@ -147,9 +153,11 @@ class CurrentGradeView(AbstractAuthenticatedView):
             final_grade = None
 
         scheme = params.get('scheme') or u''
-        predicted_grade = calculate_predicted_grade(user,
-                                                    policy,
-                                                    scheme)
+        recompute = is_true(params.get('recompute'))
+        predicted_grade = get_predicted_grade(user,
+                                              policy,
+                                              scheme,
+                                              recompute=recompute)
         if predicted_grade is None and final_grade is None:
             raise hexc.HTTPNotFound()
         if predicted_grade is not None:
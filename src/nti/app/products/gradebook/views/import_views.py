@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+.. $Id$
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import csv
+import codecs
+
+import six
+
+from zope.event import notify
+
+from zope.interface.exceptions import Invalid
+
+from zope.lifecycleevent import ObjectModifiedEvent
+
+from pyramid import httpexceptions as hexc
+
+from pyramid.view import view_config
+
+from nti.app.base.abstract_views import AbstractAuthenticatedView
+
+from nti.app.externalization.error import raise_json_error
+
+from nti.app.externalization.view_mixins import ModeledContentUploadRequestUtilsMixin
+
+from nti.app.products.gradebook import MessageFactory as _
+
+from nti.app.products.gradebook.coalescing import coalesced_grade_events
+
+from nti.app.products.gradebook.interfaces import IGrade
+from nti.app.products.gradebook.interfaces import IGradeBook
+from nti.app.products.gradebook.interfaces import FINAL_GRADE_NAMES
+from nti.app.products.gradebook.interfaces import NO_SUBMIT_PART_NAME
+
+from nti.app.products.gradebook.utils import record_grade_without_submission
+
+from nti.app.products.gradebook.views.download_views import get_valid_assignment
+
+from nti.contenttypes.courses.interfaces import ICourseInstance
+
+from nti.dataserver import authorization as nauth
+
+from nti.dataserver.users.users import User
+
+from nti.externalization.interfaces import LocatedExternalDict
+from nti.externalization.interfaces import StandardExternalFields
+
+ITEMS = StandardExternalFields.ITEMS
+ITEM_COUNT = StandardExternalFields.ITEM_COUNT
+
+#: The suffix of the grade column headers of the gradebook CSV export
+GRADE_COLUMN_SUFFIX = u' Points Grade'
+
+logger = __import__('logging').getLogger(__name__)
+
+
+def _text(value):
+    if isinstance(value, bytes):
+        value = value.decode('utf-8')
+    return value
+
+
+def _read_csv_rows(data):
+    """
+    Return the header and the rows (as dictionaries) of the given
+    CSV data.
+    """
+    if isinstance(data, six.text_type):
+        data = data.encode('utf-8')
+    if data.startswith(codecs.BOM_UTF8):
+        data = data[len(codecs.BOM_UTF8):]
+    lines = data.splitlines()
+    if not six.PY2:
+        lines = [x.decode('utf-8') for x in lines]
+    reader = csv.reader(lines)
+    header = [_text(x).strip() for x in next(reader, ())]
+    rows = []
+    for row in reader:
+        if any(row):
+            rows.append(dict(zip(header, (_text(x) for x in row))))
+    return header, rows
+
+
+def _grade_text(value):
+    """
+    Normalize a grade value for comparison; the webapp sends
+    values such as "75 -".
+    """
+    if value is None:
+        return u''
+    value = six.text_type(value).strip()
+    if value.endswith(u' -'):
+        value = value[:-2].strip()
+    try:
+        return six.text_type(float(value))
+    except ValueError:
+        return value
+
+
+@view_config(route_name='objects.generic.traversal',
+             permission=nauth.ACT_UPDATE,
+             renderer='rest',
+             context=IGradeBook,
+             name='ImportGrades',
+             request_method='POST')
+class GradebookImportView(AbstractAuthenticatedView,
+                          ModeledContentUploadRequestUtilsMixin):
+    """
+    Sets many grades in the gradebook at once, in a single transaction.
+
+    The input uses the column layout of the gradebook CSV export
+    (``contents.csv``): a ``Username`` column and a ``<title> Points Grade``
+    column per assignment (the assignment NTIID may be used as the header
+    instead). Other columns are ignored, as are blank and excused cells.
+
+    The input is either a CSV (uploaded or as the request body) or a JSON
+    object whose ``Items`` is a list of rows, each a dictionary keyed
+    by column header.
+
+    Rows with errors (e.g. unknown users) are skipped and reported, by
+    their one-based position, in the ``Errors`` of the result; the other
+    rows are applied. Only grades whose values change are written.
+    """
+
+    def _read_rows(self):
+        request = self.request
+        for value in request.POST.values():
+            if hasattr(value, 'file'):
+                return _read_csv_rows(value.file.read())
+        content_type = request.content_type or ''
+        if 'json' in content_type:
+            rows = self.readInput().get(ITEMS) or ()
+            if not isinstance(rows, (list, tuple)):
+                rows = ()
+            rows = [x for x in rows if isinstance(x, dict)]
+            header = []
+            for row in rows:
+                for key in row:
+                    if key not in header:
+                        header.append(key)
+            return header, rows
+        return _read_csv_rows(request.body)
+
+    def _get_entries_by_header(self, header):
+        """
+        Map the grade column headers to gradebook entries. Headers
+        matching more than one entry map to None.
+        """
+        gradebook = self.context
+        course = ICourseInstance(gradebook)
+        titles = dict()
+        for part in gradebook.values():
+            for name, entry in part.items():
+                if      part.__name__ == NO_SUBMIT_PART_NAME \
+                    and name in FINAL_GRADE_NAMES:
+                    continue
+                assignment = get_valid_assignment(entry, course)
+                if assignment is None:
+                    continue
+                key = u'%s%s' % (assignment.title, GRADE_COLUMN_SUFFIX)
+                if titles.get(key, entry) is not entry:
+                    titles[key] = None  # ambiguous
+                else:
+                    titles[key] = entry
+
+        result = dict()
+        for column in header:
+            entry = gradebook.getColumnForAssignmentId(column)
+            if entry is not None:
+                result[column] = entry
+            elif column.endswith(GRADE_COLUMN_SUFFIX):
+                result[column] = titles.get(column)
+        return result
+
+    def _set_grade(self, entry, user, value):
+        """
+        Set the grade of the user, returning whether it was changed.
+        """
+        username = user.username
+        grade = entry.get(username)
+        if grade is not None and _grade_text(grade.value) == _grade_text(value):
+            return False
+        # Validate before creating a placeholder submission and grade
+        # for an ungraded user
+        IGrade['value'].validate(value)
+        if grade is None:
+            # This will create our grade and assignment history,
+            # if necessary.
+            record_grade_without_submission(entry, user, entry.AssignmentId)
+            grade = entry.get(username)
+        grade.creator = self.getRemoteUser().username
+        grade.value = value
+        notify(ObjectModifiedEvent(grade))
+        return True
+
+    def _import_rows(self, rows, columns, errors):
+        seen = set()
+        updated = unchanged = 0
+        for idx, row in enumerate(rows, 1):
+            username = (row.get('Username') or u'').strip()
+            user = User.get_user(username) if username else None
+            if user is None:
+                errors.append({
+                    'Row': idx,
+                    'Username': username,
+                    'message': _(u"User not found."),
+                })
+                continue
+            if user.username.lower() in seen:
+                errors.append({
+                    'Row': idx,
+                    'Username': username,
+                    'message': _(u"Duplicate user row."),
+                })
+                continue
+            seen.add(user.username.lower())
+            for column, entry in columns:
+                value = row.get(column)
+                if isinstance(value, six.string_types):
+                    value = value.strip()
+                if value is None or value == u'' or value == _(u'Excused'):
+                    continue
+                try:
+                    if self._set_grade(entry, user, value):
+                        updated += 1
+                    else:
+                        unchanged += 1
+                except (Invalid, KeyError, TypeError, ValueError) as e:
+                    logger.exception("Cannot import grade for %s in %s",
+                                     username, entry.AssignmentId)
+                    errors.append({
+                        'Row': idx,
+                        'Username': username,
+                        'Column': column,
+                        'message': six.text_type(e),
+                    })
+        return updated, unchanged, seen
+
+    def __call__(self):
+        header, rows = self._read_rows()
+        if 'Username' not in header:
+            raise_json_error(self.request,
+                             hexc.HTTPUnprocessableEntity,
+                             {
+                                 'message': _(u"Missing Username column."),
+                             },
+                             None)
+
+        entries = self._get_entries_by_header(header)
+        errors = []
+        columns = []
+        for column in header:
+            if column not in entries:
+                continue
+            entry = entries[column]
+            if entry is None:
+                errors.append({
+                    'Column': column,
+                    'message': _(u"Grade column matches several assignments."),
+                })
+            elif any(x[1] is entry for x in columns):
+                # The same assignment by NTIID and by title
+                errors.append({
+                    'Column': column,
+                    'message': _(u"Duplicate grade column."),
+                })
+            else:
+                columns.append((column, entry))
+
+        with coalesced_grade_events():
+            updated, unchanged, seen = self._import_rows(rows, columns, errors)
+
+        logger.info("'%s' imported %s grade(s) for %s user(s) in gradebook '%s'",
+                    self.getRemoteUser(), updated, len(seen),
+                    self.context.NTIID)
+
+        result = LocatedExternalDict()
+        result['Updated'] = updated
+        result['Unchanged'] = unchanged
+        result['Errors'] = errors
+        result[ITEM_COUNT] = len(seen)
+        result['TotalItemCount'] = len(rows)
+        return result
@@ -22,10 +22,25 @@ from six import string_types
 
 from zope import component
 
+from zope.cachedescriptors.property import Lazy
+
+from zope.intid.interfaces import IIntIds
+
 from nti.app.base.abstract_views import AbstractAuthenticatedView
 
 from nti.app.externalization.view_mixins import BatchingUtilsMixin
 
+from nti.app.products.gradebook.enrollments import get_enrollment_scopes
+
+from nti.app.products.gradebook.gradebook import gradebook_for_course
+
+from nti.app.products.gradebook.index import IX_GRADE_COURSE
+from nti.app.products.gradebook.index import IX_ASSIGNMENT_ID
+from nti.app.products.gradebook.index import IX_FEEDBACK_COUNT
+from nti.app.products.gradebook.index import IX_SUBMITTED_TIME
+
+from nti.app.products.gradebook.index import get_grade_catalog
+
 from nti.app.products.gradebook.interfaces import ACT_VIEW_GRADES
 
 from nti.app.products.gradebook.interfaces import IGradeBookEntry
@@ -33,16 +48,17 @@ from nti.app.products.gradebook.interfaces import ISubmittedAssignmentHistoryBas
 
 from nti.app.products.gradebook.utils import replace_username
 
+from nti.app.products.gradebook.utils.names import get_user_name_keys
+
+from nti.app.products.gradebook.views import stamp_time
+from nti.app.products.gradebook.views import ConditionalGetMixin
+
 from nti.appserver.interfaces import IIntIdUserSearchPolicy
 
 from nti.appserver.pyramid_authorization import has_permission
 
-from nti.contenttypes.courses.interfaces import ES_CREDIT
-from nti.contenttypes.courses.interfaces import ES_CREDIT_DEGREE
-from nti.contenttypes.courses.interfaces import ES_CREDIT_NONDEGREE
-
 from nti.contenttypes.courses.interfaces import ICourseInstance
-from nti.contenttypes.courses.interfaces import ICourseEnrollments
+from nti.contenttypes.courses.interfaces import ICourseCatalogEntry
 
 from nti.dataserver import authorization as nauth
 
@@ -50,8 +66,6 @@ from nti.dataserver.interfaces import IUser
 
 from nti.dataserver.users.entity import Entity
 
-from nti.dataserver.users.interfaces import IFriendlyNamed
-
 from nti.externalization.interfaces import StandardExternalFields
 
 from nti.externalization.interfaces import LocatedExternalDict
@@ -72,7 +86,8 @@ ITEMS = StandardExternalFields.ITEMS
              context=ISubmittedAssignmentHistoryBase,
              permission=nauth.ACT_READ)
 class SubmittedAssignmentHistoryGetView(AbstractAuthenticatedView,
-                                        BatchingUtilsMixin):
+                                        BatchingUtilsMixin,
+                                        ConditionalGetMixin):
     """
     Support retrieving the submitted assignment history (and summaries)
     typically for a particular column of the gradebook.
@@ -173,6 +188,11 @@ class SubmittedAssignmentHistoryGetView(AbstractAuthenticatedView,
             realname and alias, and does prefix matching, the same as
             the normal search algorithm for users. This is independent
             of filtering.
+
+    Responses carry an ``ETag`` (and ``Last-Modified``) derived from
+    the committed state of the grades, enrollments, submissions and
+    user names of the course; matching conditional requests are
+    answered with ``304 Not Modified``.
     """
 
     _BATCH_LINK_DROP_PARAMS = BatchingUtilsMixin._BATCH_LINK_DROP_PARAMS + \
@@ -183,6 +203,26 @@ class SubmittedAssignmentHistoryGetView(AbstractAuthenticatedView,
         self.context = request.context
         self.grade_column = IGradeBookEntry(self.context)
 
+    @Lazy
+    def _gradebook(self):
+        return gradebook_for_course(ICourseInstance(self.context), False)
+
+    def _conditional_stamps(self):
+        book = self._gradebook
+        if book is None:
+            return (None,)
+        return (book.change_stamp, book.enrollment_stamp,
+                book.submission_stamp, book.name_stamp)
+
+    def _conditional_validator(self):
+        stamps = self._conditional_stamps()
+        return None if None in stamps else stamps
+
+    def _conditional_last_modified(self):
+        times = [stamp_time(x) for x in self._conditional_stamps()]
+        times.append(self.grade_column.lastModified or 0)
+        return max(times)
+
     def _make_force_placeholder_usernames(self, sorted_usernames, sorted_reverse):
         """
         Given the sorted usernames as a list, see if we can pick out the usernames
@@ -244,11 +284,8 @@ class SubmittedAssignmentHistoryGetView(AbstractAuthenticatedView,
             user = Entity.get_entity(username)
             if user is None:  # deleted
                 return username
-            parts = IFriendlyNamed(user).get_searchable_realname_parts()
-            if not parts:
-                return username
-            parts = reversed(parts)  # last name first
-            return u' '.join(parts).lower()
+            # The realname parts, last name first, cached across requests
+            return get_user_name_keys(user).realname_sort_key or username
 
         filter_usernames = sorted(filter_usernames,
                                   key=_key,
@@ -302,7 +339,90 @@ class SubmittedAssignmentHistoryGetView(AbstractAuthenticatedView,
         assert len(sorted_usernames_by_grade_attribute) == len(sorted_usernames)
         return sorted_usernames_by_grade_attribute, users_with_grades, users_without_grades
 
+    def _index_sorted_usernames(self, index_name, filter_usernames, sort_reverse, limit):
+        """
+        Return up to `limit` of the usernames, in the order of their
+        grades in the given grade catalog index, or None if the index
+        cannot be used. Only the grades we walk past are loaded.
+        """
+        catalog = get_grade_catalog()
+        if catalog is None or index_name not in catalog:
+            return None
+        course = ICourseInstance(self.context)
+        entry = ICourseCatalogEntry(course, None)
+        if entry is None or not self.grade_column.AssignmentId:
+            return None
+        query = {
+            IX_ASSIGNMENT_ID: {'any_of': (self.grade_column.AssignmentId,)},
+            IX_GRADE_COURSE: {'any_of': (entry.ntiid,)},
+        }
+        doc_ids = catalog.apply(query)
+        if not doc_ids:
+            return []
+        index = catalog[index_name]
+        values = index.documents_to_values
+        intids = component.getUtility(IIntIds)
+        result = []
+        seen = set()
+        last_value = None
+        for doc_id in index.sort(doc_ids, reverse=sort_reverse):
+            value = values.get(doc_id)
+            # Finish the group of ties at the end of the batch
+            if len(result) >= limit and value != last_value:
+                break
+            grade = intids.queryObject(doc_id)
+            username = getattr(grade, 'Username', None)
+            username = username.lower() if username else None
+            if username in filter_usernames and username not in seen:
+                seen.add(username)
+                result.append((value, username))
+                last_value = value
+        # Ties are ordered by username, as when sorting loaded items
+        result.sort(reverse=sort_reverse)
+        return [x[1] for x in result[:limit]]
+
+    def _do_index_ordered_sort(self, index_name, filter_usernames, sort_reverse):
+        """
+        When a plain page (``batchSize`` and ``batchStart``) is requested,
+        order the users by scanning the given grade catalog index until
+        the page is produced; users past the page (or without a value)
+        only get placeholders. Returns None if this cannot be done, in
+        which case callers must sort the loaded items themselves.
+        """
+        batch_size, batch_start = self._get_batch_size_start()
+        if batch_size is None or batch_start is None:
+            return None
+        for x in self._BATCH_LINK_DROP_PARAMS:
+            if self.request.params.get(x):
+                return None
+
+        end_idx = batch_start + batch_size
+        head = self._index_sorted_usernames(index_name,
+                                            filter_usernames,
+                                            sort_reverse,
+                                            end_idx)
+        if head is None:
+            return None
+        # Everyone without an indexed value comes at the end,
+        # by username
+        head_set = set(head)
+        sorted_usernames = head + [
+            x for x in sorted(filter_usernames, reverse=sort_reverse)
+            if x not in head_set
+        ]
+        placeholders = set(sorted_usernames[:batch_start])
+        placeholders.update(sorted_usernames[end_idx:])
+        return self.context.items(usernames=sorted_usernames,
+                                  placeholder=None,
+                                  forced_placeholder_usernames=placeholders)
+
     def _do_sort_feedbackCount(self, filter_usernames, sort_reverse):
+        items_iter = self._do_index_ordered_sort(IX_FEEDBACK_COUNT,
+                                                 filter_usernames,
+                                                 sort_reverse)
+        if items_iter is not None:
+            return items_iter
+
         x = self.__sort_usernames_by_submission(filter_usernames,
                                                 sort_reverse,
                                                 key=None)
@@ -378,7 +498,13 @@ class SubmittedAssignmentHistoryGetView(AbstractAuthenticatedView,
         #                                           sort_reverse,
         #                                           key=lambda x: x[1].createdTime)
 
-        # So now this is almost exactly like sorting by feedback count
+        items_iter = self._do_index_ordered_sort(IX_SUBMITTED_TIME,
+                                                 filter_usernames,
+                                                 sort_reverse)
+        if items_iter is not None:
+            return items_iter
+
+        # Otherwise this is almost exactly like sorting by feedback count
         x = self.__sort_usernames_by_submission(filter_usernames,
                                                 sort_reverse,
                                                 key=None)
@@ -445,6 +571,10 @@ class SubmittedAssignmentHistoryGetView(AbstractAuthenticatedView,
         if not has_permission(ACT_VIEW_GRADES, course, request):
             raise hexc.HTTPForbidden()
 
+        response = self._not_modified_response()
+        if response is not None:
+            return response
+
         result = LocatedExternalDict()
         column = context.__parent__
         result.__parent__ = column
@@ -472,38 +602,21 @@ class SubmittedAssignmentHistoryGetView(AbstractAuthenticatedView,
         # listed in usernames, we can sort usernames first to get the correct
         # order. This is especially helpful when paging as we can consume the part
         # of the generator needed.
-        enrollments = ICourseEnrollments(course)
-        everyone_usernames = {
-            x.Principal.username.lower() for x in enrollments.iter_enrollments()
-            if x.Principal is not None
-        }
-        student_usernames = everyone_usernames - {x.id.lower() for x in course.instructors}
+        scopes = get_enrollment_scopes(course)
+        student_usernames = scopes.all
         filter_usernames = student_usernames
         filtered = False
         if filter_names:
             if     'LegacyEnrollmentStatusForCredit' in filter_names \
                 or 'LegacyEnrollmentStatusOpen' in filter_names:
                 filtered = True
-
-                restricted_usernames = ({x.Principal.username.lower()
-                                         for x in enrollments.iter_enrollments()
-                                         # XXX: TODO: Hardcoding the scopes and
-                                         # relationships
-                                         if x.Scope in (ES_CREDIT_NONDEGREE,
-                                                        ES_CREDIT_DEGREE,
-                                                        ES_CREDIT)})
-
-                # instructors are also a member of the restricted set,
-                # so take them out (otherwise the count will be wrong)
-                # (shouldn't be needed to do that on new courses, but necessary
-                # for legacy courses)
+                # instructors are never in these (shared, cached) sets,
+                # which matters for legacy courses where they may
+                # be enrolled
                 if 'LegacyEnrollmentStatusForCredit' in filter_names:
-                    instructors_ids = {
-                        x.id.lower() for x in course.instructors
-                    }
-                    filter_usernames = restricted_usernames - instructors_ids
+                    filter_usernames = scopes.for_credit
                 elif 'LegacyEnrollmentStatusOpen' in filter_names:
-                    filter_usernames = student_usernames - restricted_usernames
+                    filter_usernames = scopes.open
 
             if 'HasSubmission' in filter_names or 'NoSubmission' in filter_names:
                 filtered = True
@@ -517,7 +630,7 @@ class SubmittedAssignmentHistoryGetView(AbstractAuthenticatedView,
 
             # XXX: This is a lie unless we also sort (which for all practical use
             # cases, we do) because it depends on placeholders for missing items
-            result['TotalItemCount'] = ICourseEnrollments(course).count_enrollments()
+            result['TotalItemCount'] = scopes.enrollment_count
             result['FilteredTotalItemCount'] = len(filter_usernames)
 
         else:
@@ -573,15 +686,17 @@ class SubmittedAssignmentHistoryGetView(AbstractAuthenticatedView,
             if self.request.params.get('batchAround', ''):
                 batchAround = self.request.params.get('batchAround')
 
-                def batchAroundTest(key_value):
+                def test_ntiid(key_value):
                     return to_external_ntiid_oid(key_value[1]) == batchAround
+                batchAroundTest = test_ntiid
             elif self.request.params.get('batchAroundCreator', ''):
                 # This branch is often handled during sorting, but sometimes
                 # we have to defer it until now.
                 batchAround = self.request.params.get('batchAroundCreator').lower()
 
-                def batchAroundTest(key_value):
+                def test_creator(key_value):
                     return key_value[0].lower() == batchAround
+                batchAroundTest = test_creator
 
             if batchAroundTest:
                 items_iter = self._batch_on_item(items_iter, batchAroundTest)
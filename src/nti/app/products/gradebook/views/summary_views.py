@@ -10,14 +10,18 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import absolute_import
 
-from datetime import datetime
+import heapq
+
+from calendar import timegm
 
-import nameparser
+from datetime import datetime
 
 from zope import component
 
 from zope.cachedescriptors.property import Lazy
 
+from pyramid import httpexceptions as hexc
+
 from pyramid.view import view_config
 
 from nti.app.base.abstract_views import AbstractAuthenticatedView
@@ -27,11 +31,18 @@ from nti.app.assessment.common.history import get_most_recent_history_item
 from nti.app.assessment.interfaces import IUsersCourseAssignmentHistory
 from nti.app.assessment.interfaces import IUsersCourseAssignmentHistoryItemSummary
 
+from nti.app.externalization.error import raise_json_error
+
 from nti.app.externalization.view_mixins import BatchingUtilsMixin
 
+from nti.app.products.gradebook import MessageFactory as _
+
+from nti.app.products.gradebook.enrollments import get_enrollment_scopes
+
 from nti.app.products.gradebook.grading import VIEW_CURRENT_GRADE
 
-from nti.app.products.gradebook.grading.utils import calculate_predicted_grade
+from nti.app.products.gradebook.grading.predicted import get_predicted_grade
+from nti.app.products.gradebook.grading.predicted import get_predicted_grades
 
 from nti.app.products.gradebook.interfaces import ACT_VIEW_GRADES
 from nti.app.products.gradebook.interfaces import FINAL_GRADE_NAMES
@@ -40,25 +51,31 @@ from nti.app.products.gradebook.interfaces import NO_SUBMIT_PART_NAME
 from nti.app.products.gradebook.interfaces import IGradeBook
 from nti.app.products.gradebook.interfaces import IGradeBookEntry
 
-from nti.app.products.gradebook.utils import replace_username
+from nti.app.products.gradebook.rosters import ROSTER_SORTS
+from nti.app.products.gradebook.rosters import SORT_LAST_NAME
+
+from nti.app.products.gradebook.rosters import get_sorted_roster
+from nti.app.products.gradebook.rosters import decode_roster_cursor
+from nti.app.products.gradebook.rosters import encode_roster_cursor
+from nti.app.products.gradebook.rosters import invalidate_sorted_roster
 
+from nti.app.products.gradebook.stamps import committed_stamp
+
+from nti.app.products.gradebook.utils.names import get_user_name_keys
+from nti.app.products.gradebook.utils.names import get_sortable_last_name
+
+from nti.app.products.gradebook.views import stamp_time
 from nti.app.products.gradebook.views import _get_grade_parts
+from nti.app.products.gradebook.views import ConditionalGetMixin
 
 from nti.assessment.interfaces import IQAssignmentDateContext
 
 from nti.contenttypes.courses.grading import find_grading_policy_for_course
 
-from nti.contenttypes.courses.interfaces import ES_CREDIT
 from nti.contenttypes.courses.interfaces import ICourseInstance
-from nti.contenttypes.courses.interfaces import ICourseEnrollments
 from nti.contenttypes.courses.interfaces import ICourseAssignmentCatalog
 from nti.contenttypes.courses.interfaces import get_course_assessment_predicate_for_user
 
-from nti.dataserver.interfaces import IEnumerableEntityContainer
-
-from nti.dataserver.users.interfaces import IUserProfile
-from nti.dataserver.users.interfaces import IFriendlyNamed
-
 from nti.dataserver.users.users import User
 
 from nti.externalization.interfaces import LocatedExternalDict
@@ -102,6 +119,36 @@ class _GradeBookEntryCachingSource(object):
         return result
 
 
+class _AssignmentStatsSource(object):
+    """
+    Per-view lookups of the assignments user stats are computed over.
+    """
+
+    def __init__(self, course, assignments):
+        self.course = course
+        self.assignments = assignments
+
+    @Lazy
+    def by_ntiid(self):
+        return {x.ntiid: x for x in self.assignments}
+
+    @Lazy
+    def past_due(self):
+        """
+        The assignments expecting a submission whose due date has passed.
+        """
+        result = []
+        today = datetime.utcnow()
+        context = IQAssignmentDateContext(self.course)
+        for assignment in self.assignments:
+            if assignment.no_submit or not assignment.parts:
+                continue
+            due_date = context.of(assignment).available_for_submission_ending
+            if due_date and today > due_date:
+                result.append(assignment)
+        return tuple(result)
+
+
 class UserGradeSummary(object):
     """
     A container for user grade summary info.  Most of these fields
@@ -112,38 +159,37 @@ class UserGradeSummary(object):
     __class_name__ = 'UserGradeBookSummary'
 
     def __init__(self, username, grade_entry, course):
-        self.user = User.get_user(username)
+        self._username = username
         self.grade_entry = grade_entry
         self.course = course
 
+    @Lazy
+    def user(self):
+        return User.get_user(self._username)
+
     @Lazy
     def assignment_filter(self):
         return get_course_assessment_predicate_for_user(self.user,
                                                         self.course)
 
+    @Lazy
+    def name_keys(self):
+        return get_user_name_keys(self.user)
+
     @Lazy
     def alias(self):
-        named_user = IFriendlyNamed(self.user)
-        return named_user.alias
+        return self.name_keys.alias
 
     @Lazy
     def last_name(self):
-        username = self.user.username
-        profile = IUserProfile(self.user)
-        lastname = u''
-        realname = profile.realname or u''
-        if realname and '@' not in realname and realname != username:
-            human_name = nameparser.HumanName(realname)
-            lastname = human_name.last or u''
-        return lastname
+        return get_sortable_last_name(self.name_keys)
 
     @Lazy
     def username(self):
         """
         The displayable, sortable username.
         """
-        username = self.user.username
-        return replace_username(username)
+        return self.name_keys.display_username
 
     @Lazy
     def user_grade_entry(self):
@@ -167,7 +213,26 @@ class UserGradeSummary(object):
         if self.grade_value is not None:
             result = _get_grade_parts(self.grade_value)
         else:
-            result = (None, None, bool(self.history_item))
+            result = (None, None, self.has_submission)
+        return result
+
+    @Lazy
+    def _assignment_history_container(self):
+        return component.queryMultiAdapter((self.course, self.user),
+                                           IUsersCourseAssignmentHistory)
+
+    @Lazy
+    def has_submission(self):
+        """
+        Whether the user has submitted our assignment; cheaper than
+        loading the :attr:`history_item` when sorting.
+        """
+        if 'history_item' in self.__dict__:
+            return self.history_item is not None
+        result = False
+        container = self._assignment_history_container
+        if self.grade_entry is not None and container is not None:
+            result = bool(container.get(self.grade_entry.AssignmentId))
         return result
 
     @Lazy
@@ -212,16 +277,13 @@ class UserGradeBookSummary(UserGradeSummary):
 
     __class_name__ = 'UserGradeBookSummary'
 
-    def __init__(self, username, course, assignments, gradebook_cache, grade_entry, grade_policy):
+    def __init__(self, username, course, assignments, gradebook_cache, grade_entry, grade_policy,
+                 stats_source=None):
         super(UserGradeBookSummary, self).__init__(username, grade_entry, course)
         self.assignments = assignments
         self.gradebook_cache = gradebook_cache
         self.grade_policy = grade_policy
-
-    @Lazy
-    def _assignment_history_container(self):
-        return component.queryMultiAdapter((self.course, self.user),
-                                           IUsersCourseAssignmentHistory)
+        self.stats_source = stats_source
 
     def _get_user_submission_count(self, assignment_ntiid):
         """
@@ -234,11 +296,44 @@ class UserGradeBookSummary(UserGradeSummary):
                 result = len(submission_container)
         return result
 
+    def _is_ungraded(self, assignment_ntiid):
+        grade = self.gradebook_cache.get_entry(assignment_ntiid)
+        user_grade = grade.get(self.user.username) if grade is not None else None
+        return  bool(self._get_user_submission_count(assignment_ntiid)) \
+            and (user_grade is None or user_grade.value is None)
+
+    def _indexed_user_stats(self, book):
+        """
+        Return overdue/ungraded stats for user from the submission
+        indexes of the book.
+        """
+        username = self.user.username
+        source = self.stats_source
+        submitted = book.submitted_assignments(username)
+        overdue_count = 0
+        for assignment in source.past_due:
+            if      assignment.ntiid not in submitted \
+                and self.assignment_filter(assignment):
+                overdue_count += 1
+        ungraded_count = 0
+        for ntiid in tuple(book.ungraded_assignments(username)):
+            assignment = source.by_ntiid.get(ntiid)
+            # Candidates are verified, they are few
+            if      assignment is not None \
+                and self.assignment_filter(assignment) \
+                and self._is_ungraded(ntiid):
+                ungraded_count += 1
+        return overdue_count, ungraded_count
+
     @Lazy
     def _user_stats(self):
         """
         Return overdue/ungraded stats for user.
         """
+        book = self.gradebook_cache.gradebook
+        if self.stats_source is not None and book.has_submission_index():
+            return self._indexed_user_stats(book)
+
         assignments = (
             x for x in self.assignments if self.assignment_filter(x)
         )
@@ -271,7 +366,7 @@ class UserGradeBookSummary(UserGradeSummary):
     def predicted_grade(self):
         result = None
         if self.grade_policy:
-            result = calculate_predicted_grade(self.user, self.grade_policy)
+            result = get_predicted_grade(self.user, self.grade_policy)
         return result
 
     @Lazy
@@ -280,9 +375,6 @@ class UserGradeBookSummary(UserGradeSummary):
 
     @Lazy
     def ungraded_count(self):
-        # XXX: For future perf improvments, if filtering by ungraded, we could
-        # just iterate over the submisison/gradebook looking for ungraded
-        # submissions (instead of over filtered assignments).
         return self._user_stats[1]
 
 
@@ -293,7 +385,8 @@ class UserGradeBookSummary(UserGradeSummary):
              name='GradeBookSummary',
              request_method='GET')
 class GradeBookSummaryView(AbstractAuthenticatedView,
-                           BatchingUtilsMixin):
+                           BatchingUtilsMixin,
+                           ConditionalGetMixin):
     """
     Return the gradebook summary for students in the given course.
 
@@ -332,11 +425,25 @@ class GradeBookSummaryView(AbstractAuthenticatedView,
     search
             The username to search on. If not found, an empty set is returned.
 
+    batchCursor
+            Opaque cursor (empty for the first batch) to page through the
+            ``LastName`` and ``Username`` sorts without building and sorting
+            the whole scope. The cursor of the following batch (or null)
+            is returned as ``BatchCursor``. Ignored when searching or
+            batching around a username.
+
+    Responses carry an ``ETag`` (and ``Last-Modified``) derived from
+    the committed state of the grades, enrollments, submissions, user
+    names, grading policy and published assignments of the course;
+    matching conditional requests are answered with ``304 Not Modified``.
+
     """
 
     _DEFAULT_BATCH_SIZE = 50
     _DEFAULT_BATCH_START = 0
 
+    filter_scope_name = None
+
     def __init__(self, context, request):
         super(GradeBookSummaryView, self).__init__(request)
         self.request = request
@@ -382,10 +489,43 @@ class GradeBookSummaryView(AbstractAuthenticatedView,
         # Cache entries for the life of this view
         return _GradeBookEntryCachingSource(self.gradebook)
 
+    @Lazy
+    def stats_source(self):
+        return _AssignmentStatsSource(self.course, self.assignments)
+
+    def _conditional_stamps(self):
+        book = self.gradebook
+        return (book.change_stamp, book.enrollment_stamp,
+                book.submission_stamp, book.name_stamp)
+
+    def _conditional_validator(self):
+        policy = self.grade_policy
+        policy_stamp = committed_stamp(policy) if policy is not None else 0
+        stamps = self._conditional_stamps() + (policy_stamp,)
+        if None in stamps:
+            return None
+        # Overdue counts change as due dates pass
+        assignments = tuple(sorted(x.ntiid for x in self.assignments))
+        past_due = tuple(sorted(x.ntiid for x in self.stats_source.past_due))
+        return stamps + (assignments, past_due)
+
+    def _conditional_last_modified(self):
+        book, policy = self.gradebook, self.grade_policy
+        times = [stamp_time(x) for x in self._conditional_stamps()]
+        times.append(book.lastModified or 0)
+        times.append(getattr(policy, 'lastModified', None) or 0)
+        for assignment in self.assignments:
+            times.append(getattr(assignment, 'publishLastModified', None) or 0)
+        context = IQAssignmentDateContext(self.course)
+        for assignment in self.stats_source.past_due:
+            due_date = context.of(assignment).available_for_submission_ending
+            times.append(timegm(due_date.utctimetuple()))
+        return max(times)
+
     def _get_summary_for_student(self, username):
         return UserGradeBookSummary(username, self.course, self.assignments,
                                     self.gradebook_cache, self.final_grade_entry,
-                                    self.grade_policy)
+                                    self.grade_policy, self.stats_source)
 
     def _get_summaries_for_usernames(self, student_names):
         """
@@ -397,36 +537,29 @@ class GradeBookSummaryView(AbstractAuthenticatedView,
         )
         return tuple(x for x in students_iter if x is not None)
 
+    @Lazy
+    def _enrollment_scopes(self):
+        return get_enrollment_scopes(self.course)
+
     @Lazy
     def _instructors(self):
-        instructor_usernames = {
-            x.username.lower() for x in self.course.instructors
-        }
-        return instructor_usernames
+        return self._enrollment_scopes.instructors
 
     @Lazy
     def _all_students(self):
-        enrollments = ICourseEnrollments(self.course)
-        result = {x.lower() for x in enrollments.iter_principals()}
-        return result - self._instructors
+        return self._enrollment_scopes.sharing_all
 
     @Lazy
     def _open_students(self):
-        student_names = self._all_students - self._for_credit_students
-        return student_names
+        return self._enrollment_scopes.sharing_open
 
     @Lazy
     def _for_credit_students(self):
-        for_credit_scope = self.course.SharingScopes[ES_CREDIT]
-        student_names = {
-            x.lower() for x
-            in IEnumerableEntityContainer(for_credit_scope).iter_usernames()
-        }
-        return student_names & self._all_students - self._instructors
+        return self._enrollment_scopes.sharing_for_credit
 
-    def _get_enrollment_scoped_summaries(self, filter_by):
+    def _get_enrollment_scope(self, filter_by):
         """
-        Find the enrollment scoped user summaries.
+        Return the name and students of the requested enrollment scope.
         """
         student_names = None
 
@@ -452,68 +585,124 @@ class GradeBookSummaryView(AbstractAuthenticatedView,
                 student_names = self._for_credit_students
 
         self.filter_scope_name = filter_scope_name
-        user_summaries = self._get_summaries_for_usernames(student_names)
-        return user_summaries
+        return filter_scope_name, student_names
 
-    def _do_get_user_summaries(self):
+    def _get_enrollment_scoped_summaries(self, filter_by):
         """
-        Get the filtered user summaries of users we may want to return.
+        Find the enrollment scoped user summaries.
         """
+        student_names = self._get_enrollment_scope(filter_by)[1]
+        user_summaries = self._get_summaries_for_usernames(student_names)
+        return user_summaries
+
+    def _get_filter_by(self):
         # We expect a list of filters.
         # They can filter by counts or by enrollment scope (or both).
         filter_by = self.request.params.get('filter')
         filter_by = filter_by.split(',') if filter_by else ()
-        filter_by = [x.lower() for x in filter_by]
-
-        user_summaries = self._get_enrollment_scoped_summaries(filter_by)
+        return [x.lower() for x in filter_by]
 
+    def _get_summary_filter(self, filter_by):
+        """
+        Return the predicate of the requested count filter, if any.
+        """
         if 'ungraded' in filter_by:
-            user_summaries = tuple(
-                x for x in user_summaries if x.ungraded_count > 0
-            )
+            return lambda x: x.ungraded_count > 0
         elif 'overdue' in filter_by:
-            user_summaries = tuple(
-                x for x in user_summaries if x.overdue_count > 0
-            )
+            return lambda x: x.overdue_count > 0
         elif 'actionable' in filter_by:
-            user_summaries = tuple(
-                x for x in user_summaries if x.overdue_count > 0 or x.ungraded_count > 0
-            )
+            return lambda x: x.overdue_count > 0 or x.ungraded_count > 0
+        return None
+
+    def _do_get_user_summaries(self):
+        """
+        Get the filtered user summaries of users we may want to return.
+        """
+        filter_by = self._get_filter_by()
+        user_summaries = self._get_enrollment_scoped_summaries(filter_by)
+
+        predicate = self._get_summary_filter(filter_by)
+        if predicate is not None:
+            user_summaries = tuple(x for x in user_summaries if predicate(x))
 
         # Resolve
         user_summaries = [x for x in user_summaries]
 
         return user_summaries
 
+    def _get_batch_window(self):
+        """
+        Return how many of the leading sorted rows the requested batch
+        needs, or None if we must sort everything (e.g. when batching
+        around a user).
+        """
+        params = self.request.params
+        if      params.get('batchContainingUsername') \
+            or  params.get('batchContainingUsernameFilterByScope'):
+            return None
+        batch_size, batch_start = self._get_batch_size_start()
+        if batch_size is None or batch_start is None:
+            return None
+        return batch_start + batch_size
+
     def _get_sorted_result_set(self, user_summaries, sort_key, sort_desc=False):
         """
         Get the sorted result set.
+
+        If we only need the first page(s) of results, we only partially
+        sort: the rows up to the end of the requested batch are sorted
+        and followed by the remaining (unsorted) rows, so that counts
+        and batch links are unchanged.
         """
-        user_summaries = sorted(user_summaries, key=sort_key,
-                                reverse=sort_desc)
-        return user_summaries
+        window = self._get_batch_window()
+        if window is None or window >= len(user_summaries):
+            return sorted(user_summaries, key=sort_key, reverse=sort_desc)
+
+        # Like sorted(), these are stable
+        select = heapq.nlargest if sort_desc else heapq.nsmallest
+        result = select(window, user_summaries, key=sort_key)
+        head = {id(x) for x in result}
+        result.extend(x for x in user_summaries if id(x) not in head)
+        return result
 
     def _get_sort_key(self, sort_on):
-        # Sorting by last_name is default
-        def sort_key(x): return x.last_name.lower() if x.last_name else ''
-
-        if sort_on:
-            sort_on = sort_on.lower()
-            if sort_on == 'grade':
-                def sort_key(x):
-                    return x.grade_tuple
-            elif sort_on == 'alias':
-                def sort_key(x):
-                    return x.alias.lower() if x.alias else ''
-            elif sort_on == 'username':
-                def sort_key(x):
-                    return x.username.lower() if x.username else ''
-            elif sort_on == 'predictedgrade':
-                def sort_key(x):
-                    return getattr(x.predicted_grade, 'Correctness', None) or 0
-
+        sort_on = sort_on.lower() if sort_on else None
+        if sort_on == 'grade':
+            def sort_key(x):
+                return x.grade_tuple
+        elif sort_on == 'alias':
+            def sort_key(x):
+                return x.alias.lower() if x.alias else ''
+        elif sort_on == 'username':
+            def sort_key(x):
+                return x.username.lower() if x.username else ''
+        elif sort_on == 'predictedgrade':
+            def sort_key(x):
+                return getattr(x.predicted_grade, 'Correctness', None) or 0
+        else:
+            # Sorting by last_name is default
+            def sort_key(x):
+                return x.last_name.lower() if x.last_name else ''
         return sort_key
 
+    def _get_presorted_key(self, sort_on, sort_key):
+        """
+        For the roster sorts of a resolved enrollment scope, return a key
+        reading the sort keys of the cached presorted roster, so that
+        the names of the summaries outside the requested batch are never
+        resolved. Users missing from the roster fall back to the given key.
+        """
+        sort_on = (sort_on or SORT_LAST_NAME).lower()
+        if self.filter_scope_name is None or sort_on not in ROSTER_SORTS:
+            return sort_key
+        roster = get_sorted_roster(self.course, self.filter_scope_name, sort_on)
+        keys = {username: key for key, username in roster.rows}
+
+        def presorted_key(x):
+            key = keys.get(x._username)
+            return key if key is not None else sort_key(x)
+        return presorted_key
+
     def _check_batch_around(self, user_summaries):
         """
         Return our batch around the given username.
@@ -531,12 +720,34 @@ class GradeBookSummaryView(AbstractAuthenticatedView,
             self._batch_on_item(user_summaries, batch_around_test,
                                 batch_containing=True)
 
+    def _prime_predicted_grades(self, user_summaries):
+        """
+        Compute the predicted grades of the given summaries that do not
+        have one yet in a single pass of the grading policy.
+        """
+        if not self.grade_policy:
+            return
+        pending = [
+            x for x in user_summaries
+            if      isinstance(x, UserGradeBookSummary)
+                and 'predicted_grade' not in x.__dict__
+        ]
+        if not pending:
+            return
+        users = [x.user for x in pending]
+        predicted = get_predicted_grades(users, self.grade_policy)
+        for summary, (unused_user, grade) in zip(pending, predicted):
+            summary.predicted_grade = grade
+
     def _get_user_result_set(self, result_dict, user_summaries):
         """
         Return a sorted/batched collection of user summaries to return.
         """
         sort_on = self.request.params.get('sortOn')
         sort_key = self._get_sort_key(sort_on)
+        sort_key = self._get_presorted_key(sort_on, sort_key)
+        if sort_on and sort_on.lower() == 'predictedgrade':
+            self._prime_predicted_grades(user_summaries)
 
         # Ascending is default
         sort_order = self.request.params.get('sortOrder')
@@ -615,10 +826,85 @@ class GradeBookSummaryView(AbstractAuthenticatedView,
         results = [x for x in user_summaries if matches(x)]
         return results
 
+    def _get_cursor_sort(self):
+        """
+        Return the roster sort of the request if its batches can be
+        served with a cursor, otherwise None.
+        """
+        params = self.request.params
+        if      params.get('search') \
+            or  params.get('batchContainingUsername') \
+            or  params.get('batchContainingUsernameFilterByScope'):
+            return None
+        sort_on = (params.get('sortOn') or SORT_LAST_NAME).lower()
+        return sort_on if sort_on in ROSTER_SORTS else None
+
+    def _get_cursor_total(self, roster, predicate):
+        """
+        Return how many students of the given roster a cursor request
+        returns, or None if we would have to build every summary to
+        know (e.g. when filtering by counts).
+        """
+        return len(roster) if predicate is None else None
+
+    def _get_cursor_user_summaries(self, result_dict, cursor, sort_on):
+        """
+        Return the batch of user summaries following the given cursor,
+        scanning the presorted roster of the requested scope. Only the
+        summaries of the batch are built.
+        """
+        try:
+            after = decode_roster_cursor(cursor, sort_on) if cursor else None
+        except ValueError:
+            raise_json_error(self.request,
+                             hexc.HTTPUnprocessableEntity,
+                             {
+                                 'message': _(u"Invalid batch cursor."),
+                             },
+                             None)
+        sort_order = self.request.params.get('sortOrder')
+        sort_descending = bool(
+            sort_order and sort_order.lower() == 'descending')
+        batch_size = self._get_batch_size_start()[0] or self._DEFAULT_BATCH_SIZE
+
+        filter_by = self._get_filter_by()
+        scope_name = self._get_enrollment_scope(filter_by)[0]
+        roster = get_sorted_roster(self.course, scope_name, sort_on)
+        predicate = self._get_summary_filter(filter_by)
+        total = self._get_cursor_total(roster, predicate)
+        if total is not None:
+            result_dict['TotalItemCount'] = total
+
+        sort_key = self._get_sort_key(sort_on)
+        results = []
+        last_row = next_cursor = None
+        for row in roster.iter_after(after, sort_descending):
+            if len(results) >= batch_size:
+                next_cursor = encode_roster_cursor(sort_on, last_row)
+                break
+            last_row = row
+            summary = self._get_summary_for_student(row[1])
+            if summary is None:
+                continue
+            if sort_key(summary) != row[0]:
+                # A name changed, resort on the next request
+                invalidate_sorted_roster(self.course, scope_name, sort_on)
+            if predicate is None or predicate(summary):
+                results.append(summary)
+        result_dict['BatchCursor'] = next_cursor
+        return results
+
     def _get_user_summaries(self, result_dict):
         """
         Returns a list of user summaries.
         """
+        # Cursor batches are read off the presorted roster
+        cursor = self.request.params.get('batchCursor')
+        if cursor is not None:
+            sort_on = self._get_cursor_sort()
+            if sort_on is not None:
+                return self._get_cursor_user_summaries(result_dict, cursor, sort_on)
+
         # 1. Filter
         # 2. Search
         # 3. Sort
@@ -640,8 +926,9 @@ class GradeBookSummaryView(AbstractAuthenticatedView,
         return results
 
     def __call__(self):
-        # TODO: We could cache on the gradebook, but the
-        # overdue/ungraded counts could change.
+        response = self._not_modified_response()
+        if response is not None:
+            return response
         result_dict = LocatedExternalDict()
         user_summaries = self._get_user_summaries(result_dict)
 
@@ -651,6 +938,7 @@ class GradeBookSummaryView(AbstractAuthenticatedView,
         result_dict[MIMETYPE] = 'application/vnd.nextthought.gradebook.gradebooksummary'
 
         any_final_grades = False
+        self._prime_predicted_grades(user_summaries)
         # Now build our data for each user
         for user_summary in user_summaries:
             user_dict = self._get_user_dict(user_summary)
@@ -698,6 +986,8 @@ class AssignmentSummaryView(GradeBookSummaryView):
             The username to search on, regardless of enrollment scope. If
             not found, an empty set is returned.
 
+    Conditional requests are answered as by :class:`GradeBookSummaryView`.
+
     """
 
     def __init__(self, context, request):
@@ -718,18 +1008,22 @@ class AssignmentSummaryView(GradeBookSummaryView):
             result = None
         return result
 
+    def _get_cursor_total(self, roster, predicate):
+        # Students without access to the assignment are filtered out
+        if predicate is not None:
+            return None
+        usernames = (row[1] for row in roster.rows)
+        return len(self._get_summaries_for_usernames(usernames))
+
     def _get_sort_key(self, sort_on):
-        sort_key = None
-        if sort_on:
-            sort_on = sort_on.lower()
-            if sort_on == 'feedbackcount':
-                def sort_key(x):
-                    return x.feedback_count if x.feedback_count else ''
-            elif sort_on == 'datesubmitted':
-                def sort_key(x):
-                    return x.created_date if x.created_date else ''
-
-        if sort_key is None:
+        lower_sort_on = sort_on.lower() if sort_on else None
+        if lower_sort_on == 'feedbackcount':
+            def sort_key(x):
+                return x.feedback_count if x.feedback_count else ''
+        elif lower_sort_on == 'datesubmitted':
+            def sort_key(x):
+                return x.created_date if x.created_date else ''
+        else:
             # Super class handles name and grade sorting, as well as the
             # default.
             sort_key = super(AssignmentSummaryView, self)._get_sort_key(sort_on)
@@ -749,6 +1043,9 @@ class AssignmentSummaryView(GradeBookSummaryView):
         return user_dict
 
     def __call__(self):
+        response = self._not_modified_response()
+        if response is not None:
+            return response
         result_dict = LocatedExternalDict()
         user_summaries = self._get_user_summaries(result_dict)
 